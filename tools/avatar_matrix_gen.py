@@ -3,25 +3,39 @@
 Avatar Matrix Batch Generator for Immanence OS
 
 Orchestrates the 5 orthogonal passes defined in the Matrix Exploration Playbook.
-Uses tools/comfy_gen.py underneath for individual generations.
+Generates in-process through comfy.batch, keeping a bounded window of
+prompts in flight on the shared ComfyUI client.
 
 Usage:
     python tools/avatar_matrix_gen.py --pass 1 --seeds 5
     python tools/avatar_matrix_gen.py --pass 2 --seeds 10
     python tools/avatar_matrix_gen.py --all --seeds 3
+    python tools/avatar_matrix_gen.py --full --shard 2/4   # slice 2 of 4 machines
 """
 
 import argparse
 import json
-import subprocess
+import random
 import sys
-import time
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from comfy.batch import Txt2ImgJob, run_jobs, summarize
+from comfy.cache import get_cache, seed_for
+from comfy.client import get_client
+from comfy.ledger import get_ledger
+from comfy.shard import Shard, combination_key, matrix_root, write_manifest
+
 # Project root
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# Prompts kept in flight on ComfyUI at once
+DEFAULT_WINDOW = 2
+
+NEGATIVE_PROMPT = "text, watermark, blurry, photorealistic, harsh edges, spiritual symbols"
+
 # Output directory
 MATRIX_ROOT = PROJECT_ROOT / "AvatarMatrix"
 
@@ -167,52 +181,104 @@ Stage-appropriate color palette only: {stage_info['palette']}"""
     return prompt
 
 
-def generate_asset(prompt, output_path, metadata, dry_run=False, wait=True):
-    """Generate a single asset using comfy_gen.py."""
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Save metadata
-    meta_path = output_path.with_suffix('.json')
-    with open(meta_path, 'w') as f:
-        json.dump(metadata, indent=2, fp=f)
-    
-    if dry_run:
-        print(f"  [DRY RUN] Would generate: {output_path.name}")
-        print(f"  Metadata saved to: {meta_path.name}")
-        return True
-    
-    # Build command
-    cmd = [
-        sys.executable,
-        str(PROJECT_ROOT / "tools" / "comfy_gen.py"),
-        prompt,
-        "--output", str(output_path.relative_to(PROJECT_ROOT)),
-        "--negative", "text, watermark, blurry, photorealistic, harsh edges, spiritual symbols",
-        "--steps", "9",
-        "--cfg", "1.0",
-        "--prefix", output_path.stem
-    ]
-    
-    if not wait:
-        cmd.append("--no-download")
+def make_job(prompt, output_paths, seed=None):
+    """Build the generation job for one matrix cell (one image per output path)."""
+    first, *rest = output_paths
+    return Txt2ImgJob(
+        prompt=prompt,
+        output_path=first,
+        extra_paths=rest,
+        negative=NEGATIVE_PROMPT,
+        steps=9,
+        cfg=1.0,
+        prefix=first.stem,
+        seed=seed,
+        name=first.name if not rest else f"{first.stem} (+{len(rest)} seeds)",
+    )
+
+
+def group_batches(items, batch_size):
+    """Group consecutive items sharing a prompt into chunks of up to `batch_size`."""
+    groups = []
+    for item in items:
+        group = groups[-1] if groups else None
+        if group and len(group) < batch_size and group[0][0] == item[0]:
+            group.append(item)
+        else:
+            groups.append([item])
+    return groups
+
+
+def generate_assets(items, dry_run=False, wait=True, window=DEFAULT_WINDOW, batch_size=1, cache=True,
+                    shard=None, skip_existing=False):
+    """Generate (prompt, output_path, metadata) items in-process.
+
+    Metadata is written next to each output first; up to `window` prompts
+    are kept in flight on ComfyUI. With `batch_size` > 1, consecutive seeds
+    of the same prompt share one job (EmptyLatentImage.batch_size = N), so
+    the prompt is encoded once per combination. With `cache`, sampler seeds
+    are derived from the output file name, so a rerun restores unchanged
+    cells from the result cache. Submissions go to the job ledger, so an
+    interrupted pass resumes without requeueing finished prompts.
+    With a `shard` (comfy.shard.Shard), only the combinations hashing to it
+    are generated and its manifest is written for the merge check; with
+    `skip_existing`, images already on disk are left alone.
+    Returns the list of AssetResults.
+    """
+    if shard is not None:
+        all_items = items
+        root = matrix_root([item[1] for item in all_items]) if all_items else PROJECT_ROOT
+        items = [item for item in items if shard.owns(combination_key(item[1], item[0], root))]
+        items = [(prompt, output_path, dict(metadata, shard=str(shard))) for prompt, output_path, metadata in items]
+        print(f"\n🧩 Shard {shard}: {len(items)} of {len(all_items)} images")
+        if not dry_run and all_items:
+            manifest = write_manifest(shard, [item[1] for item in all_items], [item[1] for item in items])
+            print(f"  Manifest: {manifest}")
+    if skip_existing:
+        for _, output_path, _ in items:
+            if output_path.exists():
+                print(f"  ⏭️ Already exists: {output_path.name}")
+        items = [item for item in items if not item[1].exists()]
+    
+    jobs = []
+    for group in group_batches(items, max(1, batch_size)):
+        prompt = group[0][0]
+        # One sampler seed per job; batched images are indexed within it
+        seed = seed_for(group[0][1].name) if cache else random.randint(0, 2**32 - 1)
+        
+        for batch_index, (_, output_path, metadata) in enumerate(group):
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            if len(group) > 1:
+                metadata = dict(metadata, batch={"size": len(group), "index": batch_index, "samplerSeed": seed})
+            
+            # Save metadata
+            meta_path = output_path.with_suffix('.json')
+            with open(meta_path, 'w') as f:
+                json.dump(metadata, indent=2, fp=f)
+            
+            if dry_run:
+                print(f"  [DRY RUN] Would generate: {output_path.name}")
+                print(f"  Metadata saved to: {meta_path.name}")
+        
+        if not dry_run:
+            jobs.append(make_job(prompt, [output_path for _, output_path, _ in group], seed))
     
-    print(f"  Queuing: {output_path.name}")
+    if not jobs:
+        return []
     
-    try:
-        # Run without capturing output to see it in real-time
-        result = subprocess.run(cmd, text=True, cwd=PROJECT_ROOT)
-        if result.returncode == 0:
-            # print(f"  ✅ Finished: {output_path.name}")
-            return True
-        else:
-            print(f"  ❌ Command failed with return code {result.returncode}")
-            return False
-    except Exception as e:
-        print(f"  ❌ Exception during subprocess: {e}")
-        return False
+    print(f"\n📤 Generating {sum(job.batch_size for job in jobs)} images in {len(jobs)} jobs ({window} in flight)...")
+    results = run_jobs(jobs, window=window, wait=wait, cache=get_cache() if cache else None, ledger=get_ledger())
+    summarize(results)
+    return results
 
 
-def run_pass_1(seeds=5, dry_run=False, wait=True):
+def generate_asset(prompt, output_path, metadata, dry_run=False, wait=True, cache=True):
+    """Generate a single asset in-process."""
+    results = generate_assets([(prompt, output_path, metadata)], dry_run, wait, window=1, cache=cache)
+    return all(result.ok for result in results)
+
+
+def run_pass_1(seeds=5, dry_run=False, wait=True, window=DEFAULT_WINDOW, batch_size=1, cache=True):
     """
     PASS 1 — Stage Baseline Lock (No Path, No Vector)
     
@@ -227,6 +293,7 @@ def run_pass_1(seeds=5, dry_run=False, wait=True):
     print()
     
     pass_dir = MATRIX_ROOT / "Pass_1_StageBaseline"
+    items = []
     
     for stage in STAGES:
         stage_name = stage["name"]
@@ -252,15 +319,14 @@ def run_pass_1(seeds=5, dry_run=False, wait=True):
                 "confusionRisk": None
             }
             
-            generate_asset(prompt, output_path, metadata, dry_run, wait)
-            
-            if not dry_run:
-                time.sleep(1)  # Throttle to avoid hammering ComfyUI socket
+            items.append((prompt, output_path, metadata))
+    
+    generate_assets(items, dry_run, wait, window, batch_size, cache)
     
     print(f"\n✅ Pass 1 complete. Results in: {pass_dir}")
 
 
-def run_pass_2(seeds=10, dry_run=False, wait=True):
+def run_pass_2(seeds=10, dry_run=False, wait=True, window=DEFAULT_WINDOW, batch_size=1, cache=True):
     """
     PASS 2 — Path Expression Within a Fixed Stage
     
@@ -275,6 +341,7 @@ def run_pass_2(seeds=10, dry_run=False, wait=True):
     print()
     
     pass_dir = MATRIX_ROOT / "Pass_2_PathIsolation" / "Stage_FLAME"
+    items = []
     fixed_stage = "FLAME"
     
     for path_name in ["Ekagrata", "Sahaja", "Vigilance"]:
@@ -300,15 +367,14 @@ def run_pass_2(seeds=10, dry_run=False, wait=True):
                 "confusionRisk": None
             }
             
-            generate_asset(prompt, output_path, metadata, dry_run, wait)
-            
-            if not dry_run and wait:
-                time.sleep(2)
+            items.append((prompt, output_path, metadata))
+    
+    generate_assets(items, dry_run, wait, window, batch_size, cache)
     
     print(f"\n✅ Pass 2 complete. Results in: {pass_dir}")
 
 
-def run_pass_3(seeds=10, dry_run=False, wait=True):
+def run_pass_3(seeds=10, dry_run=False, wait=True, window=DEFAULT_WINDOW, batch_size=1, cache=True):
     """
     PASS 3 — Attention Vector Texture Isolation
     
@@ -323,6 +389,7 @@ def run_pass_3(seeds=10, dry_run=False, wait=True):
     print()
     
     pass_dir = MATRIX_ROOT / "Pass_3_VectorIsolation" / "Stage_FLAME" / "Path_Ekagrata"
+    items = []
     fixed_stage = "FLAME"
     fixed_path = "Ekagrata"
     
@@ -349,15 +416,14 @@ def run_pass_3(seeds=10, dry_run=False, wait=True):
                 "confusionRisk": None
             }
             
-            generate_asset(prompt, output_path, metadata, dry_run, wait)
-            
-            if not dry_run and wait:
-                time.sleep(2)
+            items.append((prompt, output_path, metadata))
+    
+    generate_assets(items, dry_run, wait, window, batch_size, cache)
     
     print(f"\n✅ Pass 3 complete. Results in: {pass_dir}")
 
 
-def run_pass_4(seeds=5, dry_run=False, wait=True):
+def run_pass_4(seeds=5, dry_run=False, wait=True, window=DEFAULT_WINDOW, batch_size=1, cache=True):
     """
     PASS 4 — Path × Vector Interaction
     
@@ -372,6 +438,7 @@ def run_pass_4(seeds=5, dry_run=False, wait=True):
     print()
     
     pass_dir = MATRIX_ROOT / "Pass_4_PathVectorCross" / "Stage_FLAME"
+    items = []
     fixed_stage = "FLAME"
     
     for path_name in ["Ekagrata", "Sahaja", "Vigilance"]:
@@ -398,15 +465,14 @@ def run_pass_4(seeds=5, dry_run=False, wait=True):
                     "confusionRisk": None
                 }
                 
-                generate_asset(prompt, output_path, metadata, dry_run, wait)
-                
-                if not dry_run and wait:
-                    time.sleep(2)
+                items.append((prompt, output_path, metadata))
+    
+    generate_assets(items, dry_run, wait, window, batch_size, cache)
     
     print(f"\n✅ Pass 4 complete. Results in: {pass_dir}")
 
 
-def run_pass_5(seeds=5, dry_run=False, wait=True):
+def run_pass_5(seeds=5, dry_run=False, wait=True, window=DEFAULT_WINDOW, batch_size=1, cache=True):
     """
     PASS 5 — Vertical Consistency Check
     
@@ -421,6 +487,7 @@ def run_pass_5(seeds=5, dry_run=False, wait=True):
     print()
     
     pass_dir = MATRIX_ROOT / "Pass_5_VerticalConsistency" / "Path_Sahaja" / "Vector_Neutral"
+    items = []
     fixed_path = "Sahaja"
     fixed_vector = "Neutral"
     
@@ -448,15 +515,15 @@ def run_pass_5(seeds=5, dry_run=False, wait=True):
                 "confusionRisk": None
             }
             
-            generate_asset(prompt, output_path, metadata, dry_run, wait)
-            
-            if not dry_run and wait:
-                time.sleep(2)
+            items.append((prompt, output_path, metadata))
+    
+    generate_assets(items, dry_run, wait, window, batch_size, cache)
     
     print(f"\n✅ Pass 5 complete. Results in: {pass_dir}")
 
 
-def run_sanskrit_matrix(seeds=2, dry_run=False, wait=True):
+def run_sanskrit_matrix(seeds=2, dry_run=False, wait=True, window=DEFAULT_WINDOW, batch_size=1, cache=True,
+                        shard=None):
     """
     Generate the Full 5x6x3 Sanskrit Matrix.
     
@@ -469,6 +536,7 @@ def run_sanskrit_matrix(seeds=2, dry_run=False, wait=True):
     print()
     
     pass_dir = MATRIX_ROOT / "Sanskrit_Matrix"
+    items = []
     
     path_names = list(PATHS.keys())
     vector_names = list(VECTORS.keys())
@@ -492,11 +560,6 @@ def run_sanskrit_matrix(seeds=2, dry_run=False, wait=True):
                     filename = f"{stage_name.lower()}_{vector_name.lower()}_{path_name.lower()}_seed{seed_idx:03d}.png"
                     output_path = combo_dir / filename
                     
-                    # Skip if exists
-                    if output_path.exists():
-                        print(f"  ⏭️ Already exists: {filename}")
-                        continue
-                        
                     metadata = {
                         "model": "Sanskrit 6-Path",
                         "stage": stage_name,
@@ -508,10 +571,10 @@ def run_sanskrit_matrix(seeds=2, dry_run=False, wait=True):
                         "validation": "PENDING"
                     }
                     
-                    generate_asset(prompt, output_path, metadata, dry_run, wait)
-                    
-                    if not dry_run and wait:
-                        time.sleep(1)
+                    items.append((prompt, output_path, metadata))
+    
+    # Existing images are skipped after sharding, so every shard sees the whole matrix
+    generate_assets(items, dry_run, wait, window, batch_size, cache, shard=shard, skip_existing=True)
     
     print(f"\n✅ Sanskrit Matrix generation sync complete. Results in: {pass_dir}")
 
@@ -526,10 +589,22 @@ def main():
     parser.add_argument('--seeds', type=int, default=2, help='Number of seeds per combination (default: 2)')
     parser.add_argument('--dry-run', action='store_true', help='Preview structure without generating')
     parser.add_argument('--no-wait', action='store_true', help='Fire-and-forget mode')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help=f'Prompts kept in flight on ComfyUI (default: {DEFAULT_WINDOW})')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Seeds rendered per ComfyUI job as one latent batch (default: 1; set to --seeds to batch each combination)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Regenerate every image with random seeds instead of reusing cached results')
+    parser.add_argument('--shard', type=Shard.parse, default=None, metavar='I/N',
+                        help='Generate only slice I of N (e.g. 2/4); check merged slices with comfy/shard.py verify')
+    parser.add_argument('--queue-depth', type=int, default=None,
+                        help='Submit only while fewer prompts than this are pending on ComfyUI (default: mcp.queue_low_water in presets.yml)')
     
     args = parser.parse_args()
     
     wait = not args.no_wait
+    if args.queue_depth is not None:
+        get_client().low_water = args.queue_depth
     
     print("="*80)
     print("AVATAR SANSKRIT MATRIX GENERATOR")
@@ -539,14 +614,17 @@ def main():
     print(f"Seeds per combo: {args.seeds}")
     
     if args.full:
-        run_sanskrit_matrix(args.seeds, args.dry_run, wait)
+        run_sanskrit_matrix(args.seeds, args.dry_run, wait, args.window, args.batch_size, not args.no_cache, args.shard)
     else:
         # Default to full if no pass specified anymore
-        run_sanskrit_matrix(args.seeds, args.dry_run, wait)
+        run_sanskrit_matrix(args.seeds, args.dry_run, wait, args.window, args.batch_size, not args.no_cache, args.shard)
     
     print("\n" + "="*80)
     print("PROCESS COMPLETE")
     print("="*80)
+    if not wait:
+        print("Queued jobs are recorded in the job ledger; save them when ComfyUI finishes with:")
+        print("  python tools/comfy/comfyctl.py collect")
 
 
 if __name__ == "__main__":
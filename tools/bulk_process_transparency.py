@@ -1,25 +1,14 @@
 
-import numpy as np
-from PIL import Image
 import os
 import glob
+from pathlib import Path
+
+from comfy.postprocess import process_file
 
 def process_transparency(image_path, output_path):
-    img = Image.open(image_path).convert('RGBA')
-    data = np.array(img)
-    
     # We use the max of R, G, B as the alpha channel
     # This works well for additive/transparent objects on black
-    rgb = data[:, :, :3]
-    alpha = np.max(rgb, axis=2)
-    
-    # Optional: Boost alpha slightly to ensure light colors aren't too translucent
-    # alpha = np.clip(alpha * 1.2, 0, 255).astype(np.uint8)
-    
-    data[:, :, 3] = alpha
-    
-    new_img = Image.fromarray(data)
-    new_img.save(output_path)
+    process_file(Path(image_path), [{"op": "alpha", "mode": "max"}], Path(output_path))
     print(f"Processed: {os.path.basename(image_path)} -> {os.path.basename(output_path)}")
 
 def main():
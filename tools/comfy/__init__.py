@@ -0,0 +1,6 @@
+"""
+Shared ComfyUI tooling for Immanence OS asset generators.
+
+Scripts in tools/ import these modules as `comfy.<module>`; scripts inside
+tools/comfy/ put tools/ on sys.path first.
+"""
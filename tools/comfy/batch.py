@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+In-process batch generation for Immanence OS orchestrators.
+
+Scripts that used to shell out to `tools/comfy_gen.py` once per image build
+`Txt2ImgJob`s and hand them to `run_jobs`, which keeps a bounded window of
+prompts in flight on the shared ComfyClient: while one image downloads the
+next is already queued on the backend, with no per-image interpreter start,
+fresh connection, or fixed sleep. A job with `extra_paths` renders several
+seeds as one latent batch and fans the images out to its output paths.
+A job's `post` chain (comfy.postprocess: alpha key, trim, resize, encode)
+is applied to the downloaded bytes in a process pool before anything is
+written, so keyed WebPs come out of the run directly.
+With `pack=K`, K jobs go out as one packed `/prompt` (see comfy.packing):
+one checkpoint load and one negative encode per pack, outputs split back
+to each job by node ID. With a `cache` (comfy.cache), jobs whose graph was
+rendered before are restored from disk, unseeded jobs get a seed derived
+from their name, and identical jobs within a run are submitted once. Jobs
+are submitted grouped by checkpoint and resolution (comfy.scheduler), and
+`warmup=True` loads each group's models with a one-step render first.
+With a `ledger` (comfy.ledger), every submission is recorded so a rerun
+after an interruption downloads prompts that already finished instead of
+queueing them again. Bulk runs (the default lane) submit only while the
+server's pending queue is below the client's low-water mark, so `wait=False`
+feeds ComfyUI as it drains instead of queueing every job at once.
+
+Usage:
+    from comfy.batch import Txt2ImgJob, run_jobs
+
+    jobs = [Txt2ImgJob(prompt, Path("public/a.png"), prefix="a"), ...]
+    results = run_jobs(jobs, window=2, pack=4)
+"""
+
+import random
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from comfy.cache import ResultCache, seed_for
+from comfy.client import BULK, ComfyClient, ComfyError, ImageRef, get_client
+from comfy.completion import ComfyExecutionError
+from comfy.ledger import DONE, FAILED, QUEUED, SUBMITTED, JobLedger, LedgerEntry, prompt_status
+from comfy.packing import pack as pack_workflows
+from comfy.postprocess import get_postprocessor, validate_chain
+from comfy.scheduler import run_after, schedule as schedule_jobs, warmup_workflow
+
+DEFAULT_CKPT = "z-image-turbo-fp8-aio.safetensors"
+DEFAULT_NEGATIVE = "text, letters, watermark, blurry, low quality, photorealistic, harsh edges"
+
+# SaveImage node in the txt2img graph built by Txt2ImgJob.workflow()
+OUTPUT_NODE = "9"
+
+
+@dataclass
+class AssetResult:
+    """Outcome of a single asset generation."""
+
+    name: str
+    output_path: Path
+    ok: bool
+    prompt_id: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    # Not rebuilt because its inputs and output are unchanged
+    skipped: bool = False
+
+
+@dataclass
+class Txt2ImgJob:
+    """One txt2img generation, mirroring the options of tools/comfy_gen.py."""
+
+    prompt: str
+    output_path: Path
+    negative: str = DEFAULT_NEGATIVE
+    width: int = 1024
+    height: int = 1024
+    steps: int = 9
+    cfg: float = 1.0
+    sampler: str = "euler_ancestral"
+    scheduler: str = "simple"
+    ckpt: str = DEFAULT_CKPT
+    prefix: str = "ComfyUI"
+    seed: Optional[int] = None
+    timeout: float = 300
+    name: Optional[str] = None
+    # Batched latents: image i of the batch is saved to output_paths[i]
+    extra_paths: List[Path] = field(default_factory=list)
+    # Post-processing chain applied in memory before saving (comfy.postprocess)
+    post: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return self.name or Path(self.output_path).name
+
+    @property
+    def output_paths(self) -> List[Path]:
+        return [Path(self.output_path), *map(Path, self.extra_paths)]
+
+    @property
+    def batch_size(self) -> int:
+        return len(self.output_paths)
+
+    def workflow(self) -> Dict[str, Any]:
+        """API-format graph (same node IDs as comfy_gen.py)."""
+        seed = self.seed if self.seed is not None else random.randint(0, 2**32 - 1)
+        return {
+            "4": {
+                "class_type": "CheckpointLoaderSimple",
+                "inputs": {"ckpt_name": self.ckpt}
+            },
+            "6": {
+                "class_type": "CLIPTextEncode",
+                "inputs": {"text": self.prompt, "clip": ["4", 1]}
+            },
+            "7": {
+                "class_type": "CLIPTextEncode",
+                "inputs": {"text": self.negative, "clip": ["4", 1]}
+            },
+            "5": {
+                "class_type": "EmptyLatentImage",
+                "inputs": {"width": self.width, "height": self.height, "batch_size": self.batch_size}
+            },
+            "3": {
+                "class_type": "KSampler",
+                "inputs": {
+                    "seed": seed,
+                    "steps": self.steps,
+                    "cfg": self.cfg,
+                    "sampler_name": self.sampler,
+                    "scheduler": self.scheduler,
+                    "denoise": 1,
+                    "model": ["4", 0],
+                    "positive": ["6", 0],
+                    "negative": ["7", 0],
+                    "latent_image": ["5", 0]
+                }
+            },
+            "8": {
+                "class_type": "VAEDecode",
+                "inputs": {"samples": ["3", 0], "vae": ["4", 2]}
+            },
+            OUTPUT_NODE: {
+                "class_type": "SaveImage",
+                "inputs": {"filename_prefix": self.prefix, "images": ["8", 0]}
+            }
+        }
+
+
+_print_lock = threading.Lock()
+
+
+def _log(message: str, error: bool = False) -> None:
+    """Print a line without interleaving output from concurrent jobs."""
+    with _print_lock:
+        print(message, file=sys.stderr if error else sys.stdout, flush=True)
+
+
+def _owner_url(client: ComfyClient, prompt_id: str) -> str:
+    """URL of the backend that ran `prompt_id`, or "" if no backend knows it."""
+    backend = client.backend_for(prompt_id)
+    return backend.base_url if backend is not None else ""
+
+
+def _save_images(
+    job: Txt2ImgJob, prompt_id: str, outputs: Dict[str, Any], client: ComfyClient, base_url: str
+) -> None:
+    # Output names are numbered per server: download from the backend that ran the prompt
+    images = [ImageRef.from_output(image, base_url) for image in outputs.get(OUTPUT_NODE, {}).get("images", [])]
+    if len(images) < job.batch_size:
+        raise ComfyError(f"Prompt {prompt_id} returned {len(images)} of {job.batch_size} images")
+    if not job.post:
+        for image, path in zip(images, job.output_paths):
+            client.download(image, path, verify=True)
+        return
+    # Keying/encoding runs in worker processes while the GPU renders the next prompt
+    processor = get_postprocessor()
+    futures = [processor.submit(client.fetch(image), job.post, path) for image, path in zip(images, job.output_paths)]
+    for future in futures:
+        future.result()
+
+
+def run_pack(
+    jobs: Sequence[Txt2ImgJob],
+    client: Optional[ComfyClient] = None,
+    wait: bool = True,
+    cache: Optional[ResultCache] = None,
+    ledger: Optional[JobLedger] = None,
+    priority: Optional[str] = None,
+) -> List[AssetResult]:
+    """Submit jobs as one packed prompt and (unless `wait` is False) download each job's images.
+
+    Downloaded images of seeded jobs are recorded in `cache`; submissions and
+    their outcome in `ledger`. `priority` is the client lane (see comfy.client).
+    """
+    client = client or get_client()
+    start = time.time()
+    workflows = [job.workflow() for job in jobs]
+    packed = pack_workflows(workflows)
+    label = jobs[0].label if len(jobs) == 1 else f"{jobs[0].label} +{len(jobs) - 1} packed"
+    try:
+        prompt_id = client.submit(packed.workflow, track=wait, priority=priority)
+    except Exception as e:
+        _log(f"  ❌ {label}: {e}", error=True)
+        return [AssetResult(job.label, Path(job.output_path), False, error=str(e), elapsed=time.time() - start) for job in jobs]
+    if ledger is not None:
+        for job, workflow, node_map in zip(jobs, workflows, packed.node_maps):
+            sent = packed.workflow if len(jobs) > 1 else None
+            ledger.submitted(job.label, job.output_paths, workflow, prompt_id, node_map[OUTPUT_NODE], sent, job.post)
+    if not wait:
+        _log(f"  📤 Queued {label} (ID: {prompt_id})")
+        return [AssetResult(job.label, Path(job.output_path), True, prompt_id, elapsed=time.time() - start) for job in jobs]
+
+    try:
+        result = client.wait(prompt_id, sum(job.timeout for job in jobs))
+        outputs = packed.split_outputs(result.outputs)
+    except Exception as e:
+        _log(f"  ❌ {label}: {e}", error=True)
+        if ledger is not None and isinstance(e, ComfyExecutionError):
+            # Timeouts stay `submitted`: the prompt may still finish and be recovered
+            for job in jobs:
+                ledger.mark(job.output_path, FAILED, str(e))
+        return [AssetResult(job.label, Path(job.output_path), False, prompt_id, str(e), time.time() - start) for job in jobs]
+
+    return [
+        _finish(job, workflow, prompt_id, job_outputs, client, cache, ledger, start, result.base_url)
+        for job, workflow, job_outputs in zip(jobs, workflows, outputs)
+    ]
+
+
+def _finish(
+    job: Txt2ImgJob,
+    workflow: Dict[str, Any],
+    prompt_id: str,
+    outputs: Dict[str, Any],
+    client: ComfyClient,
+    cache: Optional[ResultCache],
+    ledger: Optional[JobLedger],
+    start: float,
+    base_url: str,
+    note: str = "",
+) -> AssetResult:
+    """Download a finished job's images (from backend `base_url`) and record it in the cache and ledger."""
+    try:
+        _save_images(job, prompt_id, outputs, client, base_url)
+    except Exception as e:
+        _log(f"  ❌ {job.label}: {e}", error=True)
+        if ledger is not None:
+            ledger.mark(job.output_path, FAILED, str(e))
+        return AssetResult(job.label, Path(job.output_path), False, prompt_id, str(e), time.time() - start)
+    if cache is not None and job.seed is not None:
+        cache.store(cache.key(workflow, job.post), job.output_paths, prompt_id)
+    if ledger is not None:
+        ledger.mark(job.output_path, DONE)
+    elapsed = time.time() - start
+    _log(f"  ✅ {job.label} ({elapsed:.1f}s{note})")
+    return AssetResult(job.label, Path(job.output_path), True, prompt_id, elapsed=elapsed)
+
+
+def run_job(
+    job: Txt2ImgJob,
+    client: Optional[ComfyClient] = None,
+    wait: bool = True,
+    priority: Optional[str] = None,
+) -> AssetResult:
+    """Submit one job and (unless `wait` is False) download its images."""
+    return run_pack([job], client, wait, priority=priority)[0]
+
+
+def _resume(
+    job: Txt2ImgJob,
+    entry: LedgerEntry,
+    client: ComfyClient,
+    wait: bool,
+    cache: Optional[ResultCache],
+    ledger: JobLedger,
+    priority: Optional[str] = None,
+) -> List[AssetResult]:
+    """Finish a job submitted by an earlier, interrupted run; resubmit it if ComfyUI lost it."""
+    start = time.time()
+    state, outputs = prompt_status(client, entry.prompt_id)
+    if state == QUEUED and not wait:
+        _log(f"  📤 {job.label} still queued (ID: {entry.prompt_id})")
+        return [AssetResult(job.label, Path(job.output_path), True, entry.prompt_id)]
+    base_url = ""
+    if state == QUEUED:
+        try:
+            result = client.wait(entry.prompt_id, job.timeout)
+            state, outputs, base_url = DONE, result.outputs, result.base_url
+        except TimeoutError as e:
+            _log(f"  ❌ {job.label}: {e}", error=True)
+            return [AssetResult(job.label, Path(job.output_path), False, entry.prompt_id, str(e), time.time() - start)]
+        except ComfyExecutionError:
+            state = FAILED
+    if state == DONE:
+        job_outputs = {OUTPUT_NODE: outputs.get(entry.output_node, {})}
+        workflow = job.workflow()
+        base_url = base_url or _owner_url(client, entry.prompt_id)
+        return [_finish(job, workflow, entry.prompt_id, job_outputs, client, cache, ledger, start, base_url, ", recovered")]
+    return run_pack([job], client, wait, cache, ledger, priority)
+
+
+def _reconcile(
+    jobs: Sequence[Txt2ImgJob], pending: List[int], ledger: JobLedger
+) -> Tuple[Dict[int, AssetResult], Dict[int, LedgerEntry]]:
+    """Match pending jobs against the ledger.
+
+    Returns results for seeded jobs that already finished (outputs on disk)
+    and the entries of jobs an earlier run submitted but never collected.
+    """
+    done: Dict[int, AssetResult] = {}
+    unfinished: Dict[int, LedgerEntry] = {}
+    for index in pending:
+        job = jobs[index]
+        entry = ledger.find(job.output_path, job.workflow(), seeded=job.seed is not None)
+        if entry is None:
+            continue
+        if entry.state == DONE and job.seed is not None and entry.outputs_exist():
+            _log(f"  ♻️  {job.label} (already generated)")
+            done[index] = AssetResult(job.label, Path(job.output_path), True, entry.prompt_id, skipped=True)
+        elif entry.state == SUBMITTED:
+            unfinished[index] = entry
+    return done, unfinished
+
+
+def _restore_cached(
+    jobs: Sequence[Txt2ImgJob], cache: ResultCache
+) -> Tuple[List[Txt2ImgJob], Dict[int, AssetResult], Dict[int, int]]:
+    """Seed unseeded jobs from their name and serve what the cache already holds.
+
+    Returns the seeded jobs, results for cache hits by index, and the index of
+    the first identical job for every later duplicate.
+    """
+    jobs = [job if job.seed is not None else replace(job, seed=seed_for(job.label)) for job in jobs]
+    hits: Dict[int, AssetResult] = {}
+    duplicates: Dict[int, int] = {}
+    first_by_key: Dict[str, int] = {}
+    for index, job in enumerate(jobs):
+        key = cache.key(job.workflow(), job.post)
+        if key in first_by_key:
+            duplicates[index] = first_by_key[key]
+            continue
+        first_by_key[key] = index
+        entry = cache.restore(key, job.output_paths)
+        if entry is not None:
+            _log(f"  ♻️  {job.label} (cached)")
+            hits[index] = AssetResult(job.label, Path(job.output_path), True, entry.prompt_id)
+    return jobs, hits, duplicates
+
+
+def _copy_duplicate(job: Txt2ImgJob, source: Txt2ImgJob, result: AssetResult) -> AssetResult:
+    """Give a duplicate job the images already produced for an identical one."""
+    if not result.ok or not Path(source.output_path).exists():
+        return AssetResult(job.label, Path(job.output_path), result.ok, result.prompt_id, result.error)
+    for src, dst in zip(source.output_paths, job.output_paths):
+        Path(dst).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dst)
+    _log(f"  ♻️  {job.label} (same as {source.label})")
+    return AssetResult(job.label, Path(job.output_path), True, result.prompt_id)
+
+
+def _warm_up(workflow: Dict[str, Any], client: ComfyClient, wait: bool, priority: Optional[str] = None) -> List[AssetResult]:
+    """Submit a group's warm-up render; failures only cost the warm-up."""
+    warmup = warmup_workflow(workflow)
+    if warmup is None:
+        return []
+    try:
+        prompt_id = client.submit(warmup, track=wait, priority=priority)
+        if wait:
+            client.wait(prompt_id, 600)
+        _log(f"  🔥 Warmed up {model_label(workflow)}")
+    except Exception as e:
+        _log(f"  ⚠️  Warm-up failed: {e}", error=True)
+    return []
+
+
+def model_label(workflow: Dict[str, Any]) -> str:
+    """Checkpoint/UNet names loaded by a graph, for log lines."""
+    names = [
+        str(value)
+        for node in workflow.values()
+        if node.get("class_type") in ("CheckpointLoaderSimple", "UNETLoader")
+        for value in node.get("inputs", {}).values()
+        if isinstance(value, str)
+    ]
+    return ", ".join(names) or "models"
+
+
+def _cancel_run(client: ComfyClient, wait: bool) -> None:
+    """On Ctrl-C, stop everything this run queued (fire-and-forget runs keep theirs)."""
+    if not wait:
+        return
+    _log(f"  🛑 Interrupted: cancelling run {client.run_id}", error=True)
+    try:
+        cancelled = client.cancel_run()
+        _log(f"  🛑 Cancelled {len(cancelled)} prompt(s)", error=True)
+    except Exception as e:
+        _log(f"  ⚠️  Could not cancel run: {e}", error=True)
+
+
+def run_jobs(
+    jobs: Sequence[Txt2ImgJob],
+    window: int = 2,
+    wait: bool = True,
+    client: Optional[ComfyClient] = None,
+    pack: int = 1,
+    cache: Optional[ResultCache] = None,
+    reorder: bool = True,
+    warmup: bool = False,
+    ledger: Optional[JobLedger] = None,
+    priority: str = BULK,
+) -> List[AssetResult]:
+    """Run jobs with up to `window` prompts in flight per backend, `pack` jobs per prompt.
+
+    With `reorder`, jobs are submitted grouped by model and resolution so
+    ComfyUI swaps checkpoints as rarely as possible; `warmup` adds a tiny
+    render ahead of each model group. With a `ledger`, jobs an interrupted
+    run already submitted are collected (or resubmitted if ComfyUI lost
+    them) before anything new is queued. Runs default to the BULK lane, so
+    they pause for interactive prompts and while `client.low_water` prompts
+    are already pending. Results come back in input order.
+    """
+    for job in jobs:
+        validate_chain(job.post)
+    client = client or get_client()
+    # The window is per backend, so a pool of N servers keeps N times as many in flight
+    window = max(1, window) * client.backend_count
+    size = max(1, pack)
+
+    results: Dict[int, AssetResult] = {}
+    duplicates: Dict[int, int] = {}
+    if cache is not None:
+        jobs, results, duplicates = _restore_cached(jobs, cache)
+    pending = [index for index in range(len(jobs)) if index not in results and index not in duplicates]
+
+    # Units of work in submission order: (job indices, function, args)
+    units = []
+    # Unit position -> positions of the units it must wait for
+    after: Dict[int, List[int]] = {}
+    if ledger is not None:
+        done, unfinished = _reconcile(jobs, pending, ledger)
+        results.update(done)
+        if unfinished:
+            _log(f"  🧾 Resuming {len(unfinished)} job(s) from an earlier run")
+        for index, entry in unfinished.items():
+            units.append(([index], _resume, (jobs[index], entry, client, wait, cache, ledger, priority)))
+        pending = [index for index in pending if index not in done and index not in unfinished]
+    if reorder or warmup:
+        plan = schedule_jobs([jobs[i] for i in pending], lambda job: job.workflow())
+        if plan.swaps_before or warmup:
+            _log(f"  🗂️  {plan.report()}")
+        warmed: Dict[Tuple, int] = {}
+        # Units since the last warm-up, which the next one must not overtake
+        since_warmup: List[int] = []
+        for group in plan.groups:
+            if warmup and group.model not in warmed:
+                warmed[group.model] = len(units)
+                after[len(units)], since_warmup = since_warmup, []
+                units.append(([], _warm_up, (group.workflow, client, wait, priority)))
+            indices = [pending[i] for i in group.indices]
+            for i in range(0, len(indices), size):
+                chunk = indices[i:i + size]
+                if group.model in warmed:
+                    after[len(units)] = [warmed[group.model]]
+                    since_warmup.append(len(units))
+                units.append((chunk, run_pack, ([jobs[j] for j in chunk], client, wait, cache, ledger, priority)))
+    else:
+        for i in range(0, len(pending), size):
+            chunk = pending[i:i + size]
+            units.append((chunk, run_pack, ([jobs[j] for j in chunk], client, wait, cache, ledger, priority)))
+
+    if units and wait:
+        _log(f"  🏷️  Run {client.run_id} (cancel with: comfyctl.py cancel-run {client.run_id})")
+    if window == 1 or len(units) <= 1:
+        try:
+            for indices, run, args in units:
+                results.update(zip(indices, run(*args)))
+        except KeyboardInterrupt:
+            _cancel_run(client, wait)
+            raise
+    else:
+        with ThreadPoolExecutor(max_workers=window, thread_name_prefix="comfy-batch") as pool:
+            submitted = []
+            for position, (indices, run, args) in enumerate(units):
+                if position in after:
+                    # A model's jobs wait for its warm-up, the warm-up for the previous model's jobs
+                    submitted.append(pool.submit(run_after, [submitted[i] for i in after[position]], run, *args))
+                else:
+                    submitted.append(pool.submit(run, *args))
+            futures = {future: unit[0] for future, unit in zip(submitted, units)}
+            try:
+                for future in as_completed(futures):
+                    results.update(zip(futures[future], future.result()))
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                _cancel_run(client, wait)
+                raise
+
+    for index, source in duplicates.items():
+        results[index] = _copy_duplicate(jobs[index], jobs[source], results[source])
+    return [results[index] for index in range(len(jobs))]
+
+
+def summarize(results: Sequence[AssetResult]) -> int:
+    """Print a success/failure summary and return the number of failures."""
+    failed = [result for result in results if not result.ok]
+    print(f"\n✅ {len(results) - len(failed)}/{len(results)} succeeded")
+    for result in failed:
+        print(f"  ❌ {result.name}: {result.error}")
+    return len(failed)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Content-addressed result cache for Immanence OS generators.
+
+Finished images are stored under `.comfy-cache/` in the project root, keyed
+by a SHA-256 of the submitted API graph. The key ignores SaveImage
+`filename_prefix`, which names the file but does not change its pixels, so
+rerunning a pass with the same prompt, preset, seed and size copies the
+stored images instead of queueing the prompt again. The oldest entries are
+evicted once the store exceeds `cache.max_size_mb` in presets.yml.
+
+A random seed would make every graph unique, so callers derive the seed from
+the asset name (`seed_for`) when an asset leaves it `null`.
+
+Usage:
+    from comfy.cache import get_cache, seed_for
+
+    cache = get_cache()
+    key = cache.key(workflow)
+    if not cache.restore(key, [output_path]):
+        ...  # generate, then
+        cache.store(key, [output_path], prompt_id)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from comfy.client import CONFIG_DIR, load_presets
+
+PROJECT_ROOT = CONFIG_DIR.parent.parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / ".comfy-cache"
+DEFAULT_MAX_SIZE_MB = 2048
+
+# Inputs that only name the saved file
+_NAMING_INPUTS = {"filename_prefix"}
+
+
+def seed_for(name: str) -> int:
+    """Deterministic 32-bit seed for an asset name."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:4], "big")
+
+
+def workflow_key(workflow: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON form of an API graph, ignoring output names."""
+    canonical = {
+        node_id: {
+            "class_type": node["class_type"],
+            "inputs": {name: value for name, value in node.get("inputs", {}).items() if name not in _NAMING_INPUTS},
+        }
+        for node_id, node in workflow.items()
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """Stored images of one graph, in output order."""
+
+    key: str
+    images: List[Path]
+    prompt_id: Optional[str] = None
+
+
+class ResultCache:
+    """On-disk LRU store of generated images keyed by workflow hash."""
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        self.root = Path(root)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(workflow: Dict[str, Any], post: Sequence[Dict[str, Any]] = ()) -> str:
+        """Key of a graph plus the post-processing applied to its images (comfy.postprocess)."""
+        key = workflow_key(workflow)
+        if not post:
+            return key
+        encoded = json.dumps(list(post), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{key}:{encoded}".encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for `key` and mark it recently used, or None."""
+        entry_dir = self._entry_dir(key)
+        try:
+            meta = json.loads((entry_dir / "entry.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        images = [entry_dir / name for name in meta["images"]]
+        if not all(path.is_file() for path in images):
+            return None
+        os.utime(entry_dir / "entry.json")
+        return CacheEntry(key, images, meta.get("prompt_id"))
+
+    def put(self, key: str, images: Sequence[Path], prompt_id: Optional[str] = None) -> None:
+        """Copy finished images into the store, then evict down to the size cap."""
+        entry_dir = self._entry_dir(key)
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        names = []
+        for index, image in enumerate(images):
+            name = f"{index}{Path(image).suffix}"
+            shutil.copyfile(image, entry_dir / name)
+            names.append(name)
+        meta = {"images": names, "prompt_id": prompt_id, "created": time.time()}
+        # Written last: an entry without entry.json is incomplete and never served
+        (entry_dir / "entry.json").write_text(json.dumps(meta), encoding="utf-8")
+        self.evict()
+
+    def restore(self, key: str, output_paths: Sequence[Path]) -> Optional[CacheEntry]:
+        """Copy a cached entry to `output_paths`; returns the entry on a hit."""
+        entry = self.get(key)
+        if entry is None or len(entry.images) < len(output_paths):
+            return None
+        for image, path in zip(entry.images, output_paths):
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(image, path)
+        return entry
+
+    def store(self, key: str, output_paths: Sequence[Path], prompt_id: Optional[str] = None) -> None:
+        """Record freshly generated `output_paths` under `key`."""
+        self.put(key, [Path(path) for path in output_paths], prompt_id)
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the store fits; returns entries removed."""
+        with self._lock:
+            entries = []
+            total = 0
+            for meta in self.root.glob("*/*/entry.json"):
+                entry_dir = meta.parent
+                try:
+                    size = sum(path.stat().st_size for path in entry_dir.iterdir())
+                    entries.append((meta.stat().st_mtime, size, entry_dir))
+                except OSError:
+                    continue
+                total += size
+            removed = 0
+            for _, size, entry_dir in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                removed += 1
+            return removed
+
+
+_default_cache: Optional[ResultCache] = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> ResultCache:
+    """Process-wide cache configured by the `cache` section of presets.yml."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                config = load_presets().get("cache") or {}
+            except OSError:
+                config = {}
+            root = PROJECT_ROOT / config.get("dir", DEFAULT_CACHE_DIR.name)
+            _default_cache = ResultCache(root, config.get("max_size_mb", DEFAULT_MAX_SIZE_MB))
+        return _default_cache
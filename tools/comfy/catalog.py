@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Disk-cached `/object_info` catalog and pre-submit workflow validation.
+
+`/object_info` is several megabytes and changes only when nodes or models
+are installed, so `ObjectInfoCatalog` keeps it in `.comfy-cache/` per
+backend. A stored copy is reused until it is older than `ttl` or the
+server's model lists (`/models/<folder>`, a few hundred bytes each) no
+longer match the ones recorded with it.
+
+`validate` checks an API-format graph against the catalog before it is
+queued: unknown class types, missing required inputs, enum values
+(checkpoint, CLIP type, sampler and scheduler names, ...), numeric bounds,
+and links (source node exists, output index in range, output type matches
+the input). A typo is reported immediately instead of after the prompt
+reaches the front of the queue.
+
+Usage:
+    catalog = ObjectInfoCatalog(client.base_url, client.object_info, fetch_models)
+    problems = validate(workflow, catalog.info())
+    if problems:
+        raise ValueError("\\n".join(problems))
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CATALOG_DIR = PROJECT_ROOT / ".comfy-cache" / "object_info"
+DEFAULT_TTL = 24 * 3600
+
+# Model folders whose listings decide whether a stored catalog is stale
+MODEL_FOLDERS = ("checkpoints", "loras", "vae", "text_encoders", "clip", "diffusion_models", "unet")
+
+
+class ObjectInfoCatalog:
+    """`/object_info` of one backend, cached on disk and in memory."""
+
+    def __init__(
+        self,
+        base_url: str,
+        fetch_object_info: Callable[[], Dict[str, Any]],
+        fetch_models: Optional[Callable[[str], List[str]]] = None,
+        root: Path = DEFAULT_CATALOG_DIR,
+        ttl: float = DEFAULT_TTL,
+    ):
+        self.base_url = base_url
+        self.fetch_object_info = fetch_object_info
+        self.fetch_models = fetch_models
+        self.ttl = ttl
+        name = hashlib.sha256(base_url.encode("utf-8")).hexdigest()[:16]
+        self.path = Path(root) / f"{name}.json"
+        self._lock = threading.Lock()
+        self._info: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+
+    def fingerprint(self) -> Optional[str]:
+        """Hash of the server's model listings, or None if it cannot list them."""
+        if self.fetch_models is None:
+            return None
+        listings = {}
+        for folder in MODEL_FOLDERS:
+            try:
+                listings[folder] = sorted(self.fetch_models(folder))
+            except Exception:
+                # Older servers lack /models/<folder>; rely on the TTL for those
+                listings[folder] = None
+        if all(listing is None for listing in listings.values()):
+            return None
+        return hashlib.sha256(json.dumps(listings, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _load_stored(self, fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        try:
+            stored = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - stored.get("fetched_at", 0) > self.ttl:
+            return None
+        if fingerprint is not None and stored.get("fingerprint") != fingerprint:
+            return None
+        self._fetched_at = stored["fetched_at"]
+        return stored.get("object_info")
+
+    def _store(self, info: Dict[str, Any], fingerprint: Optional[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        payload = {"base_url": self.base_url, "fetched_at": time.time(), "fingerprint": fingerprint, "object_info": info}
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def info(self, refresh: bool = False) -> Dict[str, Any]:
+        """The catalog, fetched from the server only when the stored copy is stale."""
+        with self._lock:
+            if self._info is not None and not refresh:
+                return self._info
+            fingerprint = self.fingerprint()
+            info = None if refresh else self._load_stored(fingerprint)
+            if info is None:
+                info = self.fetch_object_info()
+                self._fetched_at = time.time()
+                self._store(info, fingerprint)
+            self._info = info
+            return info
+
+    @property
+    def fetched_at(self) -> float:
+        return self._fetched_at
+
+    def choices(self, class_type: str, input_name: str) -> List[Any]:
+        """Allowed values of an enum input ([] if the input is not an enum)."""
+        spec = _input_spec(self.info().get(class_type, {}), input_name)
+        return list(spec[0]) if spec and isinstance(spec[0], list) else []
+
+    def checkpoints(self) -> List[str]:
+        return self.choices("CheckpointLoaderSimple", "ckpt_name")
+
+
+def _input_spec(node_info: Dict[str, Any], name: str) -> Optional[List[Any]]:
+    inputs = node_info.get("input", {})
+    return inputs.get("required", {}).get(name) or inputs.get("optional", {}).get(name)
+
+
+def _is_link(value: Any) -> bool:
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[1], int)
+
+
+def _is_annotated(value: Any) -> bool:
+    return isinstance(value, str) and value.endswith((" [input]", " [output]", " [temp]"))
+
+
+def _types(type_spec: Any) -> List[str]:
+    # Multi-type inputs are declared as "IMAGE,MASK"
+    return str(type_spec).split(",")
+
+
+def validate(workflow: Dict[str, Any], info: Dict[str, Any]) -> List[str]:
+    """Problems that would make ComfyUI reject `workflow` (empty if none)."""
+    problems = []
+    for node_id, node in workflow.items():
+        class_type = node.get("class_type")
+        node_info = info.get(class_type)
+        where = f"node {node_id} ({class_type})"
+        if node_info is None:
+            problems.append(f"{where}: unknown node type")
+            continue
+        inputs = node.get("inputs", {})
+        for name in node_info.get("input", {}).get("required", {}):
+            if name not in inputs:
+                problems.append(f"{where}: missing required input '{name}'")
+
+        for name, value in inputs.items():
+            spec = _input_spec(node_info, name)
+            if not spec:
+                # Extra inputs (e.g. hidden ones) are ignored by ComfyUI
+                continue
+            type_spec, options = spec[0], (spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {})
+            if _is_link(value):
+                source_id, index = str(value[0]), value[1]
+                source = workflow.get(source_id)
+                if source is None:
+                    problems.append(f"{where}: input '{name}' links to missing node {source_id}")
+                    continue
+                outputs = info.get(source.get("class_type"), {}).get("output", [])
+                if not 0 <= index < len(outputs):
+                    problems.append(f"{where}: input '{name}' uses output {index} of node {source_id}, which has {len(outputs)}")
+                    continue
+                expected = "COMBO" if isinstance(type_spec, list) else type_spec
+                produced = outputs[index]
+                if "*" not in (expected, produced) and not set(_types(produced)) & set(_types(expected)):
+                    problems.append(f"{where}: input '{name}' expects {expected} but node {source_id} output {index} is {produced}")
+            elif isinstance(type_spec, list):
+                # Upload inputs list the input folder as of the catalog fetch; fresh uploads are valid,
+                # as are annotated paths ("name.latent [output]") the server resolves itself
+                if type_spec and value not in type_spec and not options.get("image_upload") and not _is_annotated(value):
+                    problems.append(f"{where}: '{name}' = {value!r} is not one of the server's {len(type_spec)} options")
+            elif type_spec in ("INT", "FLOAT") and isinstance(value, (int, float)):
+                if "min" in options and value < options["min"]:
+                    problems.append(f"{where}: '{name}' = {value} is below the minimum {options['min']}")
+                if "max" in options and value > options["max"]:
+                    problems.append(f"{where}: '{name}' = {value} is above the maximum {options['max']}")
+    return problems
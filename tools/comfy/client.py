@@ -0,0 +1,683 @@
+#!/usr/bin/env python3
+"""
+Shared ComfyUI client for Immanence OS generators.
+
+Replaces the queue_prompt / get_history / get_image / check_comfyui helpers
+that were copy-pasted across tools/*.py. Every request goes through one
+keep-alive connection pool, transient failures are retried with backoff, and
+completion is tracked by the shared CompletionListener.
+
+The backend URL defaults to `mcp.comfyui_backend` in tools/comfy/presets.yml.
+Every prompt is tagged with the client's run ID (`extra_data.immanence_run`,
+set COMFY_RUN_ID to choose it), so `comfyctl.py cancel-run` can purge a whole
+batch. A wait that times out or is interrupted with Ctrl-C cancels its
+prompt on the server instead of leaving it to run.
+
+Submissions have a priority lane: INTERACTIVE prompts are inserted at the
+front of ComfyUI's queue, and BULK producers hold back while any
+interactive prompt is queued or running, so a one-off preview does not
+wait behind a matrix run. Bulk submissions are also held while the server
+already has `low_water` prompts pending (`mcp.queue_low_water` in
+presets.yml), so even fire-and-forget runs feed the queue as it drains
+instead of flooding it.
+
+Workflows are validated against the backend's cached `/object_info`
+(comfy.catalog) before they are queued, so a misspelled checkpoint or
+sampler fails immediately instead of after the queue wait. When the
+backend's directory is local (`mcp.comfyui_roots`), outputs are linked from
+disk instead of downloaded (comfy.localfs).
+
+Usage:
+    from comfy.client import get_client
+
+    client = get_client()
+    prompt_id = client.submit(workflow)
+    result = client.wait(prompt_id, timeout=300)
+    client.download(result.first_image(), Path("public/lotus.png"))
+"""
+
+import hashlib
+import io
+import mimetypes
+import os
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urljoin
+
+import requests
+import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from comfy.catalog import ObjectInfoCatalog, validate
+from comfy.completion import CompletionListener
+from comfy.localfs import local_path, place
+
+CONFIG_DIR = Path(__file__).resolve().parent
+DEFAULT_BACKEND = "http://127.0.0.1:8188"
+
+# extra_data key tagging each prompt with the run that submitted it
+RUN_KEY = "immanence_run"
+# Input subfolder for uploaded images (named by content hash)
+UPLOAD_SUBFOLDER = "immanence"
+# Bytes per read when streaming downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+# Priority lanes, recorded in extra_data under PRIORITY_KEY
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, NORMAL, BULK)
+PRIORITY_KEY = "immanence_priority"
+
+# Pending prompts a bulk producer keeps queued ahead of the GPU
+DEFAULT_LOW_WATER = 2
+# Minimum age (seconds) of the catalog before a failed validation refetches /object_info
+CATALOG_RETRY_AGE = 60
+
+
+class ComfyError(RuntimeError):
+    """Raised when ComfyUI rejects a request or returns an unusable response."""
+
+
+@dataclass(frozen=True)
+class ImageRef:
+    """Location of an image on the ComfyUI server (as reported in outputs)."""
+
+    filename: str
+    subfolder: str = ""
+    type: str = "output"
+    # Backend that holds the file, when several are pooled (see comfy.pool)
+    base_url: str = ""
+
+    @classmethod
+    def from_output(cls, info: Dict[str, Any], base_url: str = "") -> "ImageRef":
+        return cls(info["filename"], info.get("subfolder", ""), info.get("type", "output"), base_url)
+
+    def params(self) -> Dict[str, str]:
+        return {"filename": self.filename, "subfolder": self.subfolder, "type": self.type}
+
+
+@dataclass
+class JobResult:
+    """Finished prompt: its outputs keyed by node ID plus ComfyUI's status block."""
+
+    prompt_id: str
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    status: Dict[str, Any] = field(default_factory=dict)
+    # Backend that ran the prompt
+    base_url: str = ""
+
+    def images(self, node_id: Optional[str] = None) -> List[ImageRef]:
+        """All images, or only those produced by `node_id`."""
+        nodes = [self.outputs.get(str(node_id), {})] if node_id is not None else self.outputs.values()
+        return [ImageRef.from_output(info, self.base_url) for node in nodes for info in node.get("images", [])]
+
+    def first_image(self, node_id: Optional[str] = None) -> ImageRef:
+        images = self.images(node_id)
+        if not images:
+            where = f" from node {node_id}" if node_id is not None else ""
+            raise ComfyError(f"Prompt {self.prompt_id} produced no image{where}")
+        return images[0]
+
+
+def new_run_id() -> str:
+    """Run ID from $COMFY_RUN_ID, or a fresh timestamped one."""
+    return os.environ.get("COMFY_RUN_ID") or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def load_presets(config_dir: Path = CONFIG_DIR) -> Dict[str, Any]:
+    """Load tools/comfy/presets.yml."""
+    with open(config_dir / "presets.yml", "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def default_base_url(config_dir: Path = CONFIG_DIR) -> str:
+    """ComfyUI backend URL configured in presets.yml."""
+    try:
+        return load_presets(config_dir)["mcp"]["comfyui_backend"]
+    except (OSError, KeyError, TypeError):
+        return DEFAULT_BACKEND
+
+
+def default_backends(config_dir: Path = CONFIG_DIR) -> List[str]:
+    """Backend URLs from `mcp.comfyui_backends`, falling back to the single `comfyui_backend`."""
+    try:
+        backends = load_presets(config_dir)["mcp"].get("comfyui_backends")
+    except (OSError, KeyError, TypeError, AttributeError):
+        backends = None
+    return [str(url) for url in backends] if backends else [default_base_url(config_dir)]
+
+
+def default_validate(config_dir: Path = CONFIG_DIR) -> bool:
+    """Whether workflows are checked against `/object_info` before submission (`mcp.validate_workflows`)."""
+    try:
+        return bool(load_presets(config_dir)["mcp"].get("validate_workflows", True))
+    except (OSError, KeyError, TypeError, AttributeError):
+        return True
+
+
+def default_local_root(base_url: str, config_dir: Path = CONFIG_DIR) -> Optional[Path]:
+    """Local ComfyUI directory of a backend (`mcp.comfyui_roots`), if it shares this filesystem."""
+    try:
+        roots = load_presets(config_dir)["mcp"].get("comfyui_roots") or {}
+    except (OSError, KeyError, TypeError, AttributeError):
+        return None
+    root = {str(url).rstrip("/"): path for url, path in roots.items()}.get(base_url.rstrip("/"))
+    return Path(root) if root else None
+
+
+def default_low_water(config_dir: Path = CONFIG_DIR) -> int:
+    """Target pending-queue depth for bulk submissions configured in presets.yml."""
+    try:
+        return int(load_presets(config_dir)["mcp"]["queue_low_water"])
+    except (OSError, KeyError, TypeError, ValueError):
+        return DEFAULT_LOW_WATER
+
+
+class ComfyClient:
+    """Pooled, retrying HTTP client for a single ComfyUI backend."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        prompt_url: Optional[str] = None,
+        pool_size: int = 8,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30,
+        poll_interval: float = 2.0,
+        run_id: Optional[str] = None,
+        priority: str = NORMAL,
+        low_water: Optional[int] = None,
+        validate_workflows: Optional[bool] = None,
+        local_root: Optional[Path] = None,
+    ):
+        self.base_url = (base_url or default_base_url()).rstrip("/")
+        # Submissions may go through a proxy (e.g. the MCP proxy) instead of the backend
+        self.prompt_url = prompt_url or f"{self.base_url}/prompt"
+        self.timeout = timeout
+        # Slowest /history poll while the event stream is unavailable
+        self.poll_interval = poll_interval
+        self.run_id = run_id or new_run_id()
+        # Lane used when submit() is not given one
+        self.priority = priority
+        # BULK submissions wait while this many prompts are already pending
+        self.low_water = low_water if low_water is not None else default_low_water()
+        # Check graphs against the cached /object_info catalog before queueing them
+        self.validate_workflows = default_validate() if validate_workflows is None else validate_workflows
+        # ComfyUI directory on this machine; outputs found there are linked instead of downloaded
+        self.local_root = Path(local_root) if local_root else default_local_root(self.base_url)
+        self.session = self._make_session(pool_size, retries, backoff)
+        self._catalog: Optional[ObjectInfoCatalog] = None
+        self._catalog_lock = threading.Lock()
+        # Content hash -> LoadImage name of images uploaded by this client
+        self._uploads: Dict[str, str] = {}
+        self._uploads_lock = threading.Lock()
+        self._listener: Optional[CompletionListener] = None
+        self._listener_lock = threading.Lock()
+        # Serializes bulk slot check + POST so concurrent submitters cannot overshoot low_water
+        self._bulk_lock = threading.Lock()
+
+    @staticmethod
+    def _make_session(pool_size: int, retries: int, backoff: float) -> requests.Session:
+        # Connection errors are retried for every method; read/status retries only
+        # for idempotent methods so a slow POST /prompt is never queued twice.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(pool_size, 1), max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def url(self, path: str) -> str:
+        return urljoin(self.base_url + "/", path.lstrip("/"))
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        self.session.close()
+
+    def __enter__(self) -> "ComfyClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def backend_count(self) -> int:
+        """Number of servers behind this client (see comfy.pool.BackendPool)."""
+        return 1
+
+    # ------------------------------------------------------------------
+    # Low-level requests
+    # ------------------------------------------------------------------
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+        response = self.session.get(self.url(path), params=params, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def post_json(self, path: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        response = self.session.post(self.url(path), json=payload, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    # ------------------------------------------------------------------
+    # Server state
+    # ------------------------------------------------------------------
+
+    def is_running(self, timeout: float = 2) -> bool:
+        """True if the backend answers `/system_stats`."""
+        try:
+            self.session.get(self.url("/system_stats"), timeout=timeout).raise_for_status()
+            return True
+        except requests.RequestException:
+            return False
+
+    def system_stats(self) -> Dict[str, Any]:
+        return self.get_json("/system_stats")
+
+    def backend_for(self, prompt_id: str) -> Optional["ComfyClient"]:
+        """Server that ran `prompt_id`: this client (see BackendPool.backend_for)."""
+        return self
+
+    def queue(self) -> Dict[str, Any]:
+        """Raw `/queue` payload: `queue_running` and `queue_pending` item lists."""
+        return self.get_json("/queue")
+
+    def history(self, prompt_id: Optional[str] = None, max_items: Optional[int] = None) -> Dict[str, Any]:
+        """`/history/{prompt_id}`, or the most recent history when no ID is given."""
+        if prompt_id:
+            return self.get_json(f"/history/{prompt_id}")
+        params = {"max_items": max_items} if max_items else None
+        return self.get_json("/history", params=params)
+
+    def object_info(self, node_class: Optional[str] = None) -> Dict[str, Any]:
+        """Live `/object_info`; prefer `catalog`, which caches it on disk."""
+        path = f"/object_info/{node_class}" if node_class else "/object_info"
+        return self.get_json(path, timeout=max(self.timeout, 60))
+
+    def models(self, folder: str) -> List[str]:
+        """File names in a model folder (`/models/checkpoints`, ...)."""
+        return self.get_json(f"/models/{folder}")
+
+    @property
+    def catalog(self) -> ObjectInfoCatalog:
+        """Disk-cached `/object_info` of this backend."""
+        with self._catalog_lock:
+            if self._catalog is None:
+                self._catalog = ObjectInfoCatalog(self.base_url, self.object_info, self.models)
+            return self._catalog
+
+    def validate(self, workflow: Dict[str, Any]) -> List[str]:
+        """Problems ComfyUI would reject `workflow` for; empty if none (or the catalog is unavailable).
+
+        A failure is re-checked against a fresh `/object_info` in case nodes
+        or models were installed since the catalog was fetched, at most once
+        per CATALOG_RETRY_AGE seconds so a genuinely bad graph does not
+        refetch it on every submission.
+        """
+        try:
+            catalog = self.catalog
+            problems = validate(workflow, catalog.info())
+            if problems and time.time() - catalog.fetched_at > CATALOG_RETRY_AGE:
+                problems = validate(workflow, catalog.info(refresh=True))
+        except (requests.RequestException, ValueError, OSError):
+            # Validation is best effort; the server still checks the prompt
+            return []
+        return problems
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    @property
+    def listener(self) -> CompletionListener:
+        """Completion listener for this backend, started on first use."""
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = CompletionListener(
+                    self.base_url,
+                    fetch_history=self.history,
+                    max_poll_interval=self.poll_interval,
+                ).start()
+            return self._listener
+
+    def submit(
+        self,
+        workflow: Dict[str, Any],
+        extra_data: Optional[Dict[str, Any]] = None,
+        track: bool = True,
+        priority: Optional[str] = None,
+    ) -> str:
+        """Queue an API-format workflow and return its prompt_id.
+
+        With `track=False` (fire-and-forget) the event listener is not started.
+        `priority` defaults to the client's lane; INTERACTIVE jumps the queue
+        and BULK first waits for a free slot (see `wait_for_bulk_slot`).
+        """
+        priority = priority or self.priority
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {', '.join(PRIORITIES)}")
+        if self.validate_workflows:
+            problems = self.validate(workflow)
+            if problems:
+                raise ComfyError("Workflow rejected before submission:\n  " + "\n  ".join(problems))
+        if priority == BULK:
+            with self._bulk_lock:
+                self.wait_for_bulk_slot()
+                return self._post_prompt(workflow, extra_data, track, priority)
+        return self._post_prompt(workflow, extra_data, track, priority)
+
+    def _post_prompt(
+        self,
+        workflow: Dict[str, Any],
+        extra_data: Optional[Dict[str, Any]],
+        track: bool,
+        priority: str,
+    ) -> str:
+        extra = {RUN_KEY: self.run_id, PRIORITY_KEY: priority, **(extra_data or {})}
+        payload: Dict[str, Any] = {"prompt": workflow, "extra_data": extra}
+        if priority == INTERACTIVE:
+            payload["front"] = True
+        if track:
+            payload["client_id"] = self.listener.client_id
+        try:
+            response = self.session.post(self.prompt_url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ComfyError(f"Failed to submit prompt: {e}") from e
+        if response.status_code != 200:
+            raise ComfyError(f"ComfyUI rejected workflow ({response.status_code}): {response.text[:500]}")
+        prompt_id = response.json().get("prompt_id")
+        if not prompt_id:
+            raise ComfyError(f"No prompt_id in response: {response.text[:500]}")
+        return prompt_id
+
+    def wait_for_bulk_slot(self, low_water: Optional[int] = None) -> None:
+        """Block until the queue can take another bulk prompt.
+
+        That is: no interactive prompt is queued or running, and fewer than
+        `low_water` (default: the client's) prompts are pending. Waits on the
+        listener's status events when it is running, else polls `/queue`.
+        """
+        low_water = self.low_water if low_water is None else low_water
+        while True:
+            try:
+                queue = self.queue()
+            except requests.RequestException:
+                # Throttling is best effort; the submission itself reports real errors
+                return
+            pending = queue.get("queue_pending", [])
+            items = queue.get("queue_running", []) + pending
+            interactive = any(len(item) > 3 and (item[3] or {}).get(PRIORITY_KEY) == INTERACTIVE for item in items)
+            if not interactive and len(pending) < max(low_water, 1):
+                return
+            if self._listener is not None:
+                self._listener.wait_for_status(self.poll_interval)
+            else:
+                time.sleep(self.poll_interval)
+
+    def wait(self, prompt_id: str, timeout: float = 300, cancel_on_timeout: bool = True) -> JobResult:
+        """Block until the prompt finishes. Raises TimeoutError or ComfyExecutionError.
+
+        On timeout (unless `cancel_on_timeout` is False) or Ctrl-C the prompt is
+        cancelled on the server, so nobody's GPU time goes to an uncollected image.
+        """
+        try:
+            entry = self.listener.wait(prompt_id, timeout)
+        except TimeoutError:
+            if cancel_on_timeout:
+                self._cancel_quietly([prompt_id])
+            raise
+        except KeyboardInterrupt:
+            self._cancel_quietly([prompt_id])
+            raise
+        return JobResult(prompt_id, entry.get("outputs") or {}, entry.get("status") or {}, self.base_url)
+
+    def run(self, workflow: Dict[str, Any], timeout: float = 300) -> JobResult:
+        """Submit a workflow and wait for its result."""
+        return self.wait(self.submit(workflow), timeout)
+
+    # ------------------------------------------------------------------
+    # Cancellation
+    # ------------------------------------------------------------------
+
+    def cancel(self, prompt_ids: Iterable[str]) -> List[str]:
+        """Delete pending prompts from `/queue` and `/interrupt` a running one.
+
+        Local waiters on these prompts fail with ComfyExecutionError. Returns
+        the prompt IDs that were still queued or running.
+        """
+        ids = set(prompt_ids)
+        queue = self.queue()
+        running = [item[1] for item in queue.get("queue_running", []) if item[1] in ids]
+        pending = [item[1] for item in queue.get("queue_pending", []) if item[1] in ids]
+        if pending:
+            self.post_json("/queue", {"delete": pending})
+        for prompt_id in running:
+            # Targeted interrupt; only sent while this prompt is the one executing
+            self.post_json("/interrupt", {"prompt_id": prompt_id})
+        if self._listener is not None:
+            for prompt_id in running + pending:
+                self._listener.cancel(prompt_id)
+        return running + pending
+
+    def run_prompts(self, run_id: Optional[str] = None) -> List[str]:
+        """IDs of queued or running prompts tagged with `run_id` (default: this client's run)."""
+        run_id = run_id or self.run_id
+        queue = self.queue()
+        items = queue.get("queue_running", []) + queue.get("queue_pending", [])
+        return [item[1] for item in items if len(item) > 3 and (item[3] or {}).get(RUN_KEY) == run_id]
+
+    def cancel_run(self, run_id: Optional[str] = None) -> List[str]:
+        """Cancel every queued or running prompt of a run."""
+        return self.cancel(self.run_prompts(run_id))
+
+    def _cancel_quietly(self, prompt_ids: Iterable[str]) -> None:
+        try:
+            self.cancel(prompt_ids)
+        except (requests.RequestException, ValueError) as e:
+            print(f"⚠️  Could not cancel {', '.join(prompt_ids)}: {e}", file=sys.stderr)
+
+    # ------------------------------------------------------------------
+    # Inputs
+    # ------------------------------------------------------------------
+
+    def upload_image(self, path: Path, subfolder: str = UPLOAD_SUBFOLDER) -> str:
+        """Make a local image available to LoadImage and return the name to reference.
+
+        The file is stored under its content hash, so an image the server
+        already has (from this or an earlier run) is not sent again; new
+        uploads are streamed from disk.
+        """
+        path = Path(path)
+        digest = file_digest(path)
+        with self._uploads_lock:
+            if digest in self._uploads:
+                return self._uploads[digest]
+        filename = f"{digest[:16]}{path.suffix.lower()}"
+        name = f"{subfolder}/{filename}" if subfolder else filename
+        if not self.has_file(ImageRef(filename, subfolder, "input")):
+            body = _MultipartBody(path, filename, {"subfolder": subfolder, "type": "input", "overwrite": "true"})
+            try:
+                response = self.session.post(
+                    self.url("/upload/image"),
+                    data=body,
+                    headers={"Content-Type": body.content_type},
+                    timeout=max(self.timeout, 120),
+                )
+            finally:
+                body.close()
+            response.raise_for_status()
+            info = response.json()
+            name = f"{info['subfolder']}/{info['name']}" if info.get("subfolder") else info["name"]
+        with self._uploads_lock:
+            self._uploads[digest] = name
+        return name
+
+    # ------------------------------------------------------------------
+    # Outputs
+    # ------------------------------------------------------------------
+
+    def has_file(self, image: ImageRef) -> bool:
+        """True if the server has the file (checked with a bodiless HEAD `/view`)."""
+        response = self.session.head(self.url("/view"), params=image.params(), timeout=self.timeout)
+        return response.status_code == 200
+
+    def local_path(self, image: ImageRef) -> Optional[Path]:
+        """The image's file in the local ComfyUI directory, if configured and present."""
+        return local_path(self.local_root, image) if self.local_root else None
+
+    def fetch(self, image: ImageRef) -> bytes:
+        """An image's bytes: read from the local ComfyUI directory if possible, else via `/view`."""
+        source = self.local_path(image)
+        if source is not None:
+            return source.read_bytes()
+        response = self.session.get(self.url("/view"), params=image.params(), timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    def download(self, image: ImageRef, output_path: Path, verify: bool = False) -> Path:
+        """Save an image to `output_path`, creating parent directories.
+
+        Outputs in the local ComfyUI directory are hardlinked (or reflinked /
+        copied) instead of passing through HTTP. Others are streamed in chunks
+        to a temp file next to the target, checked against Content-Length
+        (and, with `verify`, decoded), then moved into place, so an
+        interrupted download never leaves a truncated file behind.
+        """
+        output_path = Path(output_path)
+        source = self.local_path(image)
+        if source is not None:
+            place(source, output_path)
+            return output_path
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with self.session.get(self.url("/view"), params=image.params(), timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                expected = response.headers.get("Content-Length")
+                if response.headers.get("Content-Encoding"):
+                    # Content-Length counts the compressed bytes
+                    expected = None
+                written = 0
+                with open(tmp_path, "wb") as handle:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        handle.write(chunk)
+                        written += len(chunk)
+            if expected is not None and written != int(expected):
+                raise ComfyError(f"Truncated download of {image.filename}: {written} of {expected} bytes")
+            if verify:
+                verify_image(tmp_path, image.filename)
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return output_path
+
+
+def verify_image(path: Path, name: Optional[str] = None) -> None:
+    """Raise ComfyError unless `path` is a complete, decodable image."""
+    # Imported here: only verified downloads need Pillow
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError) as e:
+        raise ComfyError(f"{name or Path(path).name} is not a valid image: {e}") from None
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _MultipartBody:
+    """multipart/form-data upload body that reads the file from disk as it is sent."""
+
+    def __init__(self, path: Path, filename: str, fields: Dict[str, str]):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = "".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'
+            for key, value in fields.items()
+        )
+        mime = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="{filename}"\r\n'
+            f"Content-Type: {mime}\r\n\r\n"
+        )
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._length = len(head.encode("utf-8")) + Path(path).stat().st_size + len(tail)
+        self._parts = [io.BytesIO(head.encode("utf-8")), open(path, "rb"), io.BytesIO(tail)]
+
+    def __len__(self) -> int:
+        # Lets requests send a Content-Length instead of chunked encoding
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        data = b""
+        while self._parts and (size < 0 or len(data) < size):
+            chunk = self._parts[0].read(-1 if size < 0 else size - len(data))
+            if chunk:
+                data += chunk
+            else:
+                self._parts.pop(0).close()
+        return data
+
+    def close(self) -> None:
+        for part in self._parts:
+            part.close()
+        self._parts = []
+
+
+_default_client: Optional[ComfyClient] = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> ComfyClient:
+    """Process-wide client for the configured backend(s), so a batch reuses connections.
+
+    With several `mcp.comfyui_backends` this is a comfy.pool.BackendPool,
+    which offers the same interface.
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            # Imported here: comfy.pool builds on this module
+            from comfy.pool import pool_or_client
+
+            _default_client = pool_or_client(default_backends())
+        return _default_client
+
+
+def require_running(client: Optional[ComfyClient] = None) -> ComfyClient:
+    """Return the client, exiting with a message if the backend is not reachable."""
+    client = client or get_client()
+    if not client.is_running():
+        print(f"❌ ComfyUI is not running at {client.base_url}", file=sys.stderr)
+        print("   Please start ComfyUI and try again.", file=sys.stderr)
+        sys.exit(1)
+    return client
+
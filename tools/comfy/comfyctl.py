@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Queue control for ComfyUI runs started by Immanence OS generators.
+
+Every prompt a generator submits carries its run ID (printed when the run
+starts, or set with COMFY_RUN_ID). Abandoned batches can be purged from
+another terminal so they stop consuming GPU time immediately. Jobs queued
+with --no-wait / --no-download are recorded in the job ledger and saved to
+their output paths by `collect` once ComfyUI has finished them.
+
+Usage:
+    python tools/comfy/comfyctl.py runs
+    python tools/comfy/comfyctl.py cancel-run 20260301-142233-a1b2c3
+    python tools/comfy/comfyctl.py cancel <prompt_id> [<prompt_id> ...]
+    python tools/comfy/comfyctl.py collect
+"""
+
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from comfy.client import RUN_KEY, ComfyClient, get_client, require_running
+from comfy.ledger import DONE, FAILED, LOST, QUEUED, collect, get_ledger
+
+
+def cmd_runs(client: ComfyClient, args) -> int:
+    """List runs that still have prompts queued or running."""
+    queue = client.queue()
+    running = Counter((item[3] or {}).get(RUN_KEY, "(untagged)") for item in queue.get("queue_running", []))
+    pending = Counter((item[3] or {}).get(RUN_KEY, "(untagged)") for item in queue.get("queue_pending", []))
+    runs = sorted(set(running) | set(pending))
+    if not runs:
+        print("Queue is empty")
+        return 0
+    for run_id in runs:
+        print(f"  {run_id}: {running[run_id]} running, {pending[run_id]} pending")
+    return 0
+
+
+def cmd_cancel_run(client: ComfyClient, args) -> int:
+    """Cancel every prompt of a run."""
+    cancelled = client.cancel_run(args.run_id)
+    print(f"Cancelled {len(cancelled)} prompt(s) of run {args.run_id}")
+    return 0
+
+
+def cmd_cancel(client: ComfyClient, args) -> int:
+    """Cancel individual prompts."""
+    cancelled = client.cancel(args.prompt_ids)
+    missing = set(args.prompt_ids) - set(cancelled)
+    print(f"Cancelled {len(cancelled)} prompt(s)")
+    for prompt_id in sorted(missing):
+        print(f"  not queued or running: {prompt_id}")
+    return 0
+
+
+def cmd_collect(client: ComfyClient, args) -> int:
+    """Save the outputs of every recorded job that has finished since it was queued."""
+    counts = collect(client, get_ledger(), workers=args.workers)
+    if not counts:
+        print("No uncollected jobs in the ledger")
+        return 0
+    print(
+        f"Collected {counts[DONE]}, failed {counts[FAILED]}, "
+        f"still queued {counts[QUEUED]}, lost {counts[LOST]}"
+    )
+    if counts[LOST]:
+        print("  Lost jobs are unknown to ComfyUI; rerun their generator to resubmit them")
+    return 1 if counts[FAILED] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Inspect, cancel and collect ComfyUI runs",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python comfyctl.py runs
+  python comfyctl.py cancel-run 20260301-142233-a1b2c3
+  python comfyctl.py cancel 6f1c2a3e-...
+  python comfyctl.py collect
+        """,
+    )
+    parser.add_argument("--backend", help="ComfyUI URL (default: mcp.comfyui_backend in presets.yml)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("runs", help="List runs with queued or running prompts").set_defaults(func=cmd_runs)
+
+    cancel_run = commands.add_parser("cancel-run", help="Purge every prompt belonging to a run ID")
+    cancel_run.add_argument("run_id", help="Run ID printed by the generator")
+    cancel_run.set_defaults(func=cmd_cancel_run)
+
+    cancel = commands.add_parser("cancel", help="Cancel specific prompts")
+    cancel.add_argument("prompt_ids", nargs="+", help="Prompt IDs to interrupt or dequeue")
+    cancel.set_defaults(func=cmd_cancel)
+
+    collect_jobs = commands.add_parser("collect", help="Save finished jobs queued with --no-wait/--no-download")
+    collect_jobs.add_argument("--workers", type=int, default=4, help="Parallel downloads (default: 4)")
+    collect_jobs.set_defaults(func=cmd_collect)
+
+    args = parser.parse_args()
+    client = require_running(ComfyClient(args.backend) if args.backend else get_client())
+    return args.func(client, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
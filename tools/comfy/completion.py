@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+WebSocket-driven completion tracking for ComfyUI prompts.
+
+One CompletionListener subscribes to ComfyUI's `/ws?clientId=` event stream
+and resolves a Future per prompt_id as soon as the prompt finishes, instead of
+every client sleeping and re-fetching `/history/{id}`. Prompts must be
+submitted with the listener's `client_id` so their events reach this socket.
+
+If the socket cannot be opened (or `websocket-client` is not installed) or it
+drops mid-run, pending prompts are tracked by `/history` polling with adaptive
+backoff until the socket reconnects.
+
+Usage:
+    listener = CompletionListener("http://127.0.0.1:8188").start()
+    prompt_id = submit({"prompt": workflow, "client_id": listener.client_id})
+    entry = listener.wait(prompt_id, timeout=300)   # history-style entry
+    entry["outputs"]["9"]["images"][0]["filename"]
+"""
+
+import json
+import sys
+import threading
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import websocket  # websocket-client
+except ImportError:  # pragma: no cover - optional dependency
+    websocket = None
+
+
+HistoryFetcher = Callable[[str], Dict[str, Any]]
+
+
+class ComfyExecutionError(RuntimeError):
+    """Raised when ComfyUI reports an execution error or interruption for a prompt."""
+
+    def __init__(self, prompt_id: str, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(f"Prompt {prompt_id} failed: {message}")
+        self.prompt_id = prompt_id
+        self.details = details or {}
+
+
+def _urllib_history(base_url: str) -> HistoryFetcher:
+    """Default `/history/{id}` fetcher used when no pooled client is supplied."""
+
+    def fetch(prompt_id: str) -> Dict[str, Any]:
+        with urllib.request.urlopen(f"{base_url}/history/{prompt_id}", timeout=10) as response:
+            return json.loads(response.read())
+
+    return fetch
+
+
+def history_error(entry: Dict[str, Any]) -> Optional[str]:
+    """Return the error message recorded in a history entry, or None if it succeeded."""
+    status = entry.get("status") or {}
+    if status.get("status_str") != "error":
+        return None
+    for message_type, data in status.get("messages", []):
+        if message_type in ("execution_error", "execution_interrupted"):
+            return data.get("exception_message") or message_type
+    return "execution error"
+
+
+class CompletionListener:
+    """Resolve per-prompt futures from ComfyUI WebSocket events, with polling fallback."""
+
+    def __init__(
+        self,
+        base_url: str,
+        client_id: Optional[str] = None,
+        fetch_history: Optional[HistoryFetcher] = None,
+        min_poll_interval: float = 0.25,
+        max_poll_interval: float = 2.0,
+        safety_poll_interval: float = 10.0,
+        connect_timeout: float = 5.0,
+        use_websocket: bool = True,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id or uuid.uuid4().hex
+        self.fetch_history = fetch_history or _urllib_history(self.base_url)
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.safety_poll_interval = safety_poll_interval
+        self.connect_timeout = connect_timeout
+        self.use_websocket = use_websocket and websocket is not None
+
+        # Last `queue_remaining` reported by a status event (None until known)
+        self.queue_remaining: Optional[int] = None
+        # Notified on every status event, i.e. whenever the queue length changes
+        self._status_changed = threading.Condition()
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._outputs: Dict[str, Dict[str, Any]] = {}
+        self._finished: "OrderedDict[str, Any]" = OrderedDict()
+        self._finished_limit = 512
+        self._ws = None
+        self._connected = threading.Event()
+        self._wake = threading.Event()
+        self._resync = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> "CompletionListener":
+        """Connect the event stream and start the fallback poller."""
+        if self._threads:
+            return self
+        if self.use_websocket:
+            self._connect()
+            reader = threading.Thread(target=self._read_loop, name="comfy-ws", daemon=True)
+            reader.start()
+            self._threads.append(reader)
+        poller = threading.Thread(target=self._poll_loop, name="comfy-poll", daemon=True)
+        poller.start()
+        self._threads.append(poller)
+        return self
+
+    def close(self) -> None:
+        """Stop background threads and close the socket."""
+        self._stop.set()
+        self._wake.set()
+        self._resync.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+
+    def __enter__(self) -> "CompletionListener":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def connected(self) -> bool:
+        """True while the WebSocket event stream is live."""
+        return self._connected.is_set()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def watch(self, prompt_id: str) -> Future:
+        """Return a Future resolving to the prompt's history-style entry."""
+        with self._lock:
+            future = self._pending.get(prompt_id)
+            if future is not None:
+                return future
+            future = Future()
+            if prompt_id in self._finished:
+                self._settle(future, prompt_id, self._finished.pop(prompt_id))
+                return future
+            self._pending[prompt_id] = future
+        self._wake.set()
+        return future
+
+    def wait(self, prompt_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Block until the prompt finishes and return its `{outputs, status}` entry."""
+        future = self.watch(prompt_id)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.forget(prompt_id)
+            raise TimeoutError(f"Job {prompt_id} did not complete within {timeout}s") from None
+
+    def cancel(self, prompt_id: str) -> None:
+        """Fail any wait on a prompt that was cancelled on the server."""
+        self._resolve(prompt_id, ComfyExecutionError(prompt_id, "cancelled"))
+
+    def wait_for_status(self, timeout: float) -> bool:
+        """Block until the next queue status event; False if `timeout` passed first."""
+        with self._status_changed:
+            return self._status_changed.wait(timeout)
+
+    def forget(self, prompt_id: str) -> None:
+        """Stop tracking a prompt (e.g. after the caller gave up on it)."""
+        with self._lock:
+            self._pending.pop(prompt_id, None)
+            self._outputs.pop(prompt_id, None)
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _settle(future: Future, prompt_id: str, result: Any) -> None:
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    def _resolve(self, prompt_id: str, result: Any) -> None:
+        """Resolve a watched prompt, or remember the result for a later watch()."""
+        with self._lock:
+            self._outputs.pop(prompt_id, None)
+            future = self._pending.pop(prompt_id, None)
+            if future is None:
+                self._finished[prompt_id] = result
+                while len(self._finished) > self._finished_limit:
+                    self._finished.popitem(last=False)
+                return
+        self._settle(future, prompt_id, result)
+
+    def _resolve_from_history(self, prompt_id: str) -> bool:
+        """Fetch `/history/{id}` once and resolve if the prompt is done."""
+        history = self.fetch_history(prompt_id)
+        entry = history.get(prompt_id)
+        if not entry:
+            return False
+        error = history_error(entry)
+        if error:
+            self._resolve(prompt_id, ComfyExecutionError(prompt_id, error, entry.get("status")))
+            return True
+        status = entry.get("status") or {}
+        if entry.get("outputs") or status.get("completed"):
+            self._resolve(prompt_id, entry)
+            return True
+        return False
+
+    def _finish(self, prompt_id: str) -> None:
+        """Handle the end-of-prompt signal from the event stream."""
+        with self._lock:
+            outputs = self._outputs.get(prompt_id)
+        if outputs:
+            self._resolve(
+                prompt_id,
+                {"outputs": outputs, "status": {"status_str": "success", "completed": True}},
+            )
+            return
+        # Fully cached prompts may not re-send `executed`; history has the outputs
+        try:
+            if self._resolve_from_history(prompt_id):
+                return
+        except Exception as e:
+            print(f"Warning: history lookup failed for {prompt_id}: {e}", file=sys.stderr)
+        self._resync.set()
+
+    # ------------------------------------------------------------------
+    # WebSocket
+    # ------------------------------------------------------------------
+
+    def _ws_url(self) -> str:
+        if self.base_url.startswith("https://"):
+            host = "wss://" + self.base_url[len("https://"):]
+        else:
+            host = "ws://" + self.base_url.split("://", 1)[-1]
+        return f"{host}/ws?clientId={self.client_id}"
+
+    def _connect(self) -> bool:
+        try:
+            ws = websocket.create_connection(self._ws_url(), timeout=self.connect_timeout)
+            ws.settimeout(None)
+        except Exception as e:
+            print(f"Warning: ComfyUI event stream unavailable ({e}); polling /history instead",
+                  file=sys.stderr)
+            self._connected.clear()
+            return False
+        self._ws = ws
+        self._connected.set()
+        # Events may have been missed while disconnected; let the poller sweep once
+        self._resync.set()
+        return True
+
+    def _read_loop(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            if not self._connected.is_set():
+                if self._stop.wait(backoff):
+                    return
+                if self._connect():
+                    backoff = 1.0
+                else:
+                    backoff = min(backoff * 2, 30.0)
+                continue
+            try:
+                message = self._ws.recv()
+            except Exception:
+                if self._stop.is_set():
+                    return
+                print("Warning: ComfyUI event stream dropped; falling back to polling",
+                      file=sys.stderr)
+                self._connected.clear()
+                self._resync.set()
+                continue
+            if isinstance(message, str) and message:
+                try:
+                    self._handle_event(json.loads(message))
+                except ValueError:
+                    continue
+
+    def _handle_event(self, event: Dict[str, Any]) -> None:
+        event_type = event.get("type")
+        data = event.get("data") or {}
+        prompt_id = data.get("prompt_id")
+
+        if event_type == "status":
+            exec_info = (data.get("status") or {}).get("exec_info") or {}
+            if "queue_remaining" in exec_info:
+                self.queue_remaining = exec_info["queue_remaining"]
+            with self._status_changed:
+                self._status_changed.notify_all()
+        elif event_type == "executed" and prompt_id:
+            with self._lock:
+                self._outputs.setdefault(prompt_id, {})[str(data.get("node"))] = data.get("output") or {}
+        elif event_type == "executing" and prompt_id and data.get("node") is None:
+            self._finish(prompt_id)
+        elif event_type == "execution_success" and prompt_id:
+            self._finish(prompt_id)
+        elif event_type in ("execution_error", "execution_interrupted") and prompt_id:
+            message = data.get("exception_message") or event_type
+            self._resolve(prompt_id, ComfyExecutionError(prompt_id, message, data))
+
+    # ------------------------------------------------------------------
+    # Polling fallback
+    # ------------------------------------------------------------------
+
+    def _sweep(self, pending) -> bool:
+        """Check each pending prompt against `/history`; True if any resolved."""
+        progressed = False
+        for prompt_id in pending:
+            try:
+                progressed = self._resolve_from_history(prompt_id) or progressed
+            except Exception as e:
+                print(f"Warning: Polling error: {e}", file=sys.stderr)
+        return progressed
+
+    def _poll_loop(self) -> None:
+        interval = self.min_poll_interval
+        while not self._stop.is_set():
+            with self._lock:
+                pending = list(self._pending)
+
+            if not pending:
+                self._wake.wait()
+                self._wake.clear()
+                interval = self.min_poll_interval
+                continue
+
+            if self._connected.is_set() and not self._resync.is_set():
+                # Events drive completion; sweep only as a safety net for lost events
+                if not self._resync.wait(self.safety_poll_interval):
+                    self._sweep(pending)
+                continue
+
+            self._resync.clear()
+            if self._sweep(pending):
+                interval = self.min_poll_interval
+            else:
+                interval = min(interval * 2, self.max_poll_interval)
+            self._resync.wait(interval)
+
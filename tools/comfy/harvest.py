@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Incremental harvesting of tagged outputs from ComfyUI's `/history`.
+
+Producers label the outputs they care about when they submit:
+
+    client.submit(workflow, extra_data=output_tag("title", {"9": "light/stage-ember.png"}))
+
+The tag travels with the prompt (`extra_data`, echoed in `/history`), so a
+harvester finds its jobs by kind and output node instead of searching
+prompt text. `HistoryHarvester` remembers the last prompt it processed per
+backend (`.comfy-cache/harvest/<name>.json`) and pages `/history` with
+`max_items` from the newest entry back to that cursor, so a run costs time
+proportional to what finished since the last one, not to the history size.
+New outputs are downloaded in parallel; when several prompts wrote the same
+target, only the latest is fetched.
+
+Usage:
+    harvester = HistoryHarvester("titles", kind="title")
+    for path, prompt_id in harvester.harvest(lambda name: OUTPUT_DIR / name):
+        print(f"SAVED: {path.name} (PID: {prompt_id})")
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from comfy.client import ComfyClient, ComfyError, ImageRef, get_client
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_STATE_DIR = PROJECT_ROOT / ".comfy-cache" / "harvest"
+
+# extra_data key carrying a prompt's harvest tag
+TAG_KEY = "immanence_tag"
+
+
+def output_tag(kind: str, outputs: Dict[str, str]) -> Dict[str, Any]:
+    """extra_data naming a prompt's output nodes (`{node_id: name}`) for harvesters of `kind`."""
+    return {TAG_KEY: {"kind": kind, "outputs": {str(node_id): name for node_id, name in outputs.items()}}}
+
+
+def prompt_tag(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Harvest tag of a `/history` entry, if it has one."""
+    prompt = entry.get("prompt") or []
+    extra_data = prompt[3] if len(prompt) > 3 and isinstance(prompt[3], dict) else {}
+    return extra_data.get(TAG_KEY)
+
+
+class HistoryHarvester:
+    """Downloads outputs of tagged prompts that finished since the previous run."""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        client: Optional[ComfyClient] = None,
+        state_dir: Path = DEFAULT_STATE_DIR,
+        page_size: int = 32,
+        workers: int = 4,
+    ):
+        self.kind = kind
+        self.client = client or get_client()
+        self.state_path = Path(state_dir) / f"{name}.json"
+        self.page_size = page_size
+        self.workers = workers
+
+    # ------------------------------------------------------------------
+    # Cursors
+    # ------------------------------------------------------------------
+
+    def cursors(self) -> Dict[str, str]:
+        """Last processed prompt ID per backend URL."""
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cursors(self, cursors: Dict[str, str]) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(f".{self.state_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(cursors, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    def new_entries(self, backend: ComfyClient, cursor: Optional[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """History entries after `cursor`, oldest first.
+
+        `/history?max_items=N` returns the newest N entries; the page grows
+        until it reaches the cursor. If the cursor is gone (history cleared,
+        server restarted) everything the server still has is new.
+        """
+        size = self.page_size
+        while True:
+            page = backend.history(max_items=size)
+            prompt_ids = list(page)
+            if cursor in page:
+                return [(prompt_id, page[prompt_id]) for prompt_id in prompt_ids[prompt_ids.index(cursor) + 1:]]
+            if len(page) < size:
+                return list(page.items())
+            size *= 4
+
+    # ------------------------------------------------------------------
+    # Harvesting
+    # ------------------------------------------------------------------
+
+    def harvest(self, resolve: Callable[[str], Optional[Path]]) -> List[Tuple[Path, str]]:
+        """Download new tagged outputs; `resolve` maps a tagged name to a target path (None skips it).
+
+        Returns `(path, prompt_id)` per file written. A backend's cursor only
+        advances if all of its downloads succeeded.
+        """
+        cursors = self.cursors()
+        backends = getattr(self.client, "backends", [self.client])
+        # target -> (backend, image, prompt_id); later prompts replace earlier ones
+        plan: Dict[Path, Tuple[ComfyClient, ImageRef, str]] = {}
+        advanced: Dict[str, str] = {}
+        for backend in backends:
+            try:
+                entries = self.new_entries(backend, cursors.get(backend.base_url))
+            except (requests.RequestException, ValueError) as e:
+                print(f"⚠️  Could not read history from {backend.base_url}: {e}")
+                continue
+            for prompt_id, entry in entries:
+                tag = prompt_tag(entry)
+                if not tag or tag.get("kind") != self.kind:
+                    continue
+                for node_id, name in tag.get("outputs", {}).items():
+                    images = entry.get("outputs", {}).get(node_id, {}).get("images", [])
+                    target = resolve(name)
+                    if images and target is not None:
+                        plan[Path(target)] = (backend, ImageRef.from_output(images[0], backend.base_url), prompt_id)
+            if entries:
+                advanced[backend.base_url] = entries[-1][0]
+
+        def fetch(item: Tuple[Path, Tuple[ComfyClient, ImageRef, str]]) -> Tuple[Path, str]:
+            target, (backend, image, prompt_id) = item
+            backend.download(image, target, verify=True)
+            return target, prompt_id
+
+        saved: List[Tuple[Path, str]] = []
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [(item, pool.submit(fetch, item)) for item in plan.items()]
+            for (target, (backend, _, _)), future in futures:
+                try:
+                    saved.append(future.result())
+                except (requests.RequestException, ComfyError, OSError) as e:
+                    print(f"⚠️  Could not save {target.name}: {e}")
+                    failed.add(backend.base_url)
+
+        for base_url, prompt_id in advanced.items():
+            if base_url not in failed:
+                cursors[base_url] = prompt_id
+        self._save_cursors(cursors)
+        return saved
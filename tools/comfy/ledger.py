@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Persistent job ledger for long generation runs.
+
+Every submission is recorded in `.comfy-cache/ledger.sqlite` with its graph,
+prompt_id, SaveImage node, output paths and state (`submitted` → `done` or
+`failed`). If a run is interrupted, the next run of the same jobs looks
+each one up by output path and reconciles it against ComfyUI: prompts that
+finished meanwhile are downloaded from `/history`, prompts still in the
+queue are awaited (see `prompt_status`), and only prompts ComfyUI no longer
+knows about are submitted again.
+
+Runs that queue jobs and exit (`--no-wait`) leave their entries
+`submitted`; `collect` later finishes all of them at once: one paged
+`/history` sweep per backend resolves every recorded prompt_id, and each
+finished prompt's images go exactly to the output paths (and through the
+post chain) recorded at submission.
+
+Usage:
+    ledger = get_ledger()
+    entry = ledger.find(output_path, workflow, seeded=True)
+    state, outputs = prompt_status(client, entry.prompt_id) if entry else (LOST, {})
+    if state in (LOST, FAILED):
+        prompt_id = client.submit(workflow)
+        ledger.submitted(name, [output_path], workflow, prompt_id, "9")
+
+    counts = collect(client, ledger)  # later, e.g. `comfyctl.py collect`
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from comfy.cache import DEFAULT_CACHE_DIR, get_cache, workflow_key
+from comfy.client import ComfyClient, ComfyError, ImageRef
+from comfy.completion import history_error
+
+DEFAULT_LEDGER_PATH = DEFAULT_CACHE_DIR / "ledger.sqlite"
+
+SUBMITTED = "submitted"
+DONE = "done"
+FAILED = "failed"
+# Server-side states reported by prompt_status besides DONE/FAILED
+QUEUED = "queued"
+LOST = "lost"
+
+# Sampler inputs that vary between runs when an asset has no fixed seed
+_SEED_INPUTS = {"seed", "noise_seed"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    output_path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    spec_key TEXT NOT NULL,
+    template_key TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    prompt_id TEXT,
+    output_node TEXT NOT NULL,
+    output_paths TEXT NOT NULL,
+    state TEXT NOT NULL,
+    error TEXT,
+    submitted_at REAL,
+    updated_at REAL,
+    post TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_prompt ON jobs (prompt_id);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+
+def template_key(workflow: Dict[str, Any]) -> str:
+    """Workflow key with sampler seeds left out."""
+    unseeded = {
+        node_id: dict(node, inputs={k: v for k, v in node.get("inputs", {}).items() if k not in _SEED_INPUTS})
+        for node_id, node in workflow.items()
+    }
+    return workflow_key(unseeded)
+
+
+@dataclass
+class LedgerEntry:
+    """One recorded submission; `output_paths[i]` receives image i of `output_node`."""
+
+    name: str
+    prompt_id: Optional[str]
+    output_node: str
+    output_paths: List[Path]
+    state: str
+    error: Optional[str] = None
+    # Graph as submitted (the packed graph if the job was packed)
+    workflow: Dict[str, Any] = field(default_factory=dict)
+    # comfy.postprocess chain applied to each image before it is written
+    post: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def output_path(self) -> Path:
+        return self.output_paths[0]
+
+    def outputs_exist(self) -> bool:
+        return all(path.is_file() for path in self.output_paths)
+
+
+class JobLedger:
+    """SQLite-backed record of submitted prompts, shared across threads."""
+
+    def __init__(self, path: Path = DEFAULT_LEDGER_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            if "post" not in columns:
+                # Ledgers created before post chains were recorded
+                self._db.execute("ALTER TABLE jobs ADD COLUMN post TEXT")
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> LedgerEntry:
+        return LedgerEntry(
+            row["name"],
+            row["prompt_id"],
+            row["output_node"],
+            [Path(path) for path in json.loads(row["output_paths"])],
+            row["state"],
+            row["error"],
+            json.loads(row["workflow"]),
+            json.loads(row["post"] or "[]"),
+        )
+
+    def find(self, output_path: Path, workflow: Dict[str, Any], seeded: bool = True) -> Optional[LedgerEntry]:
+        """Recorded submission for `output_path`, if it was built from the same graph.
+
+        An unseeded job matches any earlier seed, since any of them satisfies it.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE output_path = ?", (Path(output_path).as_posix(),)
+            ).fetchone()
+        if row is None:
+            return None
+        if seeded and row["spec_key"] != workflow_key(workflow):
+            return None
+        if not seeded and row["template_key"] != template_key(workflow):
+            return None
+        return self._entry(row)
+
+    def submitted(
+        self,
+        name: str,
+        output_paths: Sequence[Path],
+        workflow: Dict[str, Any],
+        prompt_id: str,
+        output_node: str,
+        packed_workflow: Optional[Dict[str, Any]] = None,
+        post: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        """Record a submission; `packed_workflow` is the graph actually sent, if packed.
+
+        `post` is the postprocess chain `collect` applies to the images.
+        """
+        now = time.time()
+        paths = [Path(path).as_posix() for path in output_paths]
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (output_path, name, spec_key, template_key, workflow, prompt_id,"
+                " output_node, output_paths, state, error, submitted_at, updated_at, post)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)",
+                (
+                    paths[0], name, workflow_key(workflow), template_key(workflow),
+                    json.dumps(packed_workflow or workflow), prompt_id, output_node,
+                    json.dumps(paths), SUBMITTED, now, now, json.dumps(list(post)) if post else None,
+                ),
+            )
+
+    def mark(self, output_path: Path, state: str, error: Optional[str] = None) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE output_path = ?",
+                (state, error, time.time(), Path(output_path).as_posix()),
+            )
+
+    def entries(self, state: Optional[str] = None) -> List[LedgerEntry]:
+        """All entries, or those in `state`, oldest submission first."""
+        query = "SELECT * FROM jobs" + (" WHERE state = ?" if state else "") + " ORDER BY submitted_at"
+        with self._lock:
+            rows = self._db.execute(query, (state,) if state else ()).fetchall()
+        return [self._entry(row) for row in rows]
+
+
+def prompt_status(client: ComfyClient, prompt_id: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    """Where ComfyUI is with a prompt: DONE (with outputs), FAILED, QUEUED or LOST.
+
+    LOST means the server no longer knows the prompt (e.g. it was restarted).
+    """
+    if not prompt_id:
+        return LOST, {}
+    history = client.history(prompt_id).get(prompt_id)
+    if history is not None:
+        if history_error(history):
+            return FAILED, {}
+        return DONE, history.get("outputs") or {}
+    queue = client.queue()
+    queued = {item[1] for item in queue.get("queue_running", []) + queue.get("queue_pending", [])}
+    return (QUEUED if prompt_id in queued else LOST), {}
+
+
+def history_sweep(backend: ComfyClient, prompt_ids: Sequence[str], page_size: int = 32) -> Dict[str, Any]:
+    """`/history` entries of `prompt_ids` that `backend` knows, in as few requests as possible.
+
+    `/history?max_items=N` returns the newest N entries; the page grows until
+    it holds every wanted prompt or the server's whole history.
+    """
+    wanted = set(prompt_ids)
+    size = max(page_size, len(wanted))
+    while True:
+        page = backend.history(max_items=size)
+        if wanted <= page.keys() or len(page) < size:
+            return {prompt_id: page[prompt_id] for prompt_id in wanted & page.keys()}
+        size *= 4
+
+
+def _save_entry(backend: ComfyClient, entry: LedgerEntry, outputs: Dict[str, Any]) -> List[bytes]:
+    """Download an entry's images, or return their bytes if it has a post chain."""
+    images = [ImageRef.from_output(image, backend.base_url) for image in outputs.get(entry.output_node, {}).get("images", [])]
+    if len(images) < len(entry.output_paths):
+        raise ComfyError(f"Prompt {entry.prompt_id} returned {len(images)} of {len(entry.output_paths)} images")
+    if entry.post:
+        return [backend.fetch(image) for image in images[:len(entry.output_paths)]]
+    for image, path in zip(images, entry.output_paths):
+        backend.download(image, path, verify=True)
+    return []
+
+
+def collect(client: ComfyClient, ledger: JobLedger, workers: int = 4) -> Counter:
+    """Download every `submitted` entry whose prompt has finished; returns counts by outcome.
+
+    Outcomes are DONE, FAILED (execution error or unusable output, marked in
+    the ledger), QUEUED (still running or pending) and LOST (unknown to every
+    backend; left `submitted` so a rerun of the generator resubmits it).
+    """
+    counts: Counter = Counter()
+    # Jobs packed into one prompt share its prompt_id
+    pending: Dict[str, List[LedgerEntry]] = {}
+    for entry in ledger.entries(SUBMITTED):
+        if entry.prompt_id:
+            pending.setdefault(entry.prompt_id, []).append(entry)
+    if not pending:
+        return counts
+    backends = getattr(client, "backends", [client])
+    # prompt_id -> (backend, history entry)
+    found: Dict[str, Tuple[ComfyClient, Dict[str, Any]]] = {}
+    for backend in backends:
+        missing = [prompt_id for prompt_id in pending if prompt_id not in found]
+        if not missing:
+            break
+        try:
+            for prompt_id, history in history_sweep(backend, missing).items():
+                found[prompt_id] = (backend, history)
+        except (requests.RequestException, ValueError) as e:
+            print(f"⚠️  Could not read history from {backend.base_url}: {e}")
+
+    finished: List[Tuple[LedgerEntry, ComfyClient, Dict[str, Any]]] = []
+    for prompt_id, (backend, history) in found.items():
+        error = history_error(history)
+        for entry in pending[prompt_id]:
+            if error:
+                ledger.mark(entry.output_path, FAILED, error)
+                print(f"  ❌ {entry.name}: {error}")
+                counts[FAILED] += 1
+            else:
+                finished.append((entry, backend, history.get("outputs") or {}))
+
+    unresolved = [prompt_id for prompt_id in pending if prompt_id not in found]
+    if unresolved:
+        queue = client.queue()
+        queued = {item[1] for item in queue.get("queue_running", []) + queue.get("queue_pending", [])}
+        for prompt_id in unresolved:
+            state = QUEUED if prompt_id in queued else LOST
+            for entry in pending[prompt_id]:
+                print(f"  {'⏳' if state == QUEUED else '❔'} {entry.name}: {state} (ID: {prompt_id})")
+                counts[state] += 1
+
+    def record(entry: LedgerEntry, error: Optional[Exception]) -> None:
+        if error is not None:
+            ledger.mark(entry.output_path, FAILED, str(error))
+            print(f"  ❌ {entry.name}: {error}")
+            counts[FAILED] += 1
+        else:
+            ledger.mark(entry.output_path, DONE)
+            print(f"  ✅ {entry.name} → {', '.join(str(path) for path in entry.output_paths)}")
+            counts[DONE] += 1
+
+    fetched: List[Tuple[LedgerEntry, List[bytes]]] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(entry, pool.submit(_save_entry, backend, entry, outputs)) for entry, backend, outputs in finished]
+        for entry, future in futures:
+            try:
+                data = future.result()
+            except (requests.RequestException, ComfyError, OSError, ValueError) as e:
+                record(entry, e)
+                continue
+            if entry.post:
+                fetched.append((entry, data))
+            else:
+                record(entry, None)
+
+    if fetched:
+        # Post chains run once all downloads are in, one process-pool batch
+        from comfy.postprocess import get_postprocessor
+
+        processor = get_postprocessor()
+        chained = [
+            (entry, [processor.submit(image, entry.post, path) for image, path in zip(data, entry.output_paths)])
+            for entry, data in fetched
+        ]
+        for entry, results in chained:
+            try:
+                for result in results:
+                    result.result()
+            except (OSError, ValueError) as e:
+                record(entry, e)
+            else:
+                record(entry, None)
+    return counts
+
+
+_default_ledger: Optional[JobLedger] = None
+_default_lock = threading.Lock()
+
+
+def get_ledger() -> JobLedger:
+    """Process-wide ledger next to the result cache."""
+    global _default_ledger
+    with _default_lock:
+        if _default_ledger is None:
+            _default_ledger = JobLedger(get_cache().root / DEFAULT_LEDGER_PATH.name)
+        return _default_ledger
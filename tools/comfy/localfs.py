@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Zero-copy harvesting from a ComfyUI installation on this machine.
+
+When the backend shares a filesystem with the generators, an output listed
+in `/history` (`filename`, `subfolder`, `type`) is a file under the
+ComfyUI directory. `local_path` resolves it, and `place` puts it into the
+project as a hardlink, a reflink (copy-on-write clone) or, across devices,
+a streamed copy, without routing the image through `/view` and Python memory.
+A hardlink shares the file with ComfyUI's output folder, so editing one in
+place changes the other; `place(..., link=False)` makes an independent file
+(reflink or copy) instead.
+
+Configure the ComfyUI directory per backend in presets.yml:
+
+    mcp:
+      comfyui_roots:
+        http://127.0.0.1:8188: D:/AI/ComfyUI
+
+Usage:
+    source = local_path(Path("D:/AI/ComfyUI"), image)
+    if source:
+        place(source, Path("public/lotus.png"))
+"""
+
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Folders ComfyUI serves through /view, by output `type`
+FOLDER_TYPES = ("output", "input", "temp")
+
+# Linux ioctl that clones a file's extents (btrfs, XFS)
+FICLONE = 0x40049409
+
+
+def local_path(root: Path, image) -> Optional[Path]:
+    """On-disk file behind an ImageRef under ComfyUI directory `root`, or None if absent."""
+    if image.type not in FOLDER_TYPES:
+        return None
+    base = (Path(root) / image.type).resolve()
+    path = (base / image.subfolder / image.filename).resolve()
+    # Subfolder and filename come from the server; never leave its folder
+    if base not in path.parents or not path.is_file():
+        return None
+    return path
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            pass
+    target.unlink()
+    return False
+
+
+def _hardlink(source: Path, target: Path) -> bool:
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        # Different volume, or a filesystem without hardlinks
+        return False
+
+
+def place(source: Path, target: Path, link: bool = True) -> str:
+    """Put `source` at `target` atomically; returns how: "hardlink", "reflink" or "copy".
+
+    With `link=False` the target never shares its inode with `source`.
+    """
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Per thread: concurrent placements of one target must not share a temp file
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    try:
+        if link and _hardlink(source, tmp_path):
+            method = "hardlink"
+        elif _reflink(source, tmp_path):
+            method = "reflink"
+        else:
+            shutil.copyfile(source, tmp_path)
+            method = "copy"
+        os.replace(tmp_path, target)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return method
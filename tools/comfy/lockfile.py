@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Incremental build state for the assets.yml registry.
+
+`assets.lock.json` (next to assets.yml) holds one entry per built asset:
+the hash of everything that determines the image (prompt, negative prompt,
+the resolved preset block from presets.yml, seed), the post-processing chain,
+and the SHA-256 of the output file. An asset is rebuilt only if that spec
+hash changed or its output is missing or was modified, so editing one
+layer's prompt costs one GPU job instead of a full `--asset all` run.
+
+Usage:
+    lock = AssetLock(config_dir / "assets.lock.json")
+    digest = spec_hash(prompt, negative, preset, seed, post)
+    if not lock.is_current(name, digest, output_path):
+        ...  # generate, then
+        lock.record(name, digest, output_path, post, prompt_id)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+LOCK_FILE = "assets.lock.json"
+LOCK_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def spec_hash(
+    prompt: str,
+    negative_prompt: str,
+    preset: Dict[str, Any],
+    seed: Optional[int],
+    post: List[Dict[str, Any]],
+) -> str:
+    """Hash of the inputs that determine an asset's output."""
+    # Timeouts and polling only affect how we wait, not the image
+    preset = {key: value for key, value in preset.items() if key != "timeout"}
+    spec = {
+        "prompt": prompt,
+        "negative_prompt": negative_prompt,
+        "preset": preset,
+        "seed": seed,
+        "post": post,
+    }
+    encoded = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class AssetLock:
+    """Thread-safe view of assets.lock.json; every `record` is written through."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != LOCK_VERSION:
+            return {}
+        return data.get("assets", {})
+
+    def is_current(self, name: str, digest: str, output_path: Path) -> bool:
+        """True if `name` was built from `digest` and its output is unchanged."""
+        entry = self.entries.get(name)
+        if not entry or entry.get("spec_hash") != digest:
+            return False
+        output_path = Path(output_path)
+        if entry.get("output") != output_path.as_posix() or not output_path.is_file():
+            return False
+        return file_sha256(output_path) == entry.get("output_hash")
+
+    def prompt_id(self, name: str) -> Optional[str]:
+        return self.entries.get(name, {}).get("prompt_id")
+
+    def record(
+        self,
+        name: str,
+        digest: str,
+        output_path: Path,
+        post: List[Dict[str, Any]],
+        prompt_id: Optional[str] = None,
+    ) -> None:
+        """Store the build of `name` and rewrite the lockfile."""
+        entry = {
+            "spec_hash": digest,
+            "output": Path(output_path).as_posix(),
+            "output_hash": file_sha256(output_path),
+            "post": post,
+            "prompt_id": prompt_id,
+            "built": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with self._lock:
+            self.entries[name] = entry
+            self._save()
+
+    def _save(self) -> None:
+        data = {"version": LOCK_VERSION, "assets": dict(sorted(self.entries.items()))}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -9,6 +9,13 @@ Usage:
     python mcp_generator.py --asset all --model z-image-base
     python mcp_generator.py --asset city/midground --dry-run
     python mcp_generator.py --asset sakshi_scenes/all --parallel 2
+    python mcp_generator.py --asset all --no-cache
+    python mcp_generator.py --asset forest_layers/all --force
+    python mcp_generator.py --asset all --warmup
+
+Builds are incremental: assets.lock.json records what each output was built
+from, and only assets whose spec changed or whose output is missing are
+regenerated.
 """
 
 import argparse
@@ -16,24 +23,81 @@ import json
 import os
 import random
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict, Optional
-from urllib.parse import urljoin
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from comfy.batch import AssetResult
+from comfy.cache import ResultCache, get_cache, seed_for
+from comfy.client import NORMAL, PRIORITIES, ComfyClient, JobResult, new_run_id
+from comfy.completion import ComfyExecutionError
+from comfy.ledger import DONE, FAILED, QUEUED, SUBMITTED, get_ledger, prompt_status
+from comfy.lockfile import LOCK_FILE, AssetLock, spec_hash
+from comfy.pool import BackendPool
+from comfy.postprocess import get_postprocessor, validate_chain
+from comfy.scheduler import run_after, schedule, warmup_workflow
+
 
 class ComfyMCPGenerator:
     """Registry-driven ComfyUI generator using MCP proxy."""
 
-    def __init__(self, config_dir: Path):
+    def __init__(self, config_dir: Path, use_cache: bool = True, priority: str = NORMAL):
         self.config_dir = config_dir
         self.presets = self._load_yaml(config_dir / "presets.yml")
         self.assets = self._load_yaml(config_dir / "assets.yml")
         self.mcp_endpoint = self.presets["mcp"]["endpoint"]
         self.submit_timeout = self.presets["mcp"]["submit_timeout"]
+        self._print_lock = threading.Lock()
+        # Shared by every client this generator creates, for comfyctl.py cancel-run
+        self.run_id = new_run_id()
+        self.priority = priority
+        self.client = self._make_client(pool_size=1)
+        self.cache: Optional[ResultCache] = get_cache() if use_cache else None
+        self.lock = AssetLock(config_dir / LOCK_FILE)
+        self.ledger = get_ledger()
+        # One lock per workflow hash, so identical assets in a run generate once
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._key_locks_lock = threading.Lock()
+
+    def _make_client(self, pool_size: int) -> ComfyClient:
+        """Create a backend client that submits through the MCP proxy.
+
+        The connection pool is sized for `pool_size` concurrent jobs. With
+        several `mcp.comfyui_backends` the proxy is bypassed and jobs are
+        balanced across the backends by a BackendPool.
+        """
+        intervals = [p["timeout"]["polling_interval"] for p in self.presets["presets"].values()]
+        backends = self.presets["mcp"].get("comfyui_backends") or []
+        if len(backends) > 1:
+            return BackendPool(
+                backends,
+                pool_size=pool_size * 2,
+                timeout=self.submit_timeout,
+                poll_interval=min(intervals, default=2),
+                run_id=self.run_id,
+                priority=self.priority,
+            )
+        return ComfyClient(
+            base_url=self.presets["mcp"]["comfyui_backend"],
+            prompt_url=self.mcp_endpoint,
+            pool_size=pool_size * 2,
+            timeout=self.submit_timeout,
+            poll_interval=min(intervals, default=2),
+            run_id=self.run_id,
+            priority=self.priority,
+        )
+
+    def _log(self, message: str, label: Optional[str] = None, error: bool = False) -> None:
+        """Print a line without interleaving output from concurrent jobs."""
+        line = f"[{label}] {message}" if label else message
+        with self._print_lock:
+            print(line, file=sys.stderr if error else sys.stdout, flush=True)
 
     def _load_yaml(self, path: Path) -> Dict[str, Any]:
         """Load and parse YAML configuration file."""
@@ -124,82 +188,52 @@ class ComfyMCPGenerator:
 
     def _submit_job(self, workflow: Dict[str, Any]) -> str:
         """Submit job to MCP proxy and return prompt_id."""
-        try:
-            response = requests.post(
-                self.mcp_endpoint,
-                json=workflow,
-                timeout=self.submit_timeout,
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result["prompt_id"]
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Failed to submit job to MCP proxy: {e}")
-
-    def _poll_job(self, prompt_id: str, timeout: int, interval: int) -> Dict[str, Any]:
-        """Poll job status until completion or timeout."""
-        backend = self.presets["mcp"]["comfyui_backend"]
-        history_url = urljoin(backend, f"/history/{prompt_id}")
-        
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                response = requests.get(history_url, timeout=10)
-                response.raise_for_status()
-                history = response.json()
-
-                if prompt_id in history:
-                    return history[prompt_id]
-
-                time.sleep(interval)
-            except requests.exceptions.RequestException as e:
-                print(f"Warning: Polling error: {e}", file=sys.stderr)
-                time.sleep(interval)
-
-        raise TimeoutError(f"Job {prompt_id} did not complete within {timeout}s")
-
-    def _download_image(self, prompt_id: str, output_path: Path) -> None:
-        """Download generated image from ComfyUI backend."""
-        backend = self.presets["mcp"]["comfyui_backend"]
-        
-        # Query history to get output filename
-        history_url = urljoin(backend, f"/history/{prompt_id}")
-        response = requests.get(history_url, timeout=10)
-        response.raise_for_status()
-        history = response.json()
-
-        if prompt_id not in history:
-            raise RuntimeError(f"No history found for prompt {prompt_id}")
-
-        outputs = history[prompt_id].get("outputs", {})
-        if not outputs:
-            raise RuntimeError(f"No outputs found for prompt {prompt_id}")
-
-        # Find SaveImage node output
-        save_image_output = None
-        for node_output in outputs.values():
-            if "images" in node_output:
-                save_image_output = node_output["images"][0]
-                break
-
-        if not save_image_output:
-            raise RuntimeError("No image output found in job results")
-
-        # Download image
-        filename = save_image_output["filename"]
-        subfolder = save_image_output.get("subfolder", "")
-        image_url = urljoin(
-            backend,
-            f"/view?filename={filename}&subfolder={subfolder}&type=output",
+        # The proxy forwards client_id, so this prompt's events reach our listener
+        return self.client.submit(workflow["prompt"])
+
+    def _poll_job(self, prompt_id: str, timeout: int) -> JobResult:
+        """Wait for job completion (event-driven, polling fallback) or timeout."""
+        return self.client.wait(prompt_id, timeout)
+
+    def _download_image(self, result: JobResult, output_path: Path, preset_name: str) -> None:
+        """Download the job's first SaveImage output and encode it as the preset's `output` says.
+
+        Encoding runs in the shared post-processing pool, so concurrent jobs
+        keep downloading while earlier images are transcoded. Without an
+        `output` block the PNG is streamed straight to disk.
+        """
+        chain = self._post_chain(preset_name)
+        if not chain and output_path.suffix.lower() == ".png":
+            self.client.download(result.first_image(), output_path, verify=True)
+            return
+        data = self.client.fetch(result.first_image())
+        get_postprocessor().submit(data, chain, output_path).result()
+
+    def _post_chain(self, preset_name: str) -> List[Dict[str, Any]]:
+        """Post-processing applied between download and the final output file."""
+        output = self.presets["presets"][preset_name].get("output")
+        return [{"op": "encode", **output}] if output else []
+
+    def _check_output(self, preset_name: str, output_path: Path, label: Optional[str]) -> None:
+        """Warn when the preset's encoding does not match the output file's extension."""
+        chain = self._post_chain(preset_name)
+        validate_chain(chain)
+        fmt = str(chain[-1].get("format", "")).lower() if chain else ""
+        suffix = output_path.suffix.lower().lstrip(".")
+        if fmt and suffix and {fmt, suffix} != {"jpeg", "jpg"} and fmt != suffix:
+            self._log(f"  ⚠️  Preset {preset_name} encodes {fmt} but output is .{suffix}", label, error=True)
+
+    def _spec_digest(self, spec: Dict[str, Any], preset_override: Optional[str]) -> str:
+        """Lockfile hash of everything that determines this asset's output."""
+        preset_name = preset_override or spec["preset"]
+        return spec_hash(
+            spec["prompt"],
+            spec.get("negative_prompt", self.presets["default_negative_prompt"]),
+            self.presets["presets"][preset_name],
+            spec.get("seed"),
+            self._post_chain(preset_name),
         )
 
-        response = requests.get(image_url, timeout=30)
-        response.raise_for_status()
-
-        # Write to output path
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_bytes(response.content)
-
     def _save_metadata(
         self,
         output_path: Path,
@@ -227,10 +261,17 @@ class ComfyMCPGenerator:
         asset_spec: Dict[str, Any],
         preset_override: Optional[str] = None,
         dry_run: bool = False,
-    ) -> None:
-        """Generate single asset from specification."""
+        label: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> Optional[str]:
+        """Generate single asset from specification and return its prompt_id.
+
+        Raises on failure so callers running many assets can report per-asset
+        results; a dry run returns None. With the result cache enabled, a
+        `null` seed is derived from the asset name (or output path) and an
+        identical earlier generation is copied instead of resubmitted.
+        """
         preset_name = preset_override or asset_spec["preset"]
-        preset = self.presets["presets"][preset_name]
         
         positive_prompt = asset_spec["prompt"]
         negative_prompt = asset_spec.get(
@@ -239,38 +280,89 @@ class ComfyMCPGenerator:
         )
         seed = asset_spec.get("seed")
         output_path = Path(asset_spec["output_path"])
+        if seed is None and self.cache is not None:
+            seed = seed_for(name or str(output_path))
 
-        print(f"Generating: {output_path}")
-        print(f"  Preset: {preset_name}")
-        print(f"  Prompt: {positive_prompt[:80]}...")
+        self._log(f"Generating: {output_path}", label)
+        self._log(f"  Preset: {preset_name}", label)
+        self._log(f"  Prompt: {positive_prompt[:80]}...", label)
 
+        self._check_output(preset_name, output_path, label)
         if dry_run:
-            print("  [DRY RUN] Skipping actual generation")
-            return
+            self._log("  [DRY RUN] Skipping actual generation", label)
+            return None
 
         # Build workflow
         workflow = self._build_workflow(preset_name, positive_prompt, negative_prompt, seed)
         actual_seed = workflow["prompt"]["6"]["inputs"]["seed"]
 
-        # Submit job
-        print(f"  Submitting job...")
-        prompt_id = self._submit_job(workflow)
-        print(f"  Job ID: {prompt_id}")
-
-        # Poll for completion
+        # Without the cache a null seed is random, so any earlier seed may be resumed
+        seeded = seed is not None
+        args = (workflow, preset_name, positive_prompt, negative_prompt, actual_seed, output_path, label, name, seeded)
+
+        if self.cache is None:
+            return self._generate(*args)
+
+        key = self.cache.key(workflow["prompt"], self._post_chain(preset_name))
+        with self._key_locks_lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self.cache.restore(key, [output_path])
+            if entry is not None:
+                self._save_metadata(output_path, preset_name, positive_prompt, negative_prompt, actual_seed, entry.prompt_id)
+                self._log(f"  ✓ Cached: {output_path}", label)
+                return entry.prompt_id
+            prompt_id = self._generate(*args)
+            self.cache.store(key, [output_path], prompt_id)
+            return prompt_id
+
+    def _generate(
+        self,
+        workflow: Dict[str, Any],
+        preset_name: str,
+        positive_prompt: str,
+        negative_prompt: str,
+        actual_seed: int,
+        output_path: Path,
+        label: Optional[str],
+        name: Optional[str] = None,
+        seeded: bool = True,
+    ) -> str:
+        """Submit, wait for, download and record one built workflow.
+
+        A prompt an interrupted earlier run submitted for this output is
+        collected from ComfyUI instead of being queued again.
+        """
+        preset = self.presets["presets"][preset_name]
         timeout = preset["timeout"]["job"]
-        interval = preset["timeout"]["polling_interval"]
-        print(f"  Polling (timeout: {timeout}s)...")
-        
-        try:
-            self._poll_job(prompt_id, timeout, interval)
-        except TimeoutError as e:
-            print(f"  ERROR: {e}", file=sys.stderr)
-            return
+
+        result = None
+        entry = self.ledger.find(output_path, workflow["prompt"], seeded)
+        if entry is not None and entry.state == SUBMITTED:
+            result = self._resume_job(entry.prompt_id, timeout, label)
+            if result is not None:
+                prompt_id = result.prompt_id
+                actual_seed = entry.workflow.get("6", {}).get("inputs", {}).get("seed", actual_seed)
+
+        if result is None:
+            # Submit job
+            self._log("  Submitting job...", label)
+            prompt_id = self._submit_job(workflow)
+            self._log(f"  Job ID: {prompt_id}", label)
+            self.ledger.submitted(name or str(output_path), [output_path], workflow["prompt"], prompt_id, "8")
+
+            # Poll for completion
+            self._log(f"  Waiting for completion (timeout: {timeout}s)...", label)
+            try:
+                result = self._poll_job(prompt_id, timeout)
+            except ComfyExecutionError as e:
+                self.ledger.mark(output_path, FAILED, str(e))
+                raise
 
         # Download image
-        print(f"  Downloading...")
-        self._download_image(prompt_id, output_path)
+        self._log("  Downloading...", label)
+        self._download_image(result, output_path, preset_name)
+        self.ledger.mark(output_path, DONE)
 
         # Save metadata
         self._save_metadata(
@@ -282,7 +374,171 @@ class ComfyMCPGenerator:
             prompt_id,
         )
 
-        print(f"  ✓ Complete: {output_path}")
+        self._log(f"  ✓ Complete: {output_path}", label)
+        return prompt_id
+
+    def _resume_job(self, prompt_id: str, timeout: int, label: Optional[str]) -> Optional[JobResult]:
+        """Result of a prompt submitted by an earlier run, or None if it must be resubmitted."""
+        state, outputs = prompt_status(self.client, prompt_id)
+        if state == QUEUED:
+            self._log(f"  Resuming queued job {prompt_id}...", label)
+            try:
+                return self._poll_job(prompt_id, timeout)
+            except ComfyExecutionError:
+                return None
+        if state == DONE:
+            self._log(f"  Recovered finished job {prompt_id}", label)
+            # Output names are numbered per server: keep the backend that ran it
+            backend = self.client.backend_for(prompt_id)
+            return JobResult(prompt_id, outputs, base_url=backend.base_url if backend is not None else "")
+        return None
+
+    def _run_one(
+        self,
+        name: str,
+        spec: Dict[str, Any],
+        preset_override: Optional[str],
+        dry_run: bool,
+        label: Optional[str],
+    ) -> AssetResult:
+        """Run one asset end to end, capturing any failure as a result.
+
+        A successful build is recorded in the lockfile.
+        """
+        start = time.time()
+        output_path = Path(spec["output_path"])
+        try:
+            prompt_id = self.generate_asset(spec, preset_override, dry_run, label, name)
+            if not dry_run:
+                preset_name = preset_override or spec["preset"]
+                digest = self._spec_digest(spec, preset_override)
+                self.lock.record(name, digest, output_path, self._post_chain(preset_name), prompt_id)
+            return AssetResult(name, output_path, True, prompt_id, elapsed=time.time() - start)
+        except Exception as e:
+            self._log(f"  ERROR: {e}", label, error=True)
+            return AssetResult(name, output_path, False, error=str(e), elapsed=time.time() - start)
+
+    def generate_assets(
+        self,
+        assets: List[Tuple[str, Dict[str, Any]]],
+        preset_override: Optional[str] = None,
+        dry_run: bool = False,
+        parallel: int = 1,
+        force: bool = False,
+        warmup: bool = False,
+    ) -> List[AssetResult]:
+        """Generate many assets, keeping up to `parallel` jobs in flight.
+
+        Assets that are up to date in the lockfile are skipped unless `force`.
+        The rest are submitted grouped by checkpoint, CLIP loader and latent
+        size so presets are not swapped back and forth; `warmup` renders a
+        one-step image ahead of each model group to load it.
+        Each worker runs submit → poll → download → metadata for its own asset,
+        so while one job downloads the next is already queued on the backend.
+        Results are returned in the same order as `assets`.
+        """
+        parallel = max(1, parallel)
+
+        results: List[Optional[AssetResult]] = [None] * len(assets)
+        pending = []
+        for index, (name, spec) in enumerate(assets):
+            output_path = Path(spec["output_path"])
+            if not force and self.lock.is_current(name, self._spec_digest(spec, preset_override), output_path):
+                results[index] = AssetResult(name, output_path, True, self.lock.prompt_id(name), skipped=True)
+            else:
+                pending.append(index)
+        if len(pending) < len(assets):
+            print(f"{len(assets) - len(pending)} asset(s) up to date, {len(pending)} to build")
+            print()
+
+        # Work in submission order: (asset index or None for a warm-up, function, args)
+        plan = schedule(pending, lambda index: self._layout_workflow(assets[index][1], preset_override))
+        if plan.swaps_before or (warmup and not dry_run):
+            print(plan.report())
+            print()
+        units = []
+        # Unit position -> positions of the units it must wait for
+        after: Dict[int, List[int]] = {}
+        warmed: Dict[Tuple, int] = {}
+        # Units since the last warm-up, which the next one must not overtake
+        since_warmup: List[int] = []
+        for group in plan.groups:
+            if warmup and not dry_run and group.model not in warmed:
+                warmed[group.model] = len(units)
+                after[len(units)], since_warmup = since_warmup, []
+                preset_name = preset_override or assets[group.items[0]][1]["preset"]
+                units.append((None, self._warm_up, (group.workflow, preset_name)))
+            for index in group.items:
+                name, spec = assets[index]
+                if group.model in warmed:
+                    after[len(units)] = [warmed[group.model]]
+                    since_warmup.append(len(units))
+                units.append((index, self._run_one, (name, spec, preset_override, dry_run, name if parallel > 1 else None)))
+
+        if units and not dry_run:
+            print(f"Run ID: {self.run_id} (cancel with: comfyctl.py cancel-run {self.run_id})")
+            print()
+
+        if parallel == 1 or len(pending) <= 1:
+            try:
+                for index, run, args in units:
+                    result = run(*args)
+                    if index is not None:
+                        results[index] = result
+                        print()
+            except KeyboardInterrupt:
+                self._cancel_run()
+                raise
+            return [result for result in results if result is not None]
+
+        self.client.close()
+        self.client = self._make_client(pool_size=parallel)
+        if not dry_run and any(self._post_chain(preset_override or assets[i][1]["preset"]) for i in pending):
+            # Encoders start here, before the worker threads, not inside the first download
+            get_postprocessor().start()
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="comfy-job") as pool:
+            submitted = []
+            for position, (index, run, args) in enumerate(units):
+                if position in after:
+                    # A model's assets wait for its warm-up, the warm-up for the previous model's assets
+                    submitted.append(pool.submit(run_after, [submitted[i] for i in after[position]], run, *args))
+                else:
+                    submitted.append(pool.submit(run, *args))
+            futures = {future: unit[0] for future, unit in zip(submitted, units)}
+            try:
+                for future in as_completed(futures):
+                    if futures[future] is not None:
+                        results[futures[future]] = future.result()
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._cancel_run()
+                raise
+
+        return [result for result in results if result is not None]
+
+    def _cancel_run(self) -> None:
+        """Remove this run's queued prompts and interrupt the running one."""
+        self._log(f"Interrupted: cancelling run {self.run_id}", error=True)
+        try:
+            cancelled = self.client.cancel_run()
+            self._log(f"Cancelled {len(cancelled)} prompt(s)", error=True)
+        except Exception as e:
+            self._log(f"Could not cancel run: {e}", error=True)
+
+    def _layout_workflow(self, spec: Dict[str, Any], preset_override: Optional[str]) -> Dict[str, Any]:
+        """The asset's graph with a fixed seed, for scheduling by model and size."""
+        preset_name = preset_override or spec["preset"]
+        negative_prompt = spec.get("negative_prompt", self.presets["default_negative_prompt"])
+        return self._build_workflow(preset_name, spec["prompt"], negative_prompt, seed=0)["prompt"]
+
+    def _warm_up(self, workflow: Dict[str, Any], preset_name: str) -> None:
+        """Load a model group's weights with a one-step 64×64 render."""
+        try:
+            prompt_id = self._submit_job({"prompt": warmup_workflow(workflow)})
+            self._poll_job(prompt_id, self.presets["presets"][preset_name]["timeout"]["job"])
+            self._log(f"Warmed up {preset_name}")
+        except Exception as e:
+            self._log(f"Warm-up for {preset_name} failed: {e}", error=True)
 
     def resolve_assets(self, asset_path: str) -> list[tuple[str, Dict[str, Any]]]:
         """Resolve asset path to list of (name, spec) tuples."""
@@ -348,6 +604,32 @@ class ComfyMCPGenerator:
             raise ValueError(f"Invalid asset path: {asset_path}")
 
 
+def report_results(results: List[AssetResult], dry_run: bool = False) -> int:
+    """Print a per-asset success/failure summary and return an exit code."""
+    failed = [r for r in results if not r.ok]
+
+    print()
+    print("=" * 60)
+    print("Generation summary")
+    print("=" * 60)
+    for result in results:
+        if not result.ok:
+            print(f"  ✗ {result.name}: {result.error}")
+        elif result.skipped:
+            print(f"  = {result.name} (up to date)")
+        elif dry_run:
+            print(f"  - {result.name} (dry run)")
+        else:
+            print(f"  ✓ {result.name} ({result.elapsed:.1f}s) → {result.output_path}")
+    print()
+    print(f"Succeeded: {len(results) - len(failed)}/{len(results)}")
+    if failed:
+        print(f"Failed: {len(failed)}/{len(results)}")
+
+    print("Generation complete")
+    return 1 if failed else 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="MCP-based ComfyUI asset generator",
@@ -378,7 +660,28 @@ Examples:
         "--parallel",
         type=int,
         default=1,
-        help="Number of parallel jobs (default: 1, sequential)",
+        help="Number of jobs kept in flight at once (default: 1, sequential)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every resolved asset even if assets.lock.json says it is up to date",
+    )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Render a tiny warm-up image before each checkpoint group so model loading is not charged to the first asset",
+    )
+    parser.add_argument(
+        "--priority",
+        choices=PRIORITIES,
+        default=NORMAL,
+        help="Queue lane: interactive jumps the ComfyUI queue, bulk yields to interactive jobs (default: normal)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always submit to ComfyUI (random seeds for null seeds) instead of reusing cached results",
     )
 
     args = parser.parse_args()
@@ -388,7 +691,7 @@ Examples:
     config_dir = script_dir
 
     # Initialize generator
-    generator = ComfyMCPGenerator(config_dir)
+    generator = ComfyMCPGenerator(config_dir, use_cache=not args.no_cache, priority=args.priority)
 
     # Resolve assets
     try:
@@ -400,21 +703,8 @@ Examples:
     print(f"Resolved {len(assets)} asset(s) to generate")
     print()
 
-    # Generate assets (sequential for now, parallel TODO)
-    if args.parallel > 1:
-        print(f"Warning: --parallel {args.parallel} not yet implemented, using sequential")
-
-    for name, spec in assets:
-        try:
-            generator.generate_asset(spec, args.model, args.dry_run)
-            print()
-        except Exception as e:
-            print(f"Error generating {name}: {e}", file=sys.stderr)
-            print()
-            continue
-
-    print("Generation complete")
-    return 0
+    results = generator.generate_assets(assets, args.model, args.dry_run, args.parallel, args.force, args.warmup)
+    return report_results(results, args.dry_run)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Pack several independent ComfyUI API graphs into one `/prompt` submission.
+
+Each subgraph's nodes are renamed `<index>_<node_id>`, and structurally
+identical nodes are merged. Subgraphs that share a checkpoint, CLIP loader
+or negative prompt therefore end up with a single `CheckpointLoaderSimple`
+and a single negative encode. Output nodes (SaveImage, PreviewImage) are
+never merged, so every subgraph keeps its own `filename_prefix`, and
+`PackedGraph.split_outputs` maps the finished prompt's outputs back to each
+subgraph's original node IDs.
+
+Usage:
+    packed = pack([workflow_a, workflow_b])
+    result = client.run(packed.workflow)
+    outputs_a, outputs_b = packed.split_outputs(result.outputs)
+    outputs_a["9"]["images"]
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+
+# Nodes that write results; each subgraph keeps its own copy
+OUTPUT_CLASSES = {"SaveImage", "PreviewImage"}
+
+
+def _is_link(value: Any) -> bool:
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[0], str) and isinstance(value[1], int)
+
+
+def _topological_order(workflow: Dict[str, Any]) -> List[str]:
+    """Node IDs ordered so every node follows the nodes it links to."""
+    order: List[str] = []
+    state: Dict[str, int] = {}
+
+    def visit(node_id: str) -> None:
+        if state.get(node_id) == 2:
+            return
+        if state.get(node_id) == 1:
+            raise ValueError(f"Workflow has a cycle through node {node_id}")
+        state[node_id] = 1
+        for value in workflow[node_id].get("inputs", {}).values():
+            if _is_link(value) and value[0] in workflow:
+                visit(value[0])
+        state[node_id] = 2
+        order.append(node_id)
+
+    for node_id in workflow:
+        visit(node_id)
+    return order
+
+
+@dataclass
+class PackedGraph:
+    """A merged API graph plus, per subgraph, original → packed node IDs."""
+
+    workflow: Dict[str, Any]
+    node_maps: List[Dict[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.node_maps)
+
+    def split_outputs(self, outputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Demultiplex a finished prompt's outputs into one dict per subgraph."""
+        return [
+            {original: outputs[packed] for original, packed in node_map.items() if packed in outputs}
+            for node_map in self.node_maps
+        ]
+
+
+def pack(workflows: Sequence[Dict[str, Any]]) -> PackedGraph:
+    """Merge independent API-format workflows into one graph.
+
+    A single workflow is returned unchanged (identity node map).
+    """
+    if len(workflows) == 1:
+        workflow = workflows[0]
+        return PackedGraph(workflow, [{node_id: node_id for node_id in workflow}])
+
+    packed: Dict[str, Any] = {}
+    node_maps: List[Dict[str, str]] = []
+    # Canonical (class_type, inputs) → packed node ID, for merging shared nodes
+    signatures: Dict[str, str] = {}
+
+    for index, workflow in enumerate(workflows):
+        node_map: Dict[str, str] = {}
+        for node_id in _topological_order(workflow):
+            node = workflow[node_id]
+            inputs = {
+                name: [node_map[value[0]], value[1]] if _is_link(value) and value[0] in node_map else value
+                for name, value in node.get("inputs", {}).items()
+            }
+            class_type = node["class_type"]
+            signature = json.dumps([class_type, inputs], sort_keys=True)
+
+            if class_type not in OUTPUT_CLASSES and signature in signatures:
+                node_map[node_id] = signatures[signature]
+                continue
+
+            packed_id = f"{index}_{node_id}"
+            packed[packed_id] = dict(node, inputs=inputs)
+            node_map[node_id] = packed_id
+            if class_type not in OUTPUT_CLASSES:
+                signatures[signature] = packed_id
+        node_maps.append(node_map)
+
+    return PackedGraph(packed, node_maps)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Load balancing across several ComfyUI backends.
+
+`BackendPool` stands in for a ComfyClient when `mcp.comfyui_backends` in
+presets.yml lists more than one server. Each backend is health-checked via
+`/system_stats` (results cached for `health_ttl` seconds). A job goes to the
+healthy backend with the shortest queue among those whose `/object_info`
+lists every model file the graph loads. The pool remembers which backend
+took each prompt, so waits, `/history` lookups and `/view` downloads go to
+the server that actually ran it; ImageRefs from a pooled JobResult carry
+their backend URL.
+
+Usage:
+    pool = BackendPool(["http://gpu-a:8188", "http://gpu-b:8188"])
+    result = pool.run(workflow, timeout=300)
+    pool.download(result.first_image(), Path("public/lotus.png"))
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+
+from comfy.catalog import ObjectInfoCatalog
+from comfy.client import (
+    BULK,
+    ComfyClient,
+    ComfyError,
+    ImageRef,
+    JobResult,
+    NORMAL,
+)
+from comfy.scheduler import MODEL_LOADERS
+
+# Seconds a health check result is trusted before `/system_stats` is asked again
+DEFAULT_HEALTH_TTL = 30.0
+
+
+class BackendPool:
+    """ComfyClient-compatible front for several backends sharing one run ID."""
+
+    def __init__(
+        self,
+        base_urls: Sequence[str],
+        run_id: Optional[str] = None,
+        priority: str = NORMAL,
+        low_water: Optional[int] = None,
+        health_ttl: float = DEFAULT_HEALTH_TTL,
+        **client_options: Any,
+    ):
+        if not base_urls:
+            raise ValueError("BackendPool needs at least one backend URL")
+        first = ComfyClient(base_urls[0], run_id=run_id, priority=priority, low_water=low_water, **client_options)
+        self.backends: List[ComfyClient] = [first] + [
+            ComfyClient(url, run_id=first.run_id, priority=priority, low_water=first.low_water, **client_options)
+            for url in base_urls[1:]
+        ]
+        self.run_id = first.run_id
+        self.poll_interval = first.poll_interval
+        self.health_ttl = health_ttl
+        self._lock = threading.Lock()
+        # Serializes bulk dispatch so concurrent submitters cannot overshoot low_water
+        self._bulk_lock = threading.Lock()
+        self._owners: Dict[str, ComfyClient] = {}
+        self._health: Dict[str, Tuple[bool, float]] = {}
+        # (backend URL, loader class) -> {input name: accepted values}
+        self._choices: Dict[Tuple[str, str], Dict[str, List[Any]]] = {}
+
+    # ------------------------------------------------------------------
+    # Settings shared by every backend
+    # ------------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return ", ".join(backend.base_url for backend in self.backends)
+
+    @property
+    def backend_count(self) -> int:
+        return len(self.backends)
+
+    @property
+    def priority(self) -> str:
+        return self.backends[0].priority
+
+    @priority.setter
+    def priority(self, value: str) -> None:
+        for backend in self.backends:
+            backend.priority = value
+
+    @property
+    def low_water(self) -> int:
+        return self.backends[0].low_water
+
+    @low_water.setter
+    def low_water(self, value: int) -> None:
+        for backend in self.backends:
+            backend.low_water = value
+
+    def close(self) -> None:
+        for backend in self.backends:
+            backend.close()
+
+    def __enter__(self) -> "BackendPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Backend selection
+    # ------------------------------------------------------------------
+
+    def _is_healthy(self, backend: ComfyClient) -> bool:
+        with self._lock:
+            cached = self._health.get(backend.base_url)
+        if cached and time.monotonic() - cached[1] < self.health_ttl:
+            return cached[0]
+        healthy = backend.is_running()
+        with self._lock:
+            self._health[backend.base_url] = (healthy, time.monotonic())
+        return healthy
+
+    def _mark_unhealthy(self, backend: ComfyClient) -> None:
+        with self._lock:
+            self._health[backend.base_url] = (False, time.monotonic())
+
+    def healthy(self) -> List[ComfyClient]:
+        """Backends currently answering `/system_stats`."""
+        return [backend for backend in self.backends if self._is_healthy(backend)]
+
+    def _accepted_values(self, backend: ComfyClient, class_type: str) -> Dict[str, List[Any]]:
+        """Choice lists of a loader's inputs on one backend (empty if it lacks the node)."""
+        key = (backend.base_url, class_type)
+        with self._lock:
+            if key in self._choices:
+                return self._choices[key]
+        try:
+            info = backend.catalog.info().get(class_type) or {}
+        except (requests.RequestException, ValueError, OSError):
+            return {}
+        inputs = {**info.get("input", {}).get("required", {}), **info.get("input", {}).get("optional", {})}
+        choices = {name: spec[0] for name, spec in inputs.items() if spec and isinstance(spec[0], list)}
+        with self._lock:
+            self._choices[key] = choices
+        return choices
+
+    def has_models(self, backend: ComfyClient, workflow: Dict[str, Any]) -> bool:
+        """True if the backend lists every model file the graph's loaders ask for."""
+        for node in workflow.values():
+            class_type = node.get("class_type")
+            if class_type not in MODEL_LOADERS:
+                continue
+            choices = self._accepted_values(backend, class_type)
+            if not choices:
+                return False
+            for name, value in node.get("inputs", {}).items():
+                if name in choices and not isinstance(value, list) and value not in choices[name]:
+                    return False
+        return True
+
+    def _queue_lengths(self, backend: ComfyClient) -> Tuple[int, int]:
+        """(running + pending, pending) on a backend."""
+        queue = backend.queue()
+        pending = len(queue.get("queue_pending", []))
+        return len(queue.get("queue_running", [])) + pending, pending
+
+    def _candidates(self, workflow: Dict[str, Any]) -> List[Tuple[int, int, int, ComfyClient]]:
+        """(queue length, pending, index, backend) of eligible backends, shortest queue first."""
+        healthy = self.healthy()
+        if not healthy:
+            raise ComfyError(f"No ComfyUI backend is reachable ({self.base_url})")
+        eligible = [backend for backend in healthy if self.has_models(backend, workflow)]
+        if not eligible:
+            raise ComfyError(f"No reachable backend has the models this workflow loads ({self.base_url})")
+        candidates = []
+        for index, backend in enumerate(eligible):
+            try:
+                total, pending = self._queue_lengths(backend)
+            except requests.RequestException:
+                self._mark_unhealthy(backend)
+                continue
+            candidates.append((total, pending, index, backend))
+        if not candidates:
+            raise ComfyError(f"No ComfyUI backend is reachable ({self.base_url})")
+        return sorted(candidates, key=lambda candidate: candidate[:3])
+
+    def pick(self, workflow: Dict[str, Any]) -> ComfyClient:
+        """Eligible backend with the shortest queue."""
+        return self._candidates(workflow)[0][3]
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        workflow: Dict[str, Any],
+        extra_data: Optional[Dict[str, Any]] = None,
+        track: bool = True,
+        priority: Optional[str] = None,
+    ) -> str:
+        """Queue a workflow on the least loaded eligible backend and return its prompt_id.
+
+        BULK submissions wait until some eligible backend has fewer than
+        `low_water` prompts pending.
+        """
+        priority = priority or self.priority
+        if priority != BULK:
+            return self._submit_to(self.pick(workflow), workflow, extra_data, track, priority)
+        with self._bulk_lock:
+            while True:
+                candidates = [c for c in self._candidates(workflow) if c[1] < max(c[3].low_water, 1)]
+                if candidates:
+                    return self._submit_to(candidates[0][3], workflow, extra_data, track, priority)
+                time.sleep(self.poll_interval)
+
+    def _submit_to(
+        self,
+        backend: ComfyClient,
+        workflow: Dict[str, Any],
+        extra_data: Optional[Dict[str, Any]],
+        track: bool,
+        priority: str,
+    ) -> str:
+        prompt_id = backend.submit(workflow, extra_data, track=track, priority=priority)
+        with self._lock:
+            self._owners[prompt_id] = backend
+        return prompt_id
+
+    def backend_for(self, prompt_id: str) -> Optional[ComfyClient]:
+        """Backend that took `prompt_id`, looking it up on every server if this pool did not submit it."""
+        with self._lock:
+            backend = self._owners.get(prompt_id)
+        if backend is not None:
+            return backend
+        for candidate in self.healthy():
+            try:
+                queue = candidate.queue()
+                queued = {item[1] for item in queue.get("queue_running", []) + queue.get("queue_pending", [])}
+                if prompt_id in queued or prompt_id in candidate.history(prompt_id):
+                    with self._lock:
+                        self._owners[prompt_id] = candidate
+                    return candidate
+            except requests.RequestException:
+                continue
+        return None
+
+    def wait(self, prompt_id: str, timeout: float = 300, cancel_on_timeout: bool = True) -> JobResult:
+        backend = self.backend_for(prompt_id)
+        if backend is None:
+            raise ComfyError(f"No backend knows prompt {prompt_id}")
+        return backend.wait(prompt_id, timeout, cancel_on_timeout)
+
+    def run(self, workflow: Dict[str, Any], timeout: float = 300) -> JobResult:
+        """Submit a workflow and wait for its result."""
+        return self.wait(self.submit(workflow), timeout)
+
+    # ------------------------------------------------------------------
+    # Server state, merged across backends
+    # ------------------------------------------------------------------
+
+    def is_running(self, timeout: float = 2) -> bool:
+        """True if any backend answers `/system_stats`."""
+        return bool(self.healthy())
+
+    def system_stats(self) -> Dict[str, Any]:
+        """`/system_stats` of every healthy backend, keyed by URL."""
+        return {backend.base_url: backend.system_stats() for backend in self.healthy()}
+
+    def queue(self) -> Dict[str, Any]:
+        """Concatenated `/queue` of every healthy backend."""
+        merged: Dict[str, Any] = {"queue_running": [], "queue_pending": []}
+        for backend in self.healthy():
+            queue = backend.queue()
+            merged["queue_running"] += queue.get("queue_running", [])
+            merged["queue_pending"] += queue.get("queue_pending", [])
+        return merged
+
+    def history(self, prompt_id: Optional[str] = None, max_items: Optional[int] = None) -> Dict[str, Any]:
+        """`/history` of the backend that ran `prompt_id`, or merged history of all backends."""
+        if prompt_id:
+            backend = self.backend_for(prompt_id)
+            return backend.history(prompt_id) if backend is not None else {}
+        merged: Dict[str, Any] = {}
+        for backend in self.healthy():
+            merged.update(backend.history(max_items=max_items))
+        return merged
+
+    def object_info(self, node_class: Optional[str] = None) -> Dict[str, Any]:
+        healthy = self.healthy()
+        if not healthy:
+            raise ComfyError(f"No ComfyUI backend is reachable ({self.base_url})")
+        return healthy[0].object_info(node_class)
+
+    @property
+    def catalog(self) -> ObjectInfoCatalog:
+        """Cached `/object_info` of the first reachable backend."""
+        healthy = self.healthy()
+        if not healthy:
+            raise ComfyError(f"No ComfyUI backend is reachable ({self.base_url})")
+        return healthy[0].catalog
+
+    # ------------------------------------------------------------------
+    # Cancellation
+    # ------------------------------------------------------------------
+
+    def cancel(self, prompt_ids: Iterable[str]) -> List[str]:
+        ids = list(prompt_ids)
+        return [prompt_id for backend in self.healthy() for prompt_id in backend.cancel(ids)]
+
+    def run_prompts(self, run_id: Optional[str] = None) -> List[str]:
+        return [prompt_id for backend in self.healthy() for prompt_id in backend.run_prompts(run_id or self.run_id)]
+
+    def cancel_run(self, run_id: Optional[str] = None) -> List[str]:
+        return [prompt_id for backend in self.healthy() for prompt_id in backend.cancel_run(run_id or self.run_id)]
+
+    # ------------------------------------------------------------------
+    # Inputs and outputs
+    # ------------------------------------------------------------------
+
+    def upload_image(self, path: Path, **options: Any) -> str:
+        """Upload to every reachable backend (each only if it lacks the file), so any can run the job.
+
+        The returned name goes into a LoadImage node that may run on any
+        backend, so every backend must store the file under the same name.
+        """
+        names = {backend.base_url: backend.upload_image(path, **options) for backend in self.healthy()}
+        if not names:
+            raise ComfyError(f"No ComfyUI backend is reachable ({self.base_url})")
+        if len(set(names.values())) > 1:
+            stored = ", ".join(f"{url}: {name}" for url, name in names.items())
+            raise ComfyError(f"Backends stored {path.name} under different names ({stored})")
+        return next(iter(names.values()))
+
+    def _serve(self, image: ImageRef, action: Callable[[ComfyClient], Any]) -> Any:
+        """Run `action` on the backend that produced `image`.
+
+        Images without a backend URL (e.g. built from raw history) are tried
+        on every healthy backend in turn.
+        """
+        owners = [backend for backend in self.backends if backend.base_url == image.base_url]
+        last_error: Optional[Exception] = None
+        for backend in owners or self.healthy():
+            try:
+                return action(backend)
+            except requests.RequestException as e:
+                last_error = e
+        raise ComfyError(f"No backend could serve {image.filename}: {last_error}")
+
+    def fetch(self, image: ImageRef) -> bytes:
+        """Download an image from the backend that produced it."""
+        return self._serve(image, lambda backend: backend.fetch(image))
+
+    def download(self, image: ImageRef, output_path: Path, verify: bool = False) -> Path:
+        """Save an image to `output_path` via the backend that produced it (linked if it is local)."""
+        return self._serve(image, lambda backend: backend.download(image, output_path, verify))
+
+
+def pool_or_client(base_urls: Sequence[str], **options: Any):
+    """A BackendPool for several URLs, a plain ComfyClient for one."""
+    if len(base_urls) > 1:
+        return BackendPool(base_urls, **options)
+    return ComfyClient(base_urls[0] if base_urls else None, **options)
+
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+In-memory post-processing of generated images.
+
+Replaces the download-PNG → re-key → convert round trip of
+process_neural_assets.py, bulk_process_transparency.py, make_transparent.py
+and the manual WebP step. Downloaded bytes flow through a chain of stages
+and are written once, atomically, in the final format:
+
+    alpha   {"op": "alpha", "mode": "luma", "threshold": 10, "gamma": 1.8}
+            Key a black background by luminance (black_to_alpha); "max" uses
+            the brightest channel (bulk_process_transparency); "color" clears
+            pixels within `tolerance` of `color` (make_transparent).
+    trim    {"op": "trim", "padding": 8}
+            Crop to the visible pixels, keeping `padding` px of border.
+    resize  {"op": "resize", "width": 512} / {"op": "resize", "max": 512}
+            Lanczos resize; one missing side keeps the aspect ratio.
+    encode  {"op": "encode", "format": "webp", "quality": 90}
+            Output format and encoder options (lossless, method, ...). Without
+            it the format follows the output file's suffix.
+
+Chains are plain lists of dicts, the same form presets.yml `output:` blocks
+take, so they can be hashed into cache and lockfile keys. `PostProcessor`
+runs chains in a process pool, so CPU work overlaps the next GPU job.
+
+Usage:
+    chain = [{"op": "alpha", "mode": "luma"}, {"op": "encode", "format": "webp", "quality": 90}]
+    get_postprocessor().submit(client.fetch(image), chain, Path("public/orb.webp")).result()
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageChops, ImageColor
+
+Chain = Sequence[Dict[str, Any]]
+
+OPS = ("alpha", "trim", "resize", "encode")
+ALPHA_MODES = ("luma", "max", "color")
+
+# Pillow format names by file suffix, for chains without an encode stage
+_FORMATS = {".png": "PNG", ".webp": "WEBP", ".jpg": "JPEG", ".jpeg": "JPEG"}
+
+
+def validate_chain(chain: Chain) -> None:
+    """Raise ValueError for unknown stages, so bad config fails before any GPU work."""
+    for index, stage in enumerate(chain):
+        op = stage.get("op")
+        if op not in OPS:
+            raise ValueError(f"Post-processing stage {index}: unknown op {op!r}; expected one of {', '.join(OPS)}")
+        if op == "alpha" and stage.get("mode", "luma") not in ALPHA_MODES:
+            raise ValueError(f"Post-processing stage {index}: alpha mode must be one of {', '.join(ALPHA_MODES)}")
+        if op == "encode" and index != len(chain) - 1:
+            raise ValueError("Post-processing: encode must be the last stage")
+
+
+def build_chain(
+    alpha: Optional[str] = None,
+    trim: Optional[int] = None,
+    max_size: Optional[int] = None,
+    format: Optional[str] = None,
+    quality: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Chain from CLI-style options; `alpha` is "luma", "max" or a background color name."""
+    chain: List[Dict[str, Any]] = []
+    if alpha in ("luma", "max"):
+        chain.append({"op": "alpha", "mode": alpha})
+    elif alpha:
+        chain.append({"op": "alpha", "mode": "color", "color": alpha})
+    if trim is not None:
+        chain.append({"op": "trim", "padding": trim})
+    if max_size:
+        chain.append({"op": "resize", "max": max_size})
+    if format:
+        chain.append({"op": "encode", "format": format, **({"quality": quality} if quality is not None else {})})
+    return chain
+
+
+# ----------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------
+
+
+def alpha_key(
+    image: Image.Image,
+    mode: str = "luma",
+    threshold: int = 10,
+    gamma: float = 1.8,
+    color: str = "black",
+    tolerance: int = 30,
+) -> Image.Image:
+    """Derive transparency from a flat background."""
+    image = image.convert("RGBA")
+    r, g, b, a = image.split()
+    if mode == "luma":
+        # Luminance as alpha; hard floor kills background noise, gamma keeps the glow soft
+        curve = [0 if value < threshold else min(255, int((value / 255.0) ** gamma * 255)) for value in range(256)]
+        alpha = Image.merge("RGB", (r, g, b)).convert("L").point(curve)
+    elif mode == "max":
+        alpha = ImageChops.lighter(ImageChops.lighter(r, g), b)
+    else:
+        key = ImageColor.getrgb(color)
+        masks = [
+            channel.point([255 if abs(value - target) <= tolerance else 0 for value in range(256)])
+            for channel, target in zip((r, g, b), key)
+        ]
+        background = ImageChops.darker(ImageChops.darker(masks[0], masks[1]), masks[2])
+        alpha = ImageChops.subtract(a, background)
+    return Image.merge("RGBA", (r, g, b, ImageChops.darker(a, alpha)))
+
+
+def trim(image: Image.Image, padding: int = 0, threshold: int = 0) -> Image.Image:
+    """Crop to pixels with alpha above `threshold` (or unlike the corner pixel if opaque)."""
+    if image.mode == "RGBA" and image.getchannel("A").getextrema()[0] < 255:
+        mask = image.getchannel("A").point([255 if value > threshold else 0 for value in range(256)])
+    else:
+        rgb = image.convert("RGB")
+        background = Image.new("RGB", rgb.size, rgb.getpixel((0, 0)))
+        mask = ImageChops.difference(rgb, background).convert("L").point([255 if value > threshold else 0 for value in range(256)])
+    box = mask.getbbox()
+    if box is None:
+        return image
+    left, top, right, bottom = box
+    return image.crop((
+        max(0, left - padding),
+        max(0, top - padding),
+        min(image.width, right + padding),
+        min(image.height, bottom + padding),
+    ))
+
+
+def resize(
+    image: Image.Image,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    max: Optional[int] = None,
+) -> Image.Image:
+    """Resize to `width`×`height`, or so the longer side is at most `max`."""
+    if max is not None:
+        scale = min(1.0, max / float(image.width if image.width >= image.height else image.height))
+        width, height = round(image.width * scale), round(image.height * scale)
+    elif width and not height:
+        height = round(image.height * width / image.width)
+    elif height and not width:
+        width = round(image.width * height / image.height)
+    if not width or not height or (width, height) == image.size:
+        return image
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode(image: Image.Image, format: str = "png", **options: Any) -> bytes:
+    """Encode to `format`; remaining options go to Pillow's encoder (quality, lossless, method...)."""
+    format = format.upper()
+    if format == "JPG":
+        format = "JPEG"
+    if format == "JPEG" and image.mode == "RGBA":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+def _split_encode(chain: Chain, output_path: Path) -> Tuple[Chain, Dict[str, Any]]:
+    if chain and chain[-1].get("op") == "encode":
+        options = {key: value for key, value in chain[-1].items() if key != "op"}
+        return chain[:-1], options
+    return chain, {"format": _FORMATS.get(Path(output_path).suffix.lower(), "PNG")}
+
+
+def apply(data: bytes, chain: Chain, output_path: Path = Path("out.png")) -> bytes:
+    """Run image bytes through `chain` and return the encoded result."""
+    stages, options = _split_encode(chain, output_path)
+    if not stages and options.get("format", "").upper() == "PNG" and data[:8] == b"\x89PNG\r\n\x1a\n":
+        # Nothing to do: keep ComfyUI's PNG (and its embedded workflow) byte for byte
+        return data
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    for stage in stages:
+        params = {key: value for key, value in stage.items() if key != "op"}
+        if stage["op"] == "alpha":
+            image = alpha_key(image, **params)
+        elif stage["op"] == "trim":
+            image = trim(image, **params)
+        elif stage["op"] == "resize":
+            image = resize(image, **params)
+    return encode(image, **options)
+
+
+def process_to_file(data: bytes, chain: Chain, output_path: Path) -> Path:
+    """Apply `chain` and write the result to `output_path` atomically."""
+    output_path = Path(output_path)
+    result = apply(data, chain, output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(result)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def process_file(input_path: Path, chain: Chain, output_path: Optional[Path] = None) -> Path:
+    """Apply `chain` to an image on disk (in place unless `output_path` is given)."""
+    input_path = Path(input_path)
+    return process_to_file(input_path.read_bytes(), chain, output_path or input_path)
+
+
+# ----------------------------------------------------------------------
+# Worker pool
+# ----------------------------------------------------------------------
+
+
+class PostProcessor:
+    """Process pool for post-processing chains; the pool starts on first use.
+
+    Workers are spawned, never forked. The pool usually starts from a
+    download thread while other threads (HTTP downloads, the WebSocket
+    listener) hold locks, and a child forked at that moment can deadlock on
+    them. Spawn is also the only start method on Windows, so both platforms
+    behave the same.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def start(self) -> None:
+        """Spawn every worker now, e.g. before download threads start submitting.
+
+        Spawned workers start on demand; a no-op per worker launches them all
+        so the first images do not wait for an interpreter start.
+        """
+        pool = self._executor()
+        for _ in range(self.workers):
+            pool.submit(os.getpid)
+
+    def submit(self, data: bytes, chain: Chain, output_path: Path) -> "Future[Path]":
+        """Process image bytes in a worker and write them to `output_path`."""
+        return self._executor().submit(process_to_file, data, list(chain), Path(output_path))
+
+    def map_files(self, paths: Sequence[Path], chain: Chain, output_paths: Optional[Sequence[Path]] = None) -> List[Path]:
+        """Post-process files already on disk in parallel (in place unless `output_paths` are given)."""
+        targets = output_paths or paths
+        futures = [self.submit(Path(path).read_bytes(), chain, target) for path, target in zip(paths, targets)]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self) -> "PostProcessor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_default_processor: Optional[PostProcessor] = None
+_default_lock = threading.Lock()
+
+
+def get_postprocessor() -> PostProcessor:
+    """Process-wide post-processing pool."""
+    global _default_processor
+    with _default_lock:
+        if _default_processor is None:
+            _default_processor = PostProcessor()
+        return _default_processor
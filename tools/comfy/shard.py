@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Deterministic sharding of matrix runs across machines.
+
+`--shard i/N` on the matrix generators keeps only the combinations whose
+key hashes to shard i (1-based) of N. The key is the combination's output
+directory (relative to the matrix root) and prompt, so every seed of a combination lands on the same
+worker, and the split depends only on the matrix itself: workers on
+different machines produce disjoint slices with the same file names they
+would have in a single run.
+
+Each worker writes `shard-<i>of<N>.json` at the root of its outputs,
+listing its slice and a hash of the full matrix. After the worker output
+trees are copied together, `verify` checks that all N manifests describe
+the same matrix, that the slices do not overlap, and that together they
+cover every image, each present on disk with its metadata.
+
+Usage:
+    python tools/avatar_matrix_gen.py --full --shard 1/3     # on box A
+    python tools/avatar_matrix_gen.py --full --shard 2/3     # on box B
+    ...
+    python tools/comfy/shard.py verify AvatarMatrix/Sanskrit_Matrix
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+MANIFEST_PATTERN = re.compile(r"^shard-(\d+)of(\d+)\.json$")
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Slice `index` (1-based) of `count`."""
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 1 <= self.index <= self.count:
+            raise ValueError(f"Invalid shard {self.index}/{self.count}; expected 1 <= i <= N")
+
+    @classmethod
+    def parse(cls, text: str) -> "Shard":
+        """Parse `i/N`, e.g. `2/4`."""
+        try:
+            index, count = (int(part) for part in text.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard {text!r}; expected i/N, e.g. 2/4") from None
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def owns(self, key: str) -> bool:
+        return shard_index(key, self.count) == self.index
+
+    @property
+    def manifest_name(self) -> str:
+        return f"shard-{self.index}of{self.count}.json"
+
+
+def shard_index(key: str, count: int) -> int:
+    """Shard (1-based) a combination key hashes to."""
+    return int(_digest(key)[:16], 16) % count + 1
+
+
+def relative_name(path: Path, root: Path) -> str:
+    """`path` relative to `root` in POSIX form, so keys match across machines."""
+    try:
+        return Path(path).resolve().relative_to(Path(root).resolve()).as_posix()
+    except ValueError:
+        return Path(path).as_posix()
+
+
+def matrix_root(output_paths: Sequence[Path]) -> Path:
+    """Deepest directory containing every output of a matrix; keys and manifests are relative to it."""
+    return Path(os.path.commonpath([str(Path(path).resolve().parent) for path in output_paths]))
+
+
+def combination_key(output_path: Path, prompt: str, root: Path) -> str:
+    """Shard key of a matrix cell: its output directory plus its prompt."""
+    return f"{relative_name(Path(output_path).parent, root)}\n{prompt}"
+
+
+def matrix_hash(output_paths: Sequence[Path], root: Path) -> str:
+    """Hash of the full set of outputs a matrix run produces."""
+    return _digest("\n".join(sorted(relative_name(path, root) for path in output_paths)))
+
+
+def write_manifest(shard: Shard, all_paths: Sequence[Path], own_paths: Sequence[Path]) -> Path:
+    """Record this worker's slice at the common root of the matrix outputs."""
+    root = matrix_root(all_paths)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "shard": str(shard),
+        "matrix": matrix_hash(all_paths, root),
+        "total": len(all_paths),
+        "outputs": sorted(relative_name(path, root) for path in own_paths),
+    }
+    manifest_path = root / shard.manifest_name
+    manifest_path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest_path
+
+
+def verify(root: Path) -> List[str]:
+    """Problems with the merged shard outputs under `root` (empty if complete)."""
+    groups: Dict[Path, List[Path]] = defaultdict(list)
+    for manifest_path in sorted(Path(root).rglob("shard-*of*.json")):
+        if MANIFEST_PATTERN.match(manifest_path.name):
+            groups[manifest_path.parent].append(manifest_path)
+    if not groups:
+        return [f"No shard manifests under {root}"]
+
+    problems = []
+    for directory, manifest_paths in sorted(groups.items()):
+        manifests = [json.loads(path.read_text(encoding="utf-8")) for path in manifest_paths]
+        counts = {Shard.parse(manifest["shard"]).count for manifest in manifests}
+        matrices = {manifest["matrix"] for manifest in manifests}
+        if len(counts) > 1 or len(matrices) > 1:
+            problems.append(f"{directory}: manifests come from different matrices or shard counts")
+            continue
+        count = counts.pop()
+        present = {Shard.parse(manifest["shard"]).index for manifest in manifests}
+        for index in sorted(set(range(1, count + 1)) - present):
+            problems.append(f"{directory}: missing manifest for shard {index}/{count}")
+
+        owners: Dict[str, str] = {}
+        for manifest in manifests:
+            for name in manifest["outputs"]:
+                if name in owners:
+                    problems.append(f"{directory}: {name} produced by shards {owners[name]} and {manifest['shard']}")
+                owners[name] = manifest["shard"]
+        total = manifests[0]["total"]
+        if len(owners) != total:
+            problems.append(f"{directory}: slices cover {len(owners)} of {total} images")
+        elif matrix_hash([directory / name for name in owners], directory) != manifests[0]["matrix"]:
+            problems.append(f"{directory}: slices do not add up to the recorded matrix")
+
+        for name, shard in sorted(owners.items()):
+            output_path = directory / name
+            if not output_path.is_file():
+                problems.append(f"{directory}: {name} (shard {shard}) is missing")
+            elif not output_path.with_suffix(".json").is_file():
+                problems.append(f"{directory}: {name} (shard {shard}) has no metadata")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check merged sharded matrix outputs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("verify", help="Verify the union of shard outputs is complete")
+    check.add_argument("root", type=Path, help="Directory the shard output trees were merged into")
+    args = parser.parse_args()
+
+    problems = verify(args.root)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        print(f"\n{len(problems)} problem(s) found")
+        return 1
+    print(f"✅ All shards under {args.root} are complete and disjoint")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,15 +4,15 @@ Simple ComfyUI asset generator for Sakshi scenes.
 Builds workflow directly (no conversion needed).
 """
 
-import json
-import time
 import sys
 from pathlib import Path
-import requests
 from PIL import Image
 import io
 
-COMFY_URL = "http://127.0.0.1:8188"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from comfy.client import get_client
+
 OUTPUT_DIR = Path("public/scenes/sakshi")
 
 # Scene prompts
@@ -30,13 +30,12 @@ NEGATIVE = "text, watermark, people, faces, animals, cinematic lighting, dramati
 
 def test_connection():
     """Test ComfyUI is accessible."""
-    try:
-        r = requests.get(f"{COMFY_URL}/system_stats", timeout=5)
-        print(f"✅ ComfyUI connected: {r.status_code}")
+    client = get_client()
+    if client.is_running(timeout=5):
+        print(f"✅ ComfyUI connected: {client.base_url}")
         return True
-    except Exception as e:
-        print(f"❌ ComfyUI not accessible: {e}")
-        return False
+    print(f"❌ ComfyUI not accessible at {client.base_url}")
+    return False
 
 
 def build_workflow(prompt_pos: str, prompt_neg: str, seed: int) -> dict:
@@ -107,58 +106,6 @@ def build_workflow(prompt_pos: str, prompt_neg: str, seed: int) -> dict:
     }
 
 
-def submit_workflow(workflow: dict) -> str:
-    """Submit workflow to ComfyUI and return prompt_id."""
-    r = requests.post(
-        f"{COMFY_URL}/prompt",
-        json={"prompt": workflow},
-        timeout=30
-    )
-
-    if r.status_code != 200:
-        print(f"ERROR: {r.status_code}")
-        print(f"Response: {r.text}")
-        raise RuntimeError(f"ComfyUI rejected workflow: {r.text}")
-
-    data = r.json()
-    prompt_id = data.get("prompt_id")
-    if not prompt_id:
-        raise RuntimeError(f"No prompt_id in response: {data}")
-
-    return prompt_id
-
-
-def poll_completion(prompt_id: str, timeout_sec: int = 300) -> dict:
-    """Poll history until job completes."""
-    start = time.time()
-
-    while time.time() - start < timeout_sec:
-        r = requests.get(f"{COMFY_URL}/history/{prompt_id}", timeout=10)
-        data = r.json()
-
-        if prompt_id in data and data[prompt_id].get("outputs"):
-            return data[prompt_id]
-
-        time.sleep(2)
-
-    raise TimeoutError(f"Job {prompt_id} timed out after {timeout_sec}s")
-
-
-def download_image(filename: str, subfolder: str = "") -> bytes:
-    """Download image from ComfyUI."""
-    r = requests.get(
-        f"{COMFY_URL}/view",
-        params={
-            "filename": filename,
-            "subfolder": subfolder,
-            "type": "output"
-        },
-        timeout=30
-    )
-    r.raise_for_status()
-    return r.content
-
-
 def save_webp(image_bytes: bytes, out_path: Path):
     """Convert to WEBP and save."""
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -177,31 +124,22 @@ def generate_layer(scene: str, layer: str, prompt_core: str, seed: int = 8888):
 
     # Build and submit
     workflow = build_workflow(prompt_pos, NEGATIVE, seed)
+    client = get_client()
     print("📤 Submitting to ComfyUI...")
-    prompt_id = submit_workflow(workflow)
+    prompt_id = client.submit(workflow)
     print(f"   ID: {prompt_id}")
 
-    # Poll for completion
+    # Wait for completion
     print("⏳ Waiting for generation...")
-    history = poll_completion(prompt_id)
+    result = client.wait(prompt_id, timeout=300)
 
     # Extract and download image
-    outputs = history.get("outputs", {})
-    for out_key, out_data in outputs.items():
-        images = out_data.get("images", [])
-        if images:
-            image = images[0]
-            filename = image["filename"]
-            subfolder = image.get("subfolder", "")
-
-            print(f"📥 Downloading image...")
-            img_bytes = download_image(filename, subfolder)
-
-            out_path = OUTPUT_DIR / scene / f"{layer}.webp"
-            save_webp(img_bytes, out_path)
-            return
-
-    raise RuntimeError("No image in ComfyUI output")
+    image = result.first_image()
+    print(f"📥 Downloading image...")
+    img_bytes = client.fetch(image)
+
+    out_path = OUTPUT_DIR / scene / f"{layer}.webp"
+    save_webp(img_bytes, out_path)
 
 
 def main():
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Compilation of UI-format workflows (File → Save) to the API format.
+
+`/prompt` only accepts the API format: `{node_id: {"class_type", "inputs"}}`.
+Workflows saved from the ComfyUI canvas instead hold a `nodes` list whose
+widget values are positional (`widgets_values`) and whose connections live
+in a separate `links` list. `compile_workflow` converts one:
+
+    - links are indexed by id once, instead of scanned per input
+    - `widgets_values` are mapped to input names in `/object_info` order,
+      skipping the frontend's extra "control after generate" and upload values
+    - frontend-only nodes are resolved: Reroute and bypassed nodes pass their
+      input through, PrimitiveNode values are inlined, notes and muted nodes
+      are dropped
+    - nodes that cannot reach an output node are pruned
+
+`load_workflow` reads a workflow file of either format. Compiled graphs are
+stored in `.comfy-cache/workflows/` keyed by the file's path, mtime and size,
+so only the first load after an edit needs `/object_info` and the compiler.
+
+Usage:
+    from comfy.workflow import load_workflow
+
+    workflow = load_workflow("tools/comfyui_workflow.json")
+    workflow["6"]["inputs"]["text"] = "lotus at dawn"
+    get_client().run(workflow)
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_COMPILED_DIR = PROJECT_ROOT / ".comfy-cache" / "workflows"
+
+# Canvas-only nodes with no server-side class
+NOTE_NODES = ("Note", "MarkdownNote")
+# LiteGraph node modes: 2 = muted (never), 4 = bypassed
+MODE_MUTED = 2
+MODE_BYPASS = 4
+
+# Values the frontend stores after a seed widget's own value
+CONTROL_VALUES = ("fixed", "increment", "decrement", "randomize")
+WIDGET_TYPES = ("INT", "FLOAT", "STRING", "BOOLEAN", "COMBO")
+
+
+def is_ui_format(data: Dict[str, Any]) -> bool:
+    return isinstance(data.get("nodes"), list)
+
+
+def _input_names(node_info: Dict[str, Any]) -> List[str]:
+    inputs = node_info.get("input", {})
+    order = node_info.get("input_order", {})
+    names: List[str] = []
+    for section in ("required", "optional"):
+        names.extend(order.get(section) or list(inputs.get(section, {})))
+    return names
+
+
+def widget_names(node_info: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Widget inputs of a node class, in the order the canvas stores their values."""
+    inputs = node_info.get("input", {})
+    widgets = []
+    for name in _input_names(node_info):
+        spec = inputs.get("required", {}).get(name) or inputs.get("optional", {}).get(name)
+        if not spec:
+            continue
+        options = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+        if isinstance(spec[0], list) or spec[0] in WIDGET_TYPES:
+            widgets.append((name, options))
+    return widgets
+
+
+def map_widgets(node_info: Dict[str, Any], values: Any) -> Dict[str, Any]:
+    """Name positional `widgets_values` after the class's widget inputs."""
+    if isinstance(values, dict):
+        # Some custom nodes already save their widgets by name
+        return dict(values)
+    mapped: Dict[str, Any] = {}
+    position = 0
+    for name, options in widget_names(node_info):
+        if position >= len(values):
+            break
+        mapped[name] = values[position]
+        position += 1
+        following = values[position] if position < len(values) else None
+        if (options.get("control_after_generate") or name in ("seed", "noise_seed")) and following in CONTROL_VALUES:
+            position += 1
+        elif options.get("image_upload") and following == "image":
+            position += 1
+    return mapped
+
+
+class _Compiler:
+    def __init__(self, ui_workflow: Dict[str, Any], info: Dict[str, Any]):
+        self.info = info
+        self.nodes = {str(node["id"]): node for node in ui_workflow["nodes"]}
+        # link id -> (source node id, source slot)
+        self.links = {link[0]: (str(link[1]), link[2]) for link in ui_workflow.get("links", [])}
+
+    def source(self, link_id: Any, seen: Tuple[str, ...] = ()) -> Optional[Any]:
+        """Real source of a link as `[node_id, slot]`, an inlined value, or None if unconnected."""
+        if link_id not in self.links:
+            return None
+        node_id, slot = self.links[link_id]
+        node = self.nodes.get(node_id)
+        if node is None or node_id in seen:
+            return None
+        seen = seen + (node_id,)
+        if node.get("type") == "PrimitiveNode":
+            return {"value": (node.get("widgets_values") or [None])[0]}
+        if node.get("type") == "Reroute":
+            return self.source((node.get("inputs") or [{}])[0].get("link"), seen)
+        if node.get("mode") == MODE_BYPASS:
+            # Bypassed nodes forward the first input whose type matches the output
+            outputs = node.get("outputs") or []
+            wanted = outputs[slot].get("type") if slot < len(outputs) else None
+            for item in node.get("inputs", []):
+                if item.get("type") == wanted and item.get("link") is not None:
+                    return self.source(item["link"], seen)
+            return None
+        if node.get("mode") == MODE_MUTED:
+            return None
+        return [node_id, slot]
+
+    def compile(self) -> Dict[str, Any]:
+        graph: Dict[str, Any] = {}
+        for node_id, node in self.nodes.items():
+            class_type = node.get("type")
+            if class_type in NOTE_NODES + ("PrimitiveNode", "Reroute") or node.get("mode") in (MODE_MUTED, MODE_BYPASS):
+                continue
+            node_info = self.info.get(class_type)
+            if node_info is None:
+                raise ValueError(f"Node {node_id}: the server has no node type {class_type!r}")
+            inputs = map_widgets(node_info, node.get("widgets_values") or [])
+            for item in node.get("inputs", []):
+                if item.get("link") is None:
+                    continue
+                source = self.source(item["link"])
+                if isinstance(source, dict):
+                    inputs[item["name"]] = source["value"]
+                elif source is not None:
+                    inputs[item["name"]] = source
+            graph[node_id] = {"class_type": class_type, "inputs": inputs}
+        return prune(graph, self.info)
+
+
+def prune(graph: Dict[str, Any], info: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop nodes that no output node depends on."""
+    pending = [node_id for node_id, node in graph.items() if info.get(node["class_type"], {}).get("output_node")]
+    reachable = set()
+    while pending:
+        node_id = pending.pop()
+        if node_id in reachable or node_id not in graph:
+            continue
+        reachable.add(node_id)
+        for value in graph[node_id]["inputs"].values():
+            if isinstance(value, list) and len(value) == 2 and isinstance(value[1], int):
+                pending.append(str(value[0]))
+    return {node_id: node for node_id, node in graph.items() if node_id in reachable}
+
+
+def compile_workflow(ui_workflow: Dict[str, Any], info: Dict[str, Any]) -> Dict[str, Any]:
+    """API-format graph of a UI-format workflow; `info` is the server's `/object_info`."""
+    return _Compiler(ui_workflow, info).compile()
+
+
+# ----------------------------------------------------------------------
+# Cached loading
+# ----------------------------------------------------------------------
+
+_compiled: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+_compiled_lock = threading.Lock()
+
+
+def _stamp(path: Path) -> Tuple[str, int, int]:
+    stat = path.stat()
+    return str(path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+def load_workflow(
+    path: Path,
+    info: Optional[Dict[str, Any]] = None,
+    cache_dir: Optional[Path] = DEFAULT_COMPILED_DIR,
+) -> Dict[str, Any]:
+    """API-format graph of a workflow file, compiling UI-format files once per edit.
+
+    `info` defaults to the shared client's cached `/object_info` and is only
+    needed when the file has changed since it was last compiled. Returns a
+    fresh copy the caller may modify.
+    """
+    path = Path(path)
+    stamp = _stamp(path)
+    with _compiled_lock:
+        graph = _compiled.get(stamp)
+    if graph is None:
+        stored = None
+        if cache_dir is not None:
+            stored = Path(cache_dir) / f"{hashlib.sha256(repr(stamp).encode('utf-8')).hexdigest()[:16]}.json"
+            try:
+                graph = json.loads(stored.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                graph = None
+        if graph is None:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if is_ui_format(data):
+                if info is None:
+                    from comfy.client import get_client
+
+                    info = get_client().catalog.info()
+                graph = compile_workflow(data, info)
+            else:
+                graph = data
+            if stored is not None:
+                stored.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = stored.with_name(f".{stored.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(json.dumps(graph), encoding="utf-8")
+                os.replace(tmp_path, stored)
+        with _compiled_lock:
+            _compiled[stamp] = graph
+    return copy.deepcopy(graph)
@@ -9,156 +9,94 @@ Usage:
     python tools/comfy_gen.py "mystical golden lotus on cream background" --output public/lotus.png
     python tools/comfy_gen.py "swirling clouds" --width 512 --height 512 --steps 4
     python tools/comfy_gen.py "sacred geometry" --negative "text, watermark" --prefix "sacred_geo"
+    python tools/comfy_gen.py "glowing orb on black" --alpha luma --trim 8 --format webp -o public/orb.webp
+
+Single generations are interactive by default: they are inserted at the front
+of ComfyUI's queue, ahead of any bulk matrix run (see --priority).
+--alpha/--trim/--max-size/--format post-process the downloaded bytes in
+memory (comfy.postprocess), so no separate keying or WebP step is needed.
+--no-download records the job (output path and post chain) in the job
+ledger and exits; `python tools/comfy/comfyctl.py collect` saves it later.
 """
 
 import json
-import urllib.request
-import urllib.parse
 import argparse
 import time
-import uuid
 import sys
 from pathlib import Path
 
+from comfy.batch import DEFAULT_CKPT, DEFAULT_NEGATIVE, OUTPUT_NODE, Txt2ImgJob
+from comfy.client import INTERACTIVE, PRIORITIES, ComfyError, get_client, require_running
+from comfy.completion import ComfyExecutionError
+from comfy.ledger import get_ledger
+from comfy.postprocess import build_chain, process_to_file, validate_chain
+
 # Configuration
-COMFYUI_URL = "http://127.0.0.1:8188"
 PROJECT_ROOT = Path(__file__).parent.parent  # d:\Unity Apps\immanence-os
-DEFAULT_CKPT = "z-image-turbo-fp8-aio.safetensors"
-DEFAULT_NEGATIVE = "text, letters, watermark, blurry, low quality, photorealistic, harsh edges"
 
 
-def check_comfyui():
-    """Check if ComfyUI is running."""
-    try:
-        with urllib.request.urlopen(f"{COMFYUI_URL}/system_stats", timeout=2) as response:
-            return True
-    except Exception:
-        return False
+def queue_prompt(positive_prompt, negative_prompt, width, height, steps, cfg, sampler, scheduler, ckpt, prefix,
+                 priority=INTERACTIVE, record_to=None, post=None):
+    """Queue a generation request to ComfyUI.
 
+    With `record_to`, the submission is recorded in the job ledger so
+    `comfyctl.py collect` can save the image there (through `post`) later.
+    """
+    workflow = Txt2ImgJob(
+        prompt=positive_prompt,
+        output_path=Path(),
+        negative=negative_prompt,
+        width=width,
+        height=height,
+        steps=steps,
+        cfg=cfg,
+        sampler=sampler,
+        scheduler=scheduler,
+        ckpt=ckpt,
+        prefix=prefix,
+    ).workflow()
 
-def queue_prompt(positive_prompt, negative_prompt, width, height, steps, cfg, sampler, scheduler, ckpt, prefix):
-    """Queue a generation request to ComfyUI."""
-    workflow = {
-        "4": {
-            "class_type": "CheckpointLoaderSimple",
-            "inputs": {"ckpt_name": ckpt}
-        },
-        "6": {
-            "class_type": "CLIPTextEncode",
-            "inputs": {"text": positive_prompt, "clip": ["4", 1]}
-        },
-        "7": {
-            "class_type": "CLIPTextEncode",
-            "inputs": {"text": negative_prompt, "clip": ["4", 1]}
-        },
-        "5": {
-            "class_type": "EmptyLatentImage",
-            "inputs": {"width": width, "height": height, "batch_size": 1}
-        },
-        "3": {
-            "class_type": "KSampler",
-            "inputs": {
-                "seed": int(uuid.uuid4().int % (2**32)),
-                "steps": steps,
-                "cfg": cfg,
-                "sampler_name": sampler,
-                "scheduler": scheduler,
-                "denoise": 1,
-                "model": ["4", 0],
-                "positive": ["6", 0],
-                "negative": ["7", 0],
-                "latent_image": ["5", 0]
-            }
-        },
-        "8": {
-            "class_type": "VAEDecode",
-            "inputs": {"samples": ["3", 0], "vae": ["4", 2]}
-        },
-        "9": {
-            "class_type": "SaveImage",
-            "inputs": {"filename_prefix": prefix, "images": ["8", 0]}
-        }
-    }
-
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
-    
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result.get('prompt_id')
-    except Exception as e:
+        prompt_id = get_client().submit(workflow, priority=priority)
+    except ComfyError as e:
         print(f"❌ Error queuing prompt: {e}", file=sys.stderr)
         return None
+    if record_to is not None:
+        get_ledger().submitted(Path(record_to).name, [record_to], workflow, prompt_id, OUTPUT_NODE, post=post)
+    return prompt_id
 
 
-def poll_and_download(prompt_id, output_path, timeout=300):
-    """Poll ComfyUI for completion and download the result."""
-    print(f"⏳ Polling for completion (ID: {prompt_id})...")
-    start_time = time.time()
-    last_status = None
-    
-    while time.time() - start_time < timeout:
-        # Check queue status
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/queue", timeout=5) as response:
-                queue_data = json.loads(response.read())
-                
-                # Check if running
-                if any(item[1] == prompt_id for item in queue_data.get('queue_running', [])):
-                    if last_status != "running":
-                        print("🔥 Generation in progress...")
-                        last_status = "running"
-                # Check if pending
-                elif any(item[1] == prompt_id for item in queue_data.get('queue_pending', [])):
-                    if last_status != "pending":
-                        print("⏸️  In queue, waiting...")
-                        last_status = "pending"
-        except Exception as e:
-            print(f"⚠️  Queue check failed: {e}", file=sys.stderr)
-        
-        # Check history for completion
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/history/{prompt_id}", timeout=5) as response:
-                history = json.loads(response.read())
-                
-                if prompt_id in history:
-                    outputs = history[prompt_id].get('outputs', {})
-                    if outputs and '9' in outputs:
-                        # Success! Download the image
-                        images = outputs['9'].get('images', [])
-                        if images:
-                            img_info = images[0]
-                            filename = urllib.parse.quote(img_info['filename'])
-                            subfolder = urllib.parse.quote(img_info.get('subfolder', ''))
-                            img_type = urllib.parse.quote(img_info.get('type', 'output'))
-                            
-                            img_url = f"{COMFYUI_URL}/view?filename={filename}&subfolder={subfolder}&type={img_type}"
-                            
-                            print(f"📥 Downloading result...")
-                            with urllib.request.urlopen(img_url, timeout=30) as img_response:
-                                output_path.parent.mkdir(parents=True, exist_ok=True)
-                                with open(output_path, 'wb') as f:
-                                    f.write(img_response.read())
-                            
-                            print(f"✅ Success! Saved to: {output_path}")
-                            return True
-                    
-                    # Check for errors
-                    status = history[prompt_id].get('status', {})
-                    if status.get('completed') and not outputs:
-                        print(f"❌ Generation completed but produced no output", file=sys.stderr)
-                        print(f"   Status: {json.dumps(status)}", file=sys.stderr)
-                        return False
-        except Exception as e:
-            # History endpoint may not exist yet, continue polling
-            pass
-        
-        time.sleep(2)
-    
-    print(f"⏰ Timeout after {timeout}s", file=sys.stderr)
-    return False
+def poll_and_download(prompt_id, output_path, timeout=300, post=None):
+    """Wait for completion via the shared client and download the result.
+
+    `post` is a comfy.postprocess chain applied before the file is written.
+    """
+    print(f"⏳ Waiting for completion (ID: {prompt_id})...")
+
+    client = get_client()
+    try:
+        result = client.wait(prompt_id, timeout)
+    except TimeoutError:
+        print(f"⏰ Timeout after {timeout}s", file=sys.stderr)
+        return False
+    except ComfyExecutionError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return False
+
+    images = result.images(OUTPUT_NODE)
+    if not images:
+        print(f"❌ Generation completed but produced no output", file=sys.stderr)
+        print(f"   Status: {json.dumps(result.status)}", file=sys.stderr)
+        return False
+
+    print(f"📥 Downloading result...")
+    if post:
+        process_to_file(client.fetch(images[0]), post, output_path)
+    else:
+        client.download(images[0], output_path, verify=True)
+
+    print(f"✅ Success! Saved to: {output_path}")
+    return True
 
 
 def main():
@@ -186,15 +124,22 @@ Examples:
     parser.add_argument('--prefix', '-p', default='ComfyUI', help='Filename prefix for ComfyUI output')
     parser.add_argument('--timeout', '-t', type=int, default=300, help='Timeout in seconds (default: 300)')
     parser.add_argument('--no-download', action='store_true', help='Queue only, do not wait for completion')
+    parser.add_argument('--priority', choices=PRIORITIES, default=INTERACTIVE,
+                        help='Queue lane: interactive jumps ahead of queued batch work (default: interactive)')
+    parser.add_argument('--alpha', metavar='MODE',
+                        help='Key the background to transparency: luma, max, or a background color (e.g. white)')
+    parser.add_argument('--trim', type=int, metavar='PAD', help='Crop to the visible pixels with PAD px of border')
+    parser.add_argument('--max-size', type=int, help='Scale down so the longer side is at most this many px')
+    parser.add_argument('--format', choices=['png', 'webp', 'jpeg'], help='Output encoding (default: from --output suffix)')
+    parser.add_argument('--quality', type=int, help='Encoder quality for webp/jpeg')
     
     args = parser.parse_args()
+    post = build_chain(args.alpha, args.trim, args.max_size, args.format, args.quality)
+    validate_chain(post)
     
     # Check ComfyUI status
     print("🔍 Checking ComfyUI status...")
-    if not check_comfyui():
-        print("❌ ComfyUI is not running at http://127.0.0.1:8188", file=sys.stderr)
-        print("   Please start ComfyUI and try again.", file=sys.stderr)
-        sys.exit(1)
+    require_running()
     
     print("✅ ComfyUI is running")
     
@@ -204,7 +149,8 @@ Examples:
     else:
         # Generate a default filename in public/generated/
         timestamp = int(time.time())
-        output_path = PROJECT_ROOT / "public" / "generated" / f"{args.prefix}_{timestamp}.png"
+        suffix = ".jpg" if args.format == "jpeg" else f".{args.format or 'png'}"
+        output_path = PROJECT_ROOT / "public" / "generated" / f"{args.prefix}_{timestamp}{suffix}"
     
     # Queue the prompt
     print("\n📤 Queuing generation...")
@@ -223,7 +169,10 @@ Examples:
         sampler=args.sampler,
         scheduler=args.scheduler,
         ckpt=args.ckpt,
-        prefix=args.prefix
+        prefix=args.prefix,
+        priority=args.priority,
+        record_to=output_path if args.no_download else None,
+        post=post,
     )
     
     if not prompt_id:
@@ -235,11 +184,12 @@ Examples:
     # Download result (unless --no-download)
     if args.no_download:
         print("\n🚀 Fire-and-forget mode enabled. Exiting without waiting.")
-        print(f"   Check ComfyUI output folder for result with prefix: {args.prefix}")
+        print(f"   Collect it into {output_path.relative_to(PROJECT_ROOT)} later with:")
+        print("   python tools/comfy/comfyctl.py collect")
         sys.exit(0)
     
     print()
-    success = poll_and_download(prompt_id, output_path, args.timeout)
+    success = poll_and_download(prompt_id, output_path, args.timeout, post)
     
     if success:
         sys.exit(0)
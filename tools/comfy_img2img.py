@@ -2,57 +2,40 @@
 """
 ComfyUI img2img Generator for Photic UI Wallpapers
 Uses low denoise to refine base plates without hallucinating geometry.
+
+Sweep mode (--sweep-denoise / --sweep-cfg / --seeds) encodes the plate
+latent once, renders a denoise x cfg x seed grid (seeds --seed, --seed+1,
+...; the same seeds in every cell, so cells compare like for like), and
+writes a labeled contact sheet to --output:
+
+    python tools/comfy_img2img.py public/bg/plate.png -o sweeps/plate.png -p "..." \
+        --sweep-denoise 0.5,0.55,0.6,0.65 --sweep-cfg 6.5,7,7.5,8 --seeds 2
 """
 
+import hashlib
+import io
 import json
-import urllib.request
-import urllib.parse
 import argparse
-import time
+import os
 import uuid
 import sys
-import shutil
 from pathlib import Path
 
-COMFYUI_URL = "http://127.0.0.1:8188"
-PROJECT_ROOT = Path(__file__).parent.parent
+import requests
+from PIL import Image, ImageDraw
 
-def check_comfyui():
-    """Check if ComfyUI is running."""
-    try:
-        with urllib.request.urlopen(f"{COMFYUI_URL}/system_stats", timeout=2) as response:
-            return True
-    except Exception:
-        return False
+from comfy.client import ComfyError, ImageRef, get_client, require_running
+from comfy.completion import ComfyExecutionError
 
-def copy_to_comfyui_input(base_plate_path):
-    """Copy base plate to ComfyUI's input folder with unique timestamped filename."""
-    # Try common ComfyUI paths
-    possible_paths = [
-        Path("D:/AI/ComfyUI/input"),
-        Path("C:/ComfyUI/input"),
-        Path.home() / "ComfyUI" / "input",
-    ]
-    
-    # Generate unique filename with timestamp
-    timestamp = int(time.time() * 1000)  # milliseconds for uniqueness
-    unique_filename = f"{base_plate_path.stem}_{timestamp}{base_plate_path.suffix}"
-    
-    for comfy_input in possible_paths:
-        if comfy_input.exists():
-            dest = comfy_input / unique_filename
-            shutil.copy2(base_plate_path, dest)
-            
-            # Verify copy
-            if dest.exists() and dest.stat().st_size > 0:
-                print(f"📋 Copied base plate to: {dest}")
-                print(f"   File size: {dest.stat().st_size} bytes")
-                return unique_filename
-            else:
-                print(f"⚠️  Copy verification failed for {dest}")
-    
-    print("⚠️  Could not find ComfyUI input folder, using direct filename reference")
-    return base_plate_path.name
+PROJECT_ROOT = Path(__file__).parent.parent
+# Encoded plate latents by backend and plate key, as SaveLatent named them
+LATENT_INDEX = PROJECT_ROOT / ".comfy-cache" / "plate_latents.json"
+
+def upload_base_plate(base_plate_path):
+    """Upload the base plate to ComfyUI (skipped if the server already has this exact file)."""
+    name = get_client().upload_image(base_plate_path)
+    print(f"📋 Base plate available to ComfyUI as: {name}")
+    return name
 
 def queue_prompt(base_plate_path, base_plate_filename, positive_prompt, negative_prompt, denoise, cfg, sampler, scheduler, ckpt, steps, verify=False):
     """Queue an img2img generation request."""
@@ -107,131 +90,235 @@ def queue_prompt(base_plate_path, base_plate_filename, positive_prompt, negative
         print("\n📋 WORKFLOW BEING SENT:")
         print(json.dumps(workflow, indent=2))
     
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
-    
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            prompt_id = result.get('prompt_id')
-            
-            if verify:
-                print(f"\n✅ POST /prompt response: {json.dumps(result, indent=2)}")
-            
-            return prompt_id
-    except Exception as e:
+        prompt_id = get_client().submit(workflow)
+        
+        if verify:
+            print(f"\n✅ POST /prompt accepted: prompt_id={prompt_id}")
+        
+        return prompt_id
+    except ComfyError as e:
         print(f"❌ Error queuing prompt: {e}", file=sys.stderr)
         return None
 
 def poll_and_download(prompt_id, output_path, timeout=300, verify=False):
-    """Poll ComfyUI for completion and download the result."""
-    print(f"⏳ Polling for completion (ID: {prompt_id})...")
-    start_time = time.time()
-    last_status = None
-    
-    while time.time() - start_time < timeout:
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/queue", timeout=5) as response:
-                queue_data = json.loads(response.read())
-                
-                if any(item[1] == prompt_id for item in queue_data.get('queue_running', [])):
-                    if last_status != "running":
-                        print("🔥 Generation in progress...")
-                        last_status = "running"
-                elif any(item[1] == prompt_id for item in queue_data.get('queue_pending', [])):
-                    if last_status != "pending":
-                        print("⏸️  In queue, waiting...")
-                        last_status = "pending"
-        except Exception as e:
-            pass
-        
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/history/{prompt_id}", timeout=5) as response:
-                history = json.loads(response.read())
-                
-                if prompt_id in history:
-                    hist_entry = history[prompt_id]
-                    
-                    if verify:
-                        print("\n🔍 GROUND TRUTH - What ComfyUI Actually Executed:")
-                        print("=" * 80)
-                        
-                        # Show prompt that was executed (index 2 of the prompt array)
-                        prompt_array = hist_entry.get('prompt', [])
-                        prompt_data = prompt_array[2] if len(prompt_array) > 2 else {}
-                        
-                        # Check LoadImage
-                        if '5' in prompt_data:
-                            load_img_node = prompt_data['5']
-                            print(f"\n📸 LoadImage (Node 5):")
-                            print(f"   Filename: {load_img_node.get('inputs', {}).get('image', 'N/A')}")
-                        
-                        # Check Checkpoint
-                        if '4' in prompt_data:
-                            ckpt_node = prompt_data['4']
-                            print(f"\n🎯 Checkpoint (Node 4):")
-                            print(f"   Model: {ckpt_node.get('inputs', {}).get('ckpt_name', 'N/A')}")
-                        
-                        # Check positive prompt
-                        if '6' in prompt_data:
-                            pos_node = prompt_data['6']
-                            pos_text = pos_node.get('inputs', {}).get('text', '')
-                            print(f"\n✅ Positive CLIP (Node 6):")
-                            print(f"   Text: {pos_text[:200]}{'...' if len(pos_text) > 200 else ''}")
-                        
-                        # Check negative prompt
-                        if '7' in prompt_data:
-                            neg_node = prompt_data['7']
-                            neg_text = neg_node.get('inputs', {}).get('text', '')
-                            print(f"\n🚫 Negative CLIP (Node 7):")
-                            print(f"   Text: {neg_text[:200]}{'...' if len(neg_text) > 200 else ''}")
-                        
-                        # Check KSampler
-                        if '3' in prompt_data:
-                            ksampler_node = prompt_data['3']
-                            ksampler_inputs = ksampler_node.get('inputs', {})
-                            print(f"\n⚙️  KSampler (Node 3):")
-                            print(f"   Steps: {ksampler_inputs.get('steps', 'N/A')}")
-                            print(f"   CFG: {ksampler_inputs.get('cfg', 'N/A')}")
-                            print(f"   Sampler: {ksampler_inputs.get('sampler_name', 'N/A')}")
-                            print(f"   Scheduler: {ksampler_inputs.get('scheduler', 'N/A')}")
-                            print(f"   Denoise: {ksampler_inputs.get('denoise', 'N/A')}")
-                            print(f"   Seed: {ksampler_inputs.get('seed', 'N/A')}")
-                        
-                        print("\n" + "=" * 80)
-                    
-                    outputs = hist_entry.get('outputs', {})
-                    if outputs and '10' in outputs:
-                        images = outputs['10'].get('images', [])
-                        if images:
-                            img_info = images[0]
-                            filename = urllib.parse.quote(img_info['filename'])
-                            subfolder = urllib.parse.quote(img_info.get('subfolder', ''))
-                            img_type = urllib.parse.quote(img_info.get('type', 'output'))
-                            
-                            img_url = f"{COMFYUI_URL}/view?filename={filename}&subfolder={subfolder}&type={img_type}"
-                            
-                            print(f"📥 Downloading result...")
-                            with urllib.request.urlopen(img_url, timeout=30) as img_response:
-                                output_path.parent.mkdir(parents=True, exist_ok=True)
-                                with open(output_path, 'wb') as f:
-                                    f.write(img_response.read())
-                            
-                            print(f"✅ Success! Saved to: {output_path}")
-                            return True
-                    
-                    status = hist_entry.get('status', {})
-                    if status.get('completed') and not outputs:
-                        print(f"❌ Generation completed but produced no output", file=sys.stderr)
-                        return False
-        except Exception:
-            pass
-        
-        time.sleep(2)
-    
-    print(f"⏰ Timeout after {timeout}s", file=sys.stderr)
-    return False
+    """Wait for completion via the shared client and download the result."""
+    print(f"⏳ Waiting for completion (ID: {prompt_id})...")
+    client = get_client()
+
+    try:
+        result = client.wait(prompt_id, timeout)
+    except TimeoutError:
+        print(f"⏰ Timeout after {timeout}s", file=sys.stderr)
+        return False
+    except ComfyExecutionError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return False
+
+    if verify:
+        # Event payloads carry outputs only; the executed graph lives in history
+        hist_entry = client.history(prompt_id).get(prompt_id, {})
+
+        print("\n🔍 GROUND TRUTH - What ComfyUI Actually Executed:")
+        print("=" * 80)
+
+        # Show prompt that was executed (index 2 of the prompt array)
+        prompt_array = hist_entry.get('prompt', [])
+        prompt_data = prompt_array[2] if len(prompt_array) > 2 else {}
+
+        # Check LoadImage
+        if '5' in prompt_data:
+            load_img_node = prompt_data['5']
+            print(f"\n📸 LoadImage (Node 5):")
+            print(f"   Filename: {load_img_node.get('inputs', {}).get('image', 'N/A')}")
+
+        # Check Checkpoint
+        if '4' in prompt_data:
+            ckpt_node = prompt_data['4']
+            print(f"\n🎯 Checkpoint (Node 4):")
+            print(f"   Model: {ckpt_node.get('inputs', {}).get('ckpt_name', 'N/A')}")
+
+        # Check positive prompt
+        if '6' in prompt_data:
+            pos_node = prompt_data['6']
+            pos_text = pos_node.get('inputs', {}).get('text', '')
+            print(f"\n✅ Positive CLIP (Node 6):")
+            print(f"   Text: {pos_text[:200]}{'...' if len(pos_text) > 200 else ''}")
+
+        # Check negative prompt
+        if '7' in prompt_data:
+            neg_node = prompt_data['7']
+            neg_text = neg_node.get('inputs', {}).get('text', '')
+            print(f"\n🚫 Negative CLIP (Node 7):")
+            print(f"   Text: {neg_text[:200]}{'...' if len(neg_text) > 200 else ''}")
+
+        # Check KSampler
+        if '3' in prompt_data:
+            ksampler_node = prompt_data['3']
+            ksampler_inputs = ksampler_node.get('inputs', {})
+            print(f"\n⚙️  KSampler (Node 3):")
+            print(f"   Steps: {ksampler_inputs.get('steps', 'N/A')}")
+            print(f"   CFG: {ksampler_inputs.get('cfg', 'N/A')}")
+            print(f"   Sampler: {ksampler_inputs.get('sampler_name', 'N/A')}")
+            print(f"   Scheduler: {ksampler_inputs.get('scheduler', 'N/A')}")
+            print(f"   Denoise: {ksampler_inputs.get('denoise', 'N/A')}")
+            print(f"   Seed: {ksampler_inputs.get('seed', 'N/A')}")
+
+        print("\n" + "=" * 80)
+
+    images = result.images('10')
+    if not images:
+        print(f"❌ Generation completed but produced no output", file=sys.stderr)
+        return False
+
+    print(f"📥 Downloading result...")
+    client.download(images[0], output_path)
+
+    print(f"✅ Success! Saved to: {output_path}")
+    return True
+
+# ----------------------------------------------------------------------
+# Sweep mode
+# ----------------------------------------------------------------------
+
+def _latent_index():
+    try:
+        return json.loads(LATENT_INDEX.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _record_latent(base_url, key, latent):
+    index = _latent_index()
+    index.setdefault(base_url, {})[key] = [latent.filename, latent.subfolder, latent.type]
+    LATENT_INDEX.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = LATENT_INDEX.with_name(f".{LATENT_INDEX.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_path, LATENT_INDEX)
+
+def encode_plate(client, base_plate_filename, ckpt, timeout=300):
+    """Encode the plate to a latent file once per plate and checkpoint; returns its LoadLatent reference.
+
+    SaveLatent numbers its files, so the name it returned is recorded per
+    backend in .comfy-cache/plate_latents.json; later sweeps reuse that file
+    while the server still has it.
+    """
+    key = hashlib.sha256(f"{base_plate_filename}|{ckpt}".encode("utf-8")).hexdigest()[:16]
+    recorded = _latent_index().get(client.base_url, {}).get(key)
+    latent = ImageRef(*recorded) if recorded else None
+    if latent is None or not client.has_file(latent):
+        print("🧮 Encoding base plate latent...")
+        result = client.run({
+            "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": ckpt}},
+            "5": {"class_type": "LoadImage", "inputs": {"image": base_plate_filename}},
+            "8": {"class_type": "VAEEncode", "inputs": {"pixels": ["5", 0], "vae": ["4", 2]}},
+            "13": {"class_type": "SaveLatent", "inputs": {"samples": ["8", 0], "filename_prefix": f"immanence/plate_{key}"}},
+        }, timeout)
+        saved = result.outputs.get("13", {}).get("latents", [])
+        if not saved:
+            raise ComfyError("SaveLatent produced no file")
+        latent = ImageRef.from_output(saved[0])
+        _record_latent(client.base_url, key, latent)
+    else:
+        print("🧮 Reusing encoded base plate latent")
+    return f"{latent.subfolder}/{latent.filename} [output]" if latent.subfolder else f"{latent.filename} [output]"
+
+def sweep_workflow(latent_ref, positive_prompt, negative_prompt, denoise, cfg, sampler, scheduler, ckpt, steps, seed):
+    """One sweep image from the shared latent; node IDs stay fixed so ComfyUI caches the shared nodes."""
+    return {
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": ckpt}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": positive_prompt, "clip": ["4", 1]}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": negative_prompt, "clip": ["4", 1]}},
+        "11": {"class_type": "LoadLatent", "inputs": {"latent": latent_ref}},
+        "3": {
+            "class_type": "KSampler",
+            "inputs": {
+                "seed": seed,
+                "steps": steps,
+                "cfg": cfg,
+                "sampler_name": sampler,
+                "scheduler": scheduler,
+                "denoise": denoise,
+                "model": ["4", 0],
+                "positive": ["6", 0],
+                "negative": ["7", 0],
+                "latent_image": ["11", 0]
+            }
+        },
+        "9": {"class_type": "VAEDecode", "inputs": {"samples": ["3", 0], "vae": ["4", 2]}},
+        "10": {"class_type": "SaveImage", "inputs": {"filename_prefix": "photic_sweep", "images": ["9", 0]}}
+    }
+
+def contact_sheet(tiles, columns, thumb_width=320, label_height=22):
+    """Grid of (label, image) tiles with the label under each thumbnail."""
+    first = tiles[0][1]
+    thumb_height = round(first.height * thumb_width / first.width)
+    rows = (len(tiles) + columns - 1) // columns
+    sheet = Image.new("RGB", (columns * thumb_width, rows * (thumb_height + label_height)), (16, 16, 16))
+    draw = ImageDraw.Draw(sheet)
+    for index, (label, image) in enumerate(tiles):
+        x = (index % columns) * thumb_width
+        y = (index // columns) * (thumb_height + label_height)
+        sheet.paste(image.convert("RGB").resize((thumb_width, thumb_height), Image.LANCZOS), (x, y))
+        draw.text((x + 6, y + thumb_height + 5), label, fill=(230, 230, 230))
+    return sheet
+
+def run_sweep(args, base_plate_filename, output_path):
+    """Render the denoise x cfg x seed grid from one plate encode and save the contact sheet."""
+    denoises = args.sweep_denoise or [args.denoise]
+    cfgs = args.sweep_cfg or [args.cfg]
+    base_seed = args.seed if args.seed is not None else int(uuid.uuid4().int % (2**32))
+    seeds = [(base_seed + i) % (2**32) for i in range(args.seeds)]
+    client = get_client()
+    if client.backend_count > 1:
+        # The latent file lives on one server; keep the whole sweep there
+        client = client.pick({"4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": args.ckpt}}})
+
+    try:
+        latent_ref = encode_plate(client, base_plate_filename, args.ckpt, args.timeout)
+    except (TimeoutError, ComfyExecutionError, ComfyError, requests.RequestException) as e:
+        print(f"❌ Could not encode base plate: {e}", file=sys.stderr)
+        return False
+    print(f"📤 Queuing {len(denoises)}x{len(cfgs)}x{len(seeds)} sweep (seeds {', '.join(map(str, seeds))})...")
+    cells = []
+    finished = set()
+    tiles = []
+    tiles_dir = output_path.with_suffix("")
+    try:
+        # Rows: denoise; columns: cfg, then seed
+        for denoise in denoises:
+            for cfg in cfgs:
+                for seed in seeds:
+                    workflow = sweep_workflow(
+                        latent_ref, args.positive, args.negative or "", denoise, cfg,
+                        args.sampler, args.scheduler, args.ckpt, args.steps, seed,
+                    )
+                    cells.append((denoise, cfg, seed, client.submit(workflow)))
+        for denoise, cfg, seed, prompt_id in cells:
+            result = client.wait(prompt_id, args.timeout)
+            finished.add(prompt_id)
+            for image in result.images("10"):
+                data = client.fetch(image)
+                tile_path = tiles_dir / f"d{denoise:g}_cfg{cfg:g}_seed{seed}.png"
+                tile_path.parent.mkdir(parents=True, exist_ok=True)
+                tile_path.write_bytes(data)
+                tiles.append((f"denoise {denoise:g}  cfg {cfg:g}  seed {seed}", Image.open(io.BytesIO(data))))
+            print(f"   ✓ denoise {denoise:g}, cfg {cfg:g}, seed {seed}")
+    except (TimeoutError, ComfyExecutionError, ComfyError, requests.RequestException) as e:
+        # Includes cells queued before a later submission failed
+        client.cancel(prompt_id for _, _, _, prompt_id in cells if prompt_id not in finished)
+        print(f"❌ Sweep failed: {e}", file=sys.stderr)
+        return False
+
+    if not tiles:
+        print("❌ Sweep completed but produced no output", file=sys.stderr)
+        return False
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    contact_sheet(tiles, columns=len(cfgs) * len(seeds)).save(output_path)
+    print(f"✅ Contact sheet saved to: {output_path} ({len(tiles)} images in {tiles_dir})")
+    return True
+
+def float_list(text):
+    return [float(value) for value in text.split(",") if value.strip()]
 
 def main():
     parser = argparse.ArgumentParser(
@@ -251,14 +338,16 @@ def main():
     parser.add_argument('--timeout', '-t', type=int, default=300, help='Timeout in seconds')
     parser.add_argument('--verify', '-v', action='store_true', help='Print diagnostic info about what ComfyUI actually executed')
     parser.add_argument('--probe', action='store_true', help='Add probe mutations (odd dimensions, low steps) to verify workflow control')
+    parser.add_argument('--sweep-denoise', type=float_list, help='Sweep: comma-separated denoise values (rows of the contact sheet)')
+    parser.add_argument('--sweep-cfg', type=float_list, help='Sweep: comma-separated CFG values (columns of the contact sheet)')
+    parser.add_argument('--seeds', type=int, default=1, help='Sweep: seeds per denoise/cfg cell, as columns (default 1)')
+    parser.add_argument('--seed', type=int, help='Sweep: first seed; seed column i uses SEED+i in every cell (default random)')
     
     args = parser.parse_args()
     
     # Check ComfyUI
     print("🔍 Checking ComfyUI status...")
-    if not check_comfyui():
-        print("❌ ComfyUI is not running at http://127.0.0.1:8188", file=sys.stderr)
-        sys.exit(1)
+    require_running()
     
     print("✅ ComfyUI is running")
     
@@ -270,9 +359,13 @@ def main():
         print(f"❌ Base plate not found: {base_plate_path}", file=sys.stderr)
         sys.exit(1)
     
-    # Copy to ComfyUI input folder
+    # Upload to ComfyUI's input folder, named by content hash
     print(f"\n📋 Preparing base plate...")
-    base_plate_filename = copy_to_comfyui_input(base_plate_path)
+    try:
+        base_plate_filename = upload_base_plate(base_plate_path)
+    except requests.RequestException as e:
+        print(f"❌ Could not upload base plate: {e}", file=sys.stderr)
+        sys.exit(1)
     
     # Apply probe mutations if requested
     if args.probe:
@@ -286,6 +379,9 @@ def main():
         print(f"   Modified denoise: {args.denoise}")
         print(f"   Added probe text to positive prompt")
     
+    if args.sweep_denoise or args.sweep_cfg or args.seeds > 1:
+        sys.exit(0 if run_sweep(args, base_plate_filename, output_path) else 1)
+    
     print(f"📤 Queuing img2img generation...")
     print(f"   Base plate: {base_plate_filename}")
     print(f"   Steps: {args.steps} | Denoise: {args.denoise} | CFG: {args.cfg}")
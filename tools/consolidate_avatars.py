@@ -2,17 +2,23 @@
 """
 Consolidate all avatar assets from AvatarMatrix to public/avatars/
 Ensures everything is in one place with clean naming.
+
+Files are copied (as reflinks where the filesystem supports them). With
+--link they are hardlinked instead: no extra disk space, but editing either
+file in place then changes both.
 """
 
+import argparse
 from pathlib import Path
-import shutil
+
+from comfy.localfs import place
 
 PROJECT_ROOT = Path(__file__).parent.parent
 SOURCE_ROOT = PROJECT_ROOT / "AvatarMatrix" / "Sanskrit_Matrix"
 DEST_DIR = PROJECT_ROOT / "public" / "avatars"
 
-def consolidate():
-    """Copy all Sanskrit Matrix assets to public/avatars/"""
+def consolidate(link=False):
+    """Copy (or with `link`, hardlink) all Sanskrit Matrix assets to public/avatars/"""
     
     if not SOURCE_ROOT.exists():
         print(f"✅ No AvatarMatrix folder found - all assets already in public/avatars/")
@@ -42,14 +48,14 @@ def consolidate():
             print(f"  ⏭️  Already exists: {png_file.name}")
         else:
             DEST_DIR.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(png_file, dest_file)
+            place(png_file, dest_file, link=link)
             copied += 1
-            print(f"  ✅ Copied: {png_file.name}")
+            print(f"  ✅ {'Linked' if link else 'Copied'}: {png_file.name}")
             
             # Also copy JSON metadata if it exists
             json_file = png_file.with_suffix(".json")
             if json_file.exists():
-                shutil.copy2(json_file, dest_file.with_suffix(".json"))
+                place(json_file, dest_file.with_suffix(".json"), link=link)
     
     print()
     print(f"✅ Consolidation complete!")
@@ -60,4 +66,7 @@ def consolidate():
     print(f"You can now safely delete the AvatarMatrix folder if desired.")
 
 if __name__ == "__main__":
-    consolidate()
+    parser = argparse.ArgumentParser(description="Consolidate AvatarMatrix assets into public/avatars/")
+    parser.add_argument('--link', action='store_true',
+                        help='Hardlink instead of copying (shares the file with AvatarMatrix/)')
+    consolidate(parser.parse_args().link)
@@ -1,12 +1,9 @@
-import json
-import urllib.request
-import urllib.parse
 import random
 import time
 import os
 from pathlib import Path
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import get_client
 PROJECT_ROOT = Path(r"D:\Unity Apps\immanence-os")
 CKPT_NAME = "z-image-turbo-fp8-aio.safetensors"
 
@@ -27,30 +24,16 @@ def queue_prompt(positive_prompt, width, height, prefix):
         "5": {"inputs": {"samples": ["4", 0], "vae": ["1", 2]}, "class_type": "VAEDecode"},
         "6": {"inputs": {"filename_prefix": prefix, "images": ["5", 0]}, "class_type": "SaveImage"}
     }
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
-    with urllib.request.urlopen(req, timeout=10) as r:
-        return json.loads(r.read()).get("prompt_id")
+    return get_client().submit(workflow)
 
 def wait_for_prompt(prompt_id, target_path, timeout=300):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/history/{prompt_id}", timeout=5) as r:
-                history = json.loads(r.read())
-                if prompt_id in history:
-                    img_info = history[prompt_id]["outputs"]["6"]["images"][0]
-                    params = urllib.parse.urlencode({"filename": img_info["filename"], "subfolder": img_info.get("subfolder", ""), "type": img_info.get("type", "output")})
-                    with urllib.request.urlopen(f"{COMFYUI_URL}/view?{params}", timeout=10) as img_r:
-                        target_path.parent.mkdir(parents=True, exist_ok=True)
-                        with open(target_path, "wb") as f:
-                            f.write(img_r.read())
-                        return True
-        except:
-            pass
-        time.sleep(2)
-    return False
+    client = get_client()
+    try:
+        result = client.wait(prompt_id, timeout)
+        client.download(result.first_image("6"), target_path)
+        return True
+    except:
+        return False
 
 def run_batch():
     # Focused on DARK mode assets first (teal plasma)
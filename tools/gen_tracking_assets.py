@@ -1,19 +1,16 @@
-import json
-import urllib.request
-import urllib.parse
 import random
-import time
 import os
 from pathlib import Path
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import ImageRef, get_client
+from comfy.packing import pack
 PROJECT_ROOT = Path(r"D:\Unity Apps\immanence-os")
 CKPT_NAME = "z-image-turbo-fp8-aio.safetensors"
 
 def log(msg):
     print(f"[*] {msg}")
 
-def queue_prompt(positive_prompt, width, height, prefix):
+def build_workflow(positive_prompt, width, height, prefix):
     seed = random.randint(0, 0xffffffffffffffff)
     workflow = {
         "1": {"inputs": {"ckpt_name": CKPT_NAME}, "class_type": "CheckpointLoaderSimple"},
@@ -30,41 +27,22 @@ def queue_prompt(positive_prompt, width, height, prefix):
         "5": {"inputs": {"samples": ["4", 0], "vae": ["1", 2]}, "class_type": "VAEDecode"},
         "6": {"inputs": {"filename_prefix": prefix, "images": ["5", 0]}, "class_type": "SaveImage"}
     }
-    
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
-    
-    with urllib.request.urlopen(req, timeout=10) as r:
-        res = json.loads(r.read())
-        return res.get("prompt_id")
+    return workflow
+
+def queue_prompt(positive_prompt, width, height, prefix):
+    return get_client().submit(build_workflow(positive_prompt, width, height, prefix))
 
 def wait_for_prompt(prompt_id, target_path, timeout=300):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/history/{prompt_id}", timeout=5) as r:
-                history = json.loads(r.read())
-                if prompt_id in history:
-                    outputs = history[prompt_id].get("outputs", {})
-                    for node_id, node_output in outputs.items():
-                        if "images" in node_output:
-                            img_info = node_output["images"][0]
-                            params = urllib.parse.urlencode({
-                                "filename": img_info["filename"], 
-                                "subfolder": img_info.get("subfolder", ""), 
-                                "type": img_info.get("type", "output")
-                            })
-                            with urllib.request.urlopen(f"{COMFYUI_URL}/view?{params}", timeout=10) as img_r:
-                                data = img_r.read()
-                                target_path.parent.mkdir(parents=True, exist_ok=True)
-                                with open(target_path, "wb") as f:
-                                    f.write(data)
-                                return True
-        except:
-            pass
-        time.sleep(2)
-    return False
+    client = get_client()
+    try:
+        result = client.wait(prompt_id, timeout)
+    except Exception:
+        return False
+    images = result.images()
+    if not images:
+        return False
+    client.download(images[0], target_path)
+    return True
 
 def run_batch():
     tasks = [
@@ -80,17 +58,23 @@ def run_batch():
     asset_dir = PROJECT_ROOT / "src" / "assets" / "tracking_card"
     asset_dir.mkdir(parents=True, exist_ok=True)
     
-    for prompt, w, h, filename in tasks:
-        target = asset_dir / filename
-        log(f"Generating {filename}...")
-        pid = queue_prompt(prompt, w, h, filename.split('.')[0])
-        if pid:
-            if wait_for_prompt(pid, target):
-                log(f"Success: {filename}")
-            else:
-                log(f"Timeout: {filename}")
+    # All tasks share checkpoint and sampler: submit them as one packed prompt
+    packed = pack([build_workflow(prompt, w, h, filename.split('.')[0]) for prompt, w, h, filename in tasks])
+    log(f"Generating {len(tasks)} assets in one packed prompt...")
+    client = get_client()
+    try:
+        result = client.wait(client.submit(packed.workflow), timeout=300 * len(tasks))
+    except Exception as e:
+        log(f"Failed: {e}")
+        return
+
+    for (prompt, w, h, filename), outputs in zip(tasks, packed.split_outputs(result.outputs)):
+        images = outputs.get("6", {}).get("images", [])
+        if images:
+            client.download(ImageRef.from_output(images[0]), asset_dir / filename)
+            log(f"Success: {filename}")
         else:
-            log(f"Failed to queue: {filename}")
+            log(f"No output: {filename}")
 
 if __name__ == "__main__":
     run_batch()
@@ -1,11 +1,8 @@
-import json
-import urllib.request
-import urllib.error
-import time
 import uuid
 from pathlib import Path
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import get_client
+from comfy.harvest import output_tag
 PROJECT_ROOT = Path(r"D:\Unity Apps\immanence-os")
 
 def get_api_workflow(positive_prompt, negative_prompt="text, watermark"):
@@ -51,46 +48,19 @@ def get_api_workflow(positive_prompt, negative_prompt="text, watermark"):
       }
     }
 
-def queue_prompt(workflow):
-    prompt_id = str(uuid.uuid4())
-    data = json.dumps({"prompt": workflow, "client_id": prompt_id}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read())["prompt_id"]
-
-def get_history(prompt_id):
-    with urllib.request.urlopen(f"{COMFYUI_URL}/history/{prompt_id}") as response:
-        return json.loads(response.read())
-
-def get_image(filename, subfolder, folder_type):
-    data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
-    url_values = urllib.parse.urlencode(data)
-    with urllib.request.urlopen(f"{COMFYUI_URL}/view?{url_values}") as response:
-        return response.read()
-
 def generate_and_save(positive_prompt, output_filename):
     print(f"Generating {output_filename}...")
-    workflow = get_api_workflow(positive_prompt)
-    prompt_id = queue_prompt(workflow)
+    client = get_client()
+    prompt_id = client.submit(
+        get_api_workflow(positive_prompt),
+        extra_data=output_tag("title", {"9": f"light/{output_filename}"}),
+    )
     
     # Wait for completion
-    while True:
-        history = get_history(prompt_id)
-        if prompt_id in history:
-            outputs = history[prompt_id].get("outputs", {})
-            for node_id, node_output in outputs.items():
-                if "images" in node_output and node_output["images"]:
-                    img_info = node_output["images"][0]
-                    img_data = get_image(img_info["filename"], img_info.get("subfolder", ""), img_info.get("type", "output"))
-                    
-                    output_path = PROJECT_ROOT / "public" / "titles" / "light" / output_filename
-                    output_path.parent.mkdir(parents=True, exist_ok=True)
-                    with open(output_path, 'wb') as f:
-                        f.write(img_data)
-                    print(f"Saved to {output_path}")
-                    return
-        time.sleep(2)
+    result = client.wait(prompt_id, timeout=None)
+    output_path = PROJECT_ROOT / "public" / "titles" / "light" / output_filename
+    client.download(result.first_image(), output_path)
+    print(f"Saved to {output_path}")
 
 stages = [
     ("A flat 2D graphic of the word \"EMBER\". The letters are filled with a mosaic pattern of sharp, triangular shards in varying shades of amber, bright orange, and deep charcoal. The arrangement creates a sense of \"glowing heat\" through flat color blocking rather than gradients. Thin black outline on the letters. Centered on a cream background.", "stage-ember.png"),
@@ -1,13 +1,11 @@
-import json
-import urllib.request
-import urllib.error
 import time
 import uuid
 import os
 from pathlib import Path
 from datetime import datetime
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import ComfyError, get_client
+from comfy.harvest import output_tag
 PROJECT_ROOT = Path(r"D:\Unity Apps\immanence-os")
 
 def get_api_workflow(positive_prompt, negative_prompt="text, watermark, blurry, distorted, low quality"):
@@ -35,68 +33,46 @@ def get_api_workflow(positive_prompt, negative_prompt="text, watermark, blurry,
       "4": { "class_type": "CheckpointLoaderSimple", "inputs": { "ckpt_name": "z_image_turbo_bf16.safetensors" } }
     }
 
-def queue_prompt(workflow):
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
+def queue_prompt(workflow, filename):
     try:
-        with urllib.request.urlopen(req) as response:
-            res = json.loads(response.read().decode('utf-8'))
-            return res['prompt_id']
-    except Exception as e:
+        # Tagged so scan_and_save_titles.py can recover it if this script dies
+        return get_client().submit(workflow, extra_data=output_tag("title", {"9": f"light/{filename}"}))
+    except ComfyError as e:
         print(f"Error queuing: {e}")
         return None
 
-def get_history(prompt_id):
-    try:
-        req = urllib.request.Request(f"{COMFYUI_URL}/history/{prompt_id}")
-        with urllib.request.urlopen(req) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except: return {}
-
-def get_image(filename, subfolder, folder_type):
-    data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
-    url_values = urllib.parse.urlencode(data)
-    with urllib.request.urlopen(f"{COMFYUI_URL}/view?{url_values}") as response:
-        return response.read()
-
 def generate_asset(prompt, filename):
     print(f"\n--- STARTING GENERATION: {filename} ---")
     print(f"Time: {datetime.now().strftime('%H:%M:%S')}")
     
     workflow = get_api_workflow(prompt)
-    pid = queue_prompt(workflow)
+    pid = queue_prompt(workflow, filename)
     if not pid: 
         print(f"Aborting {filename} due to queue error.")
         return False
     
     print(f"Queued ID: {pid}. Waiting for completion...")
     
-    start_wait = time.time()
-    while time.time() - start_wait < 300: # 5 min timeout per asset
-        hist = get_history(pid)
-        if pid in hist:
-            print(f"Prompt {pid} finished in history.")
-            outputs = hist[pid].get("outputs", {})
-            for node_id, node_output in outputs.items():
-                if "images" in node_output:
-                    img_info = node_output["images"][0]
-                    img_data = get_image(img_info["filename"], img_info.get("subfolder", ""), img_info.get("type", "output"))
-                    
-                    out_p = PROJECT_ROOT / "public" / "titles" / "light" / filename
-                    out_p.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    with open(out_p, "wb") as f:
-                        f.write(img_data)
-                    
-                    mtime = datetime.fromtimestamp(os.path.getmtime(out_p)).strftime('%Y-%m-%d %H:%M:%S')
-                    print(f"SUCCESS: {filename} saved at {mtime}")
-                    print(f"File size: {os.path.getsize(out_p)} bytes")
-                    return True
-        time.sleep(5)
+    client = get_client()
+    try:
+        result = client.wait(pid, timeout=300) # 5 min timeout per asset
+    except TimeoutError:
+        print(f"TIMEOUT: {filename} failed to complete within 5 minutes.")
+        return False
+    print(f"Prompt {pid} finished in history.")
+    
+    images = result.images()
+    if not images:
+        print(f"Prompt {pid} produced no image.")
+        return False
+    
+    out_p = PROJECT_ROOT / "public" / "titles" / "light" / filename
+    client.download(images[0], out_p)
     
-    print(f"TIMEOUT: {filename} failed to complete within 5 minutes.")
-    return False
+    mtime = datetime.fromtimestamp(os.path.getmtime(out_p)).strftime('%Y-%m-%d %H:%M:%S')
+    print(f"SUCCESS: {filename} saved at {mtime}")
+    print(f"File size: {os.path.getsize(out_p)} bytes")
+    return True
 
 assets = [
     ("A flat 2D graphic of the word \"EMBER\". The letters are filled with a mosaic pattern of sharp, triangular shards in varying shades of amber, bright orange, and deep charcoal. The arrangement creates a sense of \"glowing heat\" through flat color blocking rather than gradients. Thin black outline on the letters. Centered on a cream background.", "stage-ember.png"),
@@ -4,10 +4,14 @@ Generate Moon Phase Sprite Set for Immanence OS
 Creates 16 moon phase sprites with consistent style.
 """
 
-import subprocess
+import argparse
 import sys
 from pathlib import Path
 
+from comfy.batch import Txt2ImgJob, run_jobs
+from comfy.cache import get_cache
+from comfy.ledger import get_ledger
+
 PROJECT_ROOT = Path(__file__).parent.parent
 OUTPUT_DIR = PROJECT_ROOT / "public" / "bg" / "moon-phases"
 
@@ -48,45 +52,49 @@ PHASES = [
 ]
 
 
-def generate_phase(phase_num, phase_desc):
-    """Generate a single moon phase sprite."""
+def phase_job(phase_num, phase_desc):
+    """Build the generation job for a single moon phase sprite."""
     output_file = OUTPUT_DIR / f"moon_phase_{phase_num}.png"
     
     # Combine base prompt with phase-specific instruction
     full_prompt = f"{BASE_PROMPT}, {phase_desc}"
     
+    return Txt2ImgJob(
+        prompt=full_prompt,
+        output_path=output_file,
+        negative=NEGATIVE_PROMPT,
+        width=256,
+        height=256,
+        steps=9,  # z-image turbo default
+        cfg=1.0,  # z-image turbo default
+        sampler="euler_ancestral",
+        scheduler="simple",
+        ckpt="z-image-turbo-fp8-aio.safetensors",
+        prefix=f"moon_phase_{phase_num}",
+        timeout=120,
+        name=f"Phase {phase_num}",
+    )
+
+
+def generate_phase(phase_num, phase_desc):
+    """Generate a single moon phase sprite."""
     print(f"\n{'='*60}")
     print(f"Generating Phase {phase_num}: {phase_desc}")
     print(f"{'='*60}")
     
-    # Call comfy_gen.py
-    cmd = [
-        sys.executable,
-        str(PROJECT_ROOT / "tools" / "comfy_gen.py"),
-        full_prompt,
-        "--output", str(output_file.relative_to(PROJECT_ROOT)),
-        "--negative", NEGATIVE_PROMPT,
-        "--width", "256",
-        "--height", "256",
-        "--steps", "9",  # z-image turbo default
-        "--cfg", "1.0",  # z-image turbo default
-        "--sampler", "euler_ancestral",
-        "--scheduler", "simple",
-        "--ckpt", "z-image-turbo-fp8-aio.safetensors",
-        "--prefix", f"moon_phase_{phase_num}",
-        "--timeout", "120"
-    ]
-    
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=False, text=True)
-        print(f"✅ Phase {phase_num} complete: {output_file.name}")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Phase {phase_num} failed with exit code {e.returncode}")
-        return False
+    return run_jobs([phase_job(phase_num, phase_desc)])[0].ok
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Moon Phase Sprite Generator for Immanence OS")
+    parser.add_argument('--window', type=int, default=2,
+                        help='Prompts kept in flight on ComfyUI (default: 2)')
+    parser.add_argument('--pack', type=int, default=4,
+                        help='Phases packed into one prompt sharing checkpoint and negative (default: 4)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Regenerate every phase with random seeds instead of reusing cached results')
+    args = parser.parse_args()
+    
     print("🌙 Moon Phase Sprite Generator for Immanence OS")
     print(f"Output directory: {OUTPUT_DIR}")
     print(f"Generating {len(PHASES)} phases at 256x256 with z-image turbo")
@@ -94,15 +102,17 @@ def main():
     # Ensure output directory exists
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Generate all phases
-    successful = 0
-    failed = 0
-    
-    for phase_num, phase_desc in PHASES:
-        if generate_phase(phase_num, phase_desc):
-            successful += 1
-        else:
-            failed += 1
+    # Generate all phases, packing several per prompt and keeping the next packs queued
+    jobs = [phase_job(num, desc) for num, desc in PHASES]
+    results = run_jobs(
+        jobs,
+        window=args.window,
+        pack=args.pack,
+        cache=None if args.no_cache else get_cache(),
+        ledger=get_ledger(),
+    )
+    successful = sum(1 for result in results if result.ok)
+    failed = len(results) - successful
     
     # Summary
     print(f"\n{'='*60}")
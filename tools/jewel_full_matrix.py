@@ -14,6 +14,7 @@ Matrix:
 Usage:
     python tools/jewel_full_matrix.py --seeds 2
     python tools/jewel_full_matrix.py --seeds 2 --dry-run
+    python tools/jewel_full_matrix.py --seeds 2 --shard 1/3   # one of three machines
 """
 
 import sys
@@ -21,7 +22,8 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from avatar_matrix_gen import STAGES, build_prompt, generate_asset, PROJECT_ROOT
+from avatar_matrix_gen import STAGES, build_prompt, generate_assets, DEFAULT_WINDOW, PROJECT_ROOT
+from comfy.shard import Shard
 from datetime import datetime
 
 OUTPUT_ROOT = PROJECT_ROOT / "AvatarMatrix" / "FullMatrix"
@@ -29,7 +31,7 @@ OUTPUT_ROOT = PROJECT_ROOT / "AvatarMatrix" / "FullMatrix"
 PATHS = ["Ekagrata", "Sahaja", "Vigilance"]
 VECTORS = ["Neutral", "Jittered", "Diffused"]
 
-def generate_full_matrix(seeds=2, dry_run=False):
+def generate_full_matrix(seeds=2, dry_run=False, window=DEFAULT_WINDOW, batch_size=1, cache=True, shard=None):
     """Generate all Stage × Path × Vector combinations."""
     total = len(STAGES) * len(PATHS) * len(VECTORS) * seeds
     
@@ -42,6 +44,7 @@ def generate_full_matrix(seeds=2, dry_run=False):
     print()
     
     count = 0
+    items = []
     
     for stage in STAGES:
         stage_name = stage["name"]
@@ -76,11 +79,9 @@ def generate_full_matrix(seeds=2, dry_run=False):
                         }
                     }
                     
-                    generate_asset(prompt, output_path, metadata, dry_run, wait=True)
-                    
-                    if not dry_run:
-                        import time
-                        time.sleep(1)
+                    items.append((prompt, output_path, metadata))
+    
+    generate_assets(items, dry_run, wait=True, window=window, batch_size=batch_size, cache=cache, shard=shard)
     
     print(f"\n{'='*80}")
     print("FULL MATRIX GENERATION COMPLETE")
@@ -107,10 +108,18 @@ def main():
                        help='Number of seeds per combination (default: 2)')
     parser.add_argument('--dry-run', action='store_true',
                        help='Preview structure without generating')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                       help=f'Prompts kept in flight on ComfyUI (default: {DEFAULT_WINDOW})')
+    parser.add_argument('--batch-size', type=int, default=1,
+                       help='Seeds rendered per ComfyUI job as one latent batch (default: 1)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Regenerate every image with random seeds instead of reusing cached results')
+    parser.add_argument('--shard', type=Shard.parse, default=None, metavar='I/N',
+                       help='Generate only slice I of N (e.g. 2/4); check merged slices with comfy/shard.py verify')
     
     args = parser.parse_args()
     
-    generate_full_matrix(args.seeds, args.dry_run)
+    generate_full_matrix(args.seeds, args.dry_run, args.window, args.batch_size, not args.no_cache, args.shard)
 
 
 if __name__ == "__main__":
@@ -16,12 +16,13 @@ from pathlib import Path
 # Add parent directory to path to import avatar_matrix_gen
 sys.path.insert(0, str(Path(__file__).parent))
 
-from avatar_matrix_gen import STAGES, build_prompt, generate_asset, PROJECT_ROOT
+from avatar_matrix_gen import STAGES, build_prompt, generate_assets, DEFAULT_WINDOW, PROJECT_ROOT
+from comfy.shard import Shard
 from datetime import datetime
 
 OUTPUT_ROOT = PROJECT_ROOT / "AvatarMatrix" / "JewelLock_PathTests"
 
-def generate_path_variations(path_name, seeds=2, dry_run=False):
+def generate_path_variations(path_name, seeds=2, dry_run=False, window=DEFAULT_WINDOW, batch_size=1, cache=True, shard=None):
     """Generate variations for a specific path across all stages."""
     print(f"\n{'='*80}")
     print(f"PATH DEFORMATION TEST: {path_name}")
@@ -31,6 +32,7 @@ def generate_path_variations(path_name, seeds=2, dry_run=False):
     print()
     
     path_dir = OUTPUT_ROOT / f"Path_{path_name}"
+    items = []
     
     for stage in STAGES:
         stage_name = stage["name"]
@@ -58,11 +60,9 @@ def generate_path_variations(path_name, seeds=2, dry_run=False):
                 }
             }
             
-            generate_asset(prompt, output_path, metadata, dry_run, wait=True)
-            
-            if not dry_run:
-                import time
-                time.sleep(1)
+            items.append((prompt, output_path, metadata))
+    
+    generate_assets(items, dry_run, wait=True, window=window, batch_size=batch_size, cache=cache, shard=shard)
     
     print(f"\n✅ {path_name} test complete. Results in: {path_dir}")
 
@@ -82,6 +82,14 @@ def main():
                        help='Number of seeds per combination (default: 2)')
     parser.add_argument('--dry-run', action='store_true', 
                        help='Preview structure without generating')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                       help=f'Prompts kept in flight on ComfyUI (default: {DEFAULT_WINDOW})')
+    parser.add_argument('--batch-size', type=int, default=1,
+                       help='Seeds rendered per ComfyUI job as one latent batch (default: 1)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Regenerate every image with random seeds instead of reusing cached results')
+    parser.add_argument('--shard', type=Shard.parse, default=None, metavar='I/N',
+                       help='Generate only slice I of N (e.g. 2/4); check merged slices with comfy/shard.py verify')
     
     args = parser.parse_args()
     
@@ -98,9 +106,9 @@ def main():
     if args.all:
         print("\nGenerating all 3 path variations...")
         for path in ['Ekagrata', 'Sahaja', 'Vigilance']:
-            generate_path_variations(path, args.seeds, args.dry_run)
+            generate_path_variations(path, args.seeds, args.dry_run, args.window, args.batch_size, not args.no_cache, args.shard)
     else:
-        generate_path_variations(args.path, args.seeds, args.dry_run)
+        generate_path_variations(args.path, args.seeds, args.dry_run, args.window, args.batch_size, not args.no_cache, args.shard)
     
     print("\n" + "="*80)
     print("PATH DEFORMATION TEST COMPLETE")
@@ -2,15 +2,12 @@
 """
 Get available checkpoints from ComfyUI
 """
-import urllib.request
-import json
+from comfy.client import get_client
 
 try:
-    response = urllib.request.urlopen("http://127.0.0.1:8188/object_info")
-    data = json.loads(response.read())
+    checkpoints = get_client().catalog.checkpoints()
     
-    if "CheckpointLoaderSimple" in data:
-        checkpoints = data["CheckpointLoaderSimple"]["input"]["required"]["ckpt_name"][0]
+    if checkpoints:
         print("Available checkpoints:")
         for ckpt in checkpoints:
             print(f"  - {ckpt}")
@@ -4,10 +4,11 @@ Batch process PNG images to make white/black backgrounds transparent
 Processes all title images in sets 2-5
 """
 
-from PIL import Image
 import os
 from pathlib import Path
 
+from comfy.postprocess import process_file
+
 def make_transparent(image_path, background_color='white', tolerance=30):
     """
     Make white or black backgrounds transparent
@@ -19,34 +20,10 @@ def make_transparent(image_path, background_color='white', tolerance=30):
     """
     print(f"Processing: {image_path} (removing {background_color})")
     
-    # Open image and convert to RGBA
-    img = Image.open(image_path).convert('RGBA')
-    data = img.getdata()
-    
-    new_data = []
-    
-    for item in data:
-        # Check if pixel is close to white or black
-        if background_color == 'white':
-            # Remove white pixels (all RGB values > 255-tolerance)
-            if item[0] > (255 - tolerance) and item[1] > (255 - tolerance) and item[2] > (255 - tolerance):
-                # Make transparent
-                new_data.append((255, 255, 255, 0))
-            else:
-                new_data.append(item)
-        else:  # black
-            # Remove black pixels (all RGB values < tolerance)
-            if item[0] < tolerance and item[1] < tolerance and item[2] < tolerance:
-                # Make transparent
-                new_data.append((0, 0, 0, 0))
-            else:
-                new_data.append(item)
-    
-    # Update image data
-    img.putdata(new_data)
-    
-    # Save with transparency
-    img.save(image_path, 'PNG')
+    # Clear pixels within `tolerance` of the background (comfy.postprocess "color" key)
+    chain = [{"op": "alpha", "mode": "color", "color": background_color, "tolerance": tolerance - 1},
+             {"op": "encode", "format": "png"}]
+    process_file(Path(image_path), chain)
     print(f"  ✓ Saved: {image_path}")
 
 def main():
@@ -7,16 +7,26 @@ Renames files from ComfyUI output to clean format:
 - Keep only: {stage}_{path}_{vector}.png
 - Organize into proper folder structure
 
+Jobs queued by the generators with --no-wait are recorded in the job
+ledger and saved to their exact paths by `tools/comfy/comfyctl.py collect`;
+this script is for outputs that were rendered outside the ledger.
+
+Files are copied (as reflinks where the filesystem supports them). With
+--link they are hardlinked to ComfyUI's output folder instead: no extra disk
+space, but editing either file in place then changes both.
+
 Usage:
-    python tools/organize_jewel_output.py
+    python tools/organize_jewel_output.py [--link]
 """
 
 import re
 from pathlib import Path
-import shutil
 
-# ComfyUI output directory
-COMFYUI_OUTPUT = Path("D:/AI/ComfyUI/output")
+from comfy.client import default_base_url, default_local_root
+from comfy.localfs import place
+
+# ComfyUI output directory (mcp.comfyui_roots in presets.yml)
+COMFYUI_OUTPUT = (default_local_root(default_base_url()) or Path("D:/AI/ComfyUI")) / "output"
 
 # Project output directory
 PROJECT_OUTPUT = Path(__file__).parent.parent / "AvatarMatrix" / "FullMatrix"
@@ -53,7 +63,7 @@ def parse_filename(filename):
     
     return stage, path, vector
 
-def organize_files(dry_run=False):
+def organize_files(dry_run=False, link=False):
     """Rename and organize files from ComfyUI output."""
     
     if not COMFYUI_OUTPUT.exists():
@@ -98,8 +108,8 @@ def organize_files(dry_run=False):
             # Create directory
             dest_dir.mkdir(parents=True, exist_ok=True)
             
-            # Copy file
-            shutil.copy2(png_file, dest_path)
+            # Copy, or hardlink when asked to (shares the file with ComfyUI's output)
+            place(png_file, dest_path, link=link)
             print(f"✅ {clean_name}")
             print(f"   → {dest_dir.relative_to(PROJECT_OUTPUT.parent)}/")
         
@@ -121,6 +131,8 @@ def main():
     )
     parser.add_argument('--dry-run', action='store_true',
                        help='Preview changes without copying files')
+    parser.add_argument('--link', action='store_true',
+                       help='Hardlink instead of copying (shares the file with ComfyUI output)')
     
     args = parser.parse_args()
     
@@ -132,7 +144,7 @@ def main():
     print(f"Mode: {'DRY RUN' if args.dry_run else 'LIVE'}")
     print()
     
-    organize_files(args.dry_run)
+    organize_files(args.dry_run, args.link)
 
 if __name__ == "__main__":
     main()
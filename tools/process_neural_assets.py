@@ -2,38 +2,16 @@ import os
 import sys
 import json
 import glob
-from PIL import Image, ImageChops
+from pathlib import Path
+
+from comfy.postprocess import process_file
 
 def black_to_alpha(img_path):
     """Converts a black background image to a transparent one with purity filter."""
     try:
-        img = Image.open(img_path).convert("RGBA")
-        
-        # Split into R, G, B, A
-        r, g, b, a = img.split()
-        
-        # Calculate luminosity to use as the new alpha channel
-        # Formula: L = 0.299R + 0.587G + 0.114B
-        l = Image.merge("RGB", (r, g, b)).convert("L")
-        
-        # Apply purity filter: power curve + hard threshold
-        # This kills floor noise (grey boxes in light mode)
-        def purity_filter(p):
-            # Hard threshold: anything below 10 is pure black (alpha=0)
-            if p < 10:
-                return 0
-            # Power curve for smooth glow: A = L^1.8 (amplifies mid-tones)
-            normalized = p / 255.0
-            alpha_val = int((normalized ** 1.8) * 255)
-            return min(255, alpha_val)
-        
-        alpha = l.point(purity_filter)
-        
-        # Merge back with the new alpha
-        new_img = Image.merge("RGBA", (r, g, b, alpha))
-        
+        # Luminance alpha with a hard floor at 10 and an L^1.8 curve (comfy.postprocess "luma")
         out_path = img_path.replace("_black.png", "_alpha.png")
-        new_img.save(out_path, "PNG")
+        process_file(Path(img_path), [{"op": "alpha", "mode": "luma", "threshold": 10, "gamma": 1.8}], Path(out_path))
         print(f"Processed: {os.path.basename(img_path)} -> {os.path.basename(out_path)}")
         return True
     except Exception as e:
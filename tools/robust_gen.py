@@ -1,12 +1,11 @@
 import json
-import urllib.request
-import urllib.parse
 import time
 import uuid
 import os
 from pathlib import Path
 
-COMFYUI_URL = "http://localhost:8188"
+from comfy.client import get_client
+from comfy.harvest import output_tag
 PROJECT_ROOT = Path(r"D:\Unity Apps\immanence-os")
 
 def get_ckpt():
@@ -27,49 +26,29 @@ def generate_one(prompt, filename):
         "9": { "inputs": { "filename_prefix": "ComfyUI", "images": ["8", 0] }, "class_type": "SaveImage" }
     }
 
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
-    
-    with urllib.request.urlopen(req) as r:
-        pid = json.loads(r.read())['prompt_id']
+    client = get_client()
+    pid = client.submit(workflow, extra_data=output_tag("title", {"9": f"light/{filename}"}))
     
     print(f"PROGRESS: Queued {filename} (ID: {pid})")
     
-    start_wait = time.time()
-    while time.time() - start_wait < 300:
-        # Check queue
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/queue") as r:
-                q = json.loads(r.read())
-                if any(item[1] == pid for item in q['queue_running']):
-                    print(f"PROGRESS: Sampling {filename}...")
-                elif any(item[1] == pid for item in q['queue_pending']):
-                    print(f"PROGRESS: {filename} in queue...")
-        except: pass
-        
-        # Check history
-        try:
-            with urllib.request.urlopen(f"{COMFYUI_URL}/history/{pid}") as r:
-                h = json.loads(r.read())
-                if pid in h and h[pid]['outputs']:
-                    img_info = h[pid]['outputs']['9']['images'][0]
-                    img_url = f"{COMFYUI_URL}/view?filename={img_info['filename']}&subfolder={img_info['subfolder']}&type={img_info['type']}"
-                    with urllib.request.urlopen(img_url) as r_img:
-                        out_path = PROJECT_ROOT / "public" / "titles" / "light" / filename
-                        out_path.parent.mkdir(parents=True, exist_ok=True)
-                        with open(out_path, "wb") as f: f.write(r_img.read())
-                    print(f"PROGRESS: SUCCESS - Saved {filename}")
-                    return True
-                elif pid in h:
-                    print(f"PROGRESS: ERROR - ComfyUI finished but produced no output for {filename}")
-                    print(f"DEBUG: Status: {json.dumps(h[pid].get('status', {}))}")
-                    return False
-        except Exception as e: 
-            print(f"DEBUG Error: {e}")
-        time.sleep(5)
-    print(f"PROGRESS: TIMEOUT - {filename}")
-    return False
+    try:
+        result = client.wait(pid, timeout=300)
+    except TimeoutError:
+        print(f"PROGRESS: TIMEOUT - {filename}")
+        return False
+    except Exception as e:
+        print(f"PROGRESS: ERROR - {e}")
+        return False
+
+    if not result.outputs:
+        print(f"PROGRESS: ERROR - ComfyUI finished but produced no output for {filename}")
+        print(f"DEBUG: Status: {json.dumps(result.status)}")
+        return False
+
+    out_path = PROJECT_ROOT / "public" / "titles" / "light" / filename
+    client.download(result.first_image('9'), out_path, verify=True)
+    print(f"PROGRESS: SUCCESS - Saved {filename}")
+    return True
 
 # Mapping Options A-D to Stage assets
 stages = [
@@ -1,8 +1,7 @@
-import json
-import urllib.request
 import uuid
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import ComfyError, get_client
+
 
 def trigger_one(positive_prompt, prefix):
     workflow = {
@@ -29,14 +28,10 @@ def trigger_one(positive_prompt, prefix):
       "4": { "class_type": "CheckpointLoaderSimple", "inputs": { "ckpt_name": "z_image_turbo_bf16.safetensors" } }
     }
     
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
     try:
-        with urllib.request.urlopen(req) as response:
-            res = json.loads(response.read().decode('utf-8'))
-            print(f"Queued {prefix} (ID: {res['prompt_id']})")
-    except Exception as e:
+        prompt_id = get_client().submit(workflow, track=False)
+        print(f"Queued {prefix} (ID: {prompt_id})")
+    except ComfyError as e:
         print(f"Failed: {e}")
 
 p = "A flat 2D vector graphic of the word 'EMBER'. The letters are constructed from sleek, geometric orange and amber facets with subtle paper-cut shadows for a 2.5D minimalist feel. Cream background. Clean serif typography. Single accent of charcoal grey."
@@ -1,8 +1,7 @@
-import json
-import urllib.request
 import uuid
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import ComfyError, get_client
+
 CKPT_NAME = "z-image-turbo-fp8-aio.safetensors"
 VAE_NAME = "ae.safetensors"
 
@@ -33,14 +32,10 @@ def trigger_test(positive_prompt, prefix):
         "9": { "class_type": "SaveImage", "inputs": { "filename_prefix": prefix, "images": ["8", 0] } }
     }
     
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
     try:
-        with urllib.request.urlopen(req) as response:
-            res = json.loads(response.read().decode('utf-8'))
-            print(f"Queued VAE Test {prefix} (ID: {res['prompt_id']})")
-    except Exception as e:
+        prompt_id = get_client().submit(workflow, track=False)
+        print(f"Queued VAE Test {prefix} (ID: {prompt_id})")
+    except ComfyError as e:
         print(f"Failed to queue {prefix}: {e}")
 
 p = "Professional 2D graphic of the word 'EMBER'. Bold, sharp serif typography. Solid fills of burnt orange and amber. Clean white/cream background. Sharpness focus."
@@ -0,0 +1,48 @@
+import functools
+import sys
+from pathlib import Path
+
+import pytest
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+from comfy import client as comfy_client  # noqa: E402
+from comfy.catalog import ObjectInfoCatalog  # noqa: E402
+from standin import StandInComfy  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def catalog_dir(tmp_path, monkeypatch):
+    """Keep fetched /object_info out of the project's .comfy-cache."""
+    root = tmp_path / "object_info"
+    monkeypatch.setattr(comfy_client, "ObjectInfoCatalog", functools.partial(ObjectInfoCatalog, root=root))
+    return root
+
+
+@pytest.fixture
+def make_server():
+    """Factory for started stand-in servers, all stopped after the test."""
+    servers = []
+
+    def make(**options) -> StandInComfy:
+        server = StandInComfy(**options).start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def client_options(tmp_path):
+    """ComfyClient settings that ignore presets.yml and fail fast."""
+    return {
+        "retries": 0,
+        "timeout": 5,
+        "poll_interval": 0.2,
+        "low_water": 4,
+        "validate_workflows": False,
+        "local_root": tmp_path / "ComfyUI",
+    }
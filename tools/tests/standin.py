@@ -0,0 +1,340 @@
+"""
+Minimal stand-in for a ComfyUI server, for tests.
+
+Serves the endpoints ComfyClient and CompletionListener use (`/prompt`,
+`/queue`, `/history`, `/interrupt`, `/view`, `/object_info`, `/models`,
+`/system_stats`) plus a bare `/ws` event stream. Nothing is executed: a test
+queues work through the client, then finishes it with `complete()` or `fail()`,
+which emit the events (and history entries) a real server would.
+"""
+
+import base64
+import hashlib
+import json
+import queue
+import struct
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+
+
+def _frame(payload: bytes, opcode: int = OPCODE_TEXT) -> bytes:
+    """One unmasked, unfragmented server-to-client WebSocket frame."""
+    first = 0x80 | opcode
+    if len(payload) < 126:
+        header = struct.pack("!BB", first, len(payload))
+    elif len(payload) < 1 << 16:
+        header = struct.pack("!BBH", first, 126, len(payload))
+    else:
+        header = struct.pack("!BBQ", first, 127, len(payload))
+    return header + payload
+
+
+def _read_frames(stream, outbox: "queue.Queue[Optional[str]]") -> None:
+    """Discard client frames until the client closes, then have the writer answer it."""
+    try:
+        while True:
+            head = stream.read(2)
+            if len(head) < 2:
+                break
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", stream.read(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", stream.read(8))[0]
+            # Client frames are masked: 4 key bytes precede the payload
+            stream.read(length + (4 if head[1] & 0x80 else 0))
+            if head[0] & 0x0F == OPCODE_CLOSE:
+                break
+    except (OSError, struct.error):
+        pass
+    outbox.put(None)
+
+
+class StandInComfy:
+    """A local HTTP server that records requests and finishes prompts on demand."""
+
+    def __init__(self, checkpoints=("model-a.safetensors",), websocket: bool = True):
+        self.checkpoints = list(checkpoints)
+        # False makes /ws answer 404, as behind a proxy that drops upgrades
+        self.websocket = websocket
+        # (type, subfolder, filename) -> bytes served by /view
+        self.files: Dict[Tuple[str, str, str], bytes] = {}
+        # Status returned by /view regardless of files (e.g. 500 for a broken backend)
+        self.view_status: Optional[int] = None
+        # Bytes of each /view body actually sent before hanging up (simulates a dropped download)
+        self.view_truncate: Optional[int] = None
+        self.prompts: Dict[str, Dict[str, Any]] = {}
+        self.running: List[str] = []
+        self.pending: List[str] = []
+        self.history: Dict[str, Dict[str, Any]] = {}
+        self.deleted: List[str] = []
+        self.interrupted: List[str] = []
+        self.view_requests: List[str] = []
+        self._sockets: Dict[str, "queue.Queue[Optional[str]]"] = {}
+        self._lock = threading.Lock()
+        self._connected = threading.Condition(self._lock)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInComfy":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            sockets = list(self._sockets.values())
+        for outbox in sockets:
+            outbox.put(None)
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ------------------------------------------------------------------
+    # Test controls
+    # ------------------------------------------------------------------
+
+    def queue_item(self, prompt_id: str) -> List[Any]:
+        prompt = self.prompts[prompt_id]
+        return [0, prompt_id, prompt["prompt"], prompt["extra_data"], []]
+
+    def occupy(self, count: int) -> None:
+        """Queue `count` placeholder prompts that belong to nobody."""
+        for _ in range(count):
+            prompt_id = uuid.uuid4().hex
+            with self._lock:
+                self.prompts[prompt_id] = {"prompt": {}, "extra_data": {}, "client_id": None}
+                self.pending.append(prompt_id)
+
+    def wait_for_socket(self, client_id: str, timeout: float = 5.0) -> None:
+        with self._connected:
+            if not self._connected.wait_for(lambda: client_id in self._sockets, timeout):
+                raise AssertionError(f"client {client_id} never opened /ws")
+
+    def emit(self, prompt_id: str, event_type: str, **data: Any) -> None:
+        """Send one event to the socket of the client that queued `prompt_id`."""
+        with self._lock:
+            outbox = self._sockets.get(self.prompts[prompt_id]["client_id"])
+        if outbox is not None:
+            outbox.put(json.dumps({"type": event_type, "data": {"prompt_id": prompt_id, **data}}))
+
+    def _dequeue(self, prompt_id: str) -> None:
+        with self._lock:
+            for items in (self.running, self.pending):
+                if prompt_id in items:
+                    items.remove(prompt_id)
+
+    def complete(
+        self,
+        prompt_id: str,
+        images: Dict[str, List[str]],
+        end_event: str = "executing",
+        history: bool = True,
+        cached: bool = False,
+    ) -> None:
+        """Finish a prompt with `{node_id: [filename, ...]}` outputs.
+
+        Emits `executed` per node (unless `cached`, as for a prompt whose
+        nodes all came from ComfyUI's cache), then the end-of-prompt signal
+        (`executing` with node None, or `execution_success`). With
+        `history=False` the result exists only in the event stream.
+        """
+        outputs = {
+            node: {"images": [{"filename": name, "subfolder": "", "type": "output"} for name in names]}
+            for node, names in images.items()
+        }
+        self._dequeue(prompt_id)
+        if history:
+            with self._lock:
+                self.history[prompt_id] = {
+                    "prompt": [0, prompt_id, self.prompts[prompt_id]["prompt"], {}, list(outputs)],
+                    "outputs": outputs,
+                    "status": {"status_str": "success", "completed": True, "messages": []},
+                }
+        for node, output in ({} if cached else outputs).items():
+            self.emit(prompt_id, "executed", node=node, output=output)
+        if end_event == "executing":
+            self.emit(prompt_id, "executing", node=None)
+        else:
+            self.emit(prompt_id, end_event)
+
+    def fail(self, prompt_id: str, message: str) -> None:
+        """Finish a prompt with an execution error."""
+        self._dequeue(prompt_id)
+        error = {"prompt_id": prompt_id, "node_id": "3", "exception_message": message}
+        with self._lock:
+            self.history[prompt_id] = {
+                "prompt": [0, prompt_id, self.prompts[prompt_id]["prompt"], {}, []],
+                "outputs": {},
+                "status": {"status_str": "error", "completed": False, "messages": [["execution_error", error]]},
+            }
+        self.emit(prompt_id, "execution_error", node_id="3", exception_message=message)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _object_info(self) -> Dict[str, Any]:
+        return {
+            "CheckpointLoaderSimple": {
+                "input": {"required": {"ckpt_name": [list(self.checkpoints)]}},
+                "output": ["MODEL", "CLIP", "VAE"],
+            },
+            "SaveImage": {
+                "input": {"required": {"images": ["IMAGE"], "filename_prefix": ["STRING", {}]}},
+                "output": [],
+            },
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload: Any, status: int = 200) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _view(self, head: bool) -> None:
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                key = (query.get("type", "output"), query.get("subfolder", ""), query.get("filename", ""))
+                server.view_requests.append(key[2])
+                data = server.files.get(key)
+                status = server.view_status or (200 if data is not None else 404)
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data) if status == 200 else 0))
+                self.end_headers()
+                if status == 200 and not head:
+                    if server.view_truncate is not None:
+                        data = data[:server.view_truncate]
+                        self.close_connection = True
+                    self.wfile.write(data)
+
+            def _websocket(self, client_id: str) -> None:
+                if not server.websocket:
+                    self._json({"error": "not found"}, 404)
+                    return
+                key = self.headers.get("Sec-WebSocket-Key", "")
+                accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+                self.send_response(101, "Switching Protocols")
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.wfile.flush()
+                outbox: "queue.Queue[Optional[str]]" = queue.Queue()
+                with server._connected:
+                    server._sockets[client_id] = outbox
+                    server._connected.notify_all()
+                threading.Thread(target=_read_frames, args=(self.rfile, outbox), daemon=True).start()
+                try:
+                    while True:
+                        message = outbox.get()
+                        if message is None:
+                            # Close handshake: answer (or start) it with a normal-closure frame
+                            self.wfile.write(_frame(struct.pack("!H", 1000), OPCODE_CLOSE))
+                            self.wfile.flush()
+                            break
+                        self.wfile.write(_frame(message.encode("utf-8")))
+                        self.wfile.flush()
+                except OSError:
+                    pass
+                with server._lock:
+                    if server._sockets.get(client_id) is outbox:
+                        del server._sockets[client_id]
+                self.close_connection = True
+
+            def do_HEAD(self):
+                if urlparse(self.path).path == "/view":
+                    self._view(head=True)
+                else:
+                    self._json({}, 404)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path = parsed.path
+                query = parse_qs(parsed.query)
+                if path == "/ws":
+                    self._websocket(query.get("clientId", [""])[0])
+                elif path == "/view":
+                    self._view(head=False)
+                elif path == "/system_stats":
+                    self._json({"system": {}, "devices": []})
+                elif path == "/object_info":
+                    self._json(server._object_info())
+                elif path == "/models/checkpoints":
+                    self._json(list(server.checkpoints))
+                elif path.startswith("/models/"):
+                    self._json([])
+                elif path == "/queue":
+                    with server._lock:
+                        self._json({
+                            "queue_running": [server.queue_item(pid) for pid in server.running],
+                            "queue_pending": [server.queue_item(pid) for pid in server.pending],
+                        })
+                elif path.startswith("/history/"):
+                    prompt_id = path[len("/history/"):]
+                    with server._lock:
+                        entry = server.history.get(prompt_id)
+                    self._json({prompt_id: entry} if entry else {})
+                elif path == "/history":
+                    # Newest `max_items` entries, like ComfyUI
+                    limit = int(query.get("max_items", [0])[0]) or None
+                    with server._lock:
+                        items = list(server.history.items())
+                    self._json(dict(items[-limit:] if limit else items))
+                else:
+                    self._json({}, 404)
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                payload = self._body()
+                if path == "/prompt":
+                    prompt_id = uuid.uuid4().hex
+                    with server._lock:
+                        server.prompts[prompt_id] = {
+                            "prompt": payload["prompt"],
+                            "extra_data": payload.get("extra_data", {}),
+                            "client_id": payload.get("client_id"),
+                            "front": payload.get("front", False),
+                        }
+                        server.pending.append(prompt_id)
+                        number = len(server.prompts)
+                    self._json({"prompt_id": prompt_id, "number": number, "node_errors": {}})
+                elif path == "/queue":
+                    deleted = payload.get("delete", [])
+                    with server._lock:
+                        server.deleted += deleted
+                        server.pending = [pid for pid in server.pending if pid not in deleted]
+                    self._json({})
+                elif path == "/interrupt":
+                    with server._lock:
+                        server.interrupted.append(payload.get("prompt_id"))
+                    self._json({})
+                else:
+                    self._json({}, 404)
+
+        return Handler
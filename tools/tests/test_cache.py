@@ -0,0 +1,65 @@
+import os
+
+from comfy.cache import ResultCache, seed_for, workflow_key
+
+
+def graph(prefix="lotus", seed=7):
+    return {
+        "3": {"class_type": "KSampler", "inputs": {"seed": seed, "model": ["4", 0]}},
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sdxl.safetensors"}},
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["3", 0], "filename_prefix": prefix}},
+    }
+
+
+def test_key_ignores_filename_prefix():
+    assert workflow_key(graph(prefix="lotus")) == workflow_key(graph(prefix="immanence/lotus_v2"))
+
+
+def test_key_tracks_inputs_that_change_pixels():
+    assert workflow_key(graph(seed=7)) != workflow_key(graph(seed=8))
+
+
+def test_key_ignores_node_order_and_ui_metadata():
+    workflow = graph()
+    reordered = {node_id: workflow[node_id] for node_id in reversed(list(workflow))}
+    reordered["3"] = dict(workflow["3"], _meta={"title": "Sampler"})
+    assert workflow_key(reordered) == workflow_key(workflow)
+
+
+def test_post_chain_changes_the_key():
+    post = [{"op": "remove_bg"}]
+    assert ResultCache.key(graph()) == workflow_key(graph())
+    assert ResultCache.key(graph(), post) != ResultCache.key(graph())
+
+
+def test_seed_for_is_stable_and_32_bit():
+    assert seed_for("lotus") == seed_for("lotus")
+    assert seed_for("lotus") != seed_for("ember")
+    assert 0 <= seed_for("lotus") < 2 ** 32
+
+
+def test_store_and_restore(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    image = tmp_path / "lotus.png"
+    image.write_bytes(b"pixels")
+    key = cache.key(graph())
+
+    assert cache.restore(key, [tmp_path / "out.png"]) is None
+    cache.store(key, [image], "prompt-1")
+    entry = cache.restore(key, [tmp_path / "restored" / "lotus.png"])
+
+    assert entry.prompt_id == "prompt-1"
+    assert (tmp_path / "restored" / "lotus.png").read_bytes() == b"pixels"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_size_mb=1 / 1024)
+    image = tmp_path / "image.png"
+    image.write_bytes(b"x" * 600)
+    old, new = cache.key(graph(seed=1)), cache.key(graph(seed=2))
+    cache.put(old, [image])
+    os.utime(cache._entry_dir(old) / "entry.json", (0, 0))
+    cache.put(new, [image])
+
+    assert cache.get(old) is None
+    assert cache.get(new) is not None
@@ -0,0 +1,112 @@
+import pytest
+
+from comfy.client import (
+    BULK,
+    DEFAULT_BACKEND,
+    INTERACTIVE,
+    NORMAL,
+    PRIORITY_KEY,
+    RUN_KEY,
+    ComfyClient,
+    ComfyError,
+    default_backends,
+    default_base_url,
+)
+
+GRAPH = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "model-a.safetensors"}},
+    "9": {"class_type": "SaveImage", "inputs": {"images": ["4", 0], "filename_prefix": "lotus"}},
+}
+
+
+@pytest.fixture
+def server(make_server):
+    return make_server()
+
+
+@pytest.fixture
+def client(server, client_options):
+    with ComfyClient(server.url, run_id="run-1", **client_options) as client:
+        yield client
+
+
+def test_submissions_carry_run_priority_and_client_id(server, client):
+    tracked = client.submit(GRAPH)
+    untracked = client.submit(GRAPH, track=False, priority=INTERACTIVE)
+
+    assert server.prompts[tracked]["prompt"] == GRAPH
+    assert server.prompts[tracked]["extra_data"] == {RUN_KEY: "run-1", PRIORITY_KEY: NORMAL}
+    assert server.prompts[tracked]["client_id"] == client.listener.client_id
+    assert not server.prompts[tracked]["front"]
+    # Fire-and-forget prompts have no listener; interactive ones jump the queue
+    assert server.prompts[untracked]["client_id"] is None
+    assert server.prompts[untracked]["front"]
+    assert server.prompts[untracked]["extra_data"][PRIORITY_KEY] == INTERACTIVE
+
+
+def test_unknown_priority_is_rejected(client):
+    with pytest.raises(ValueError, match="Unknown priority"):
+        client.submit(GRAPH, priority="urgent")
+
+
+def test_run_waits_and_downloads(server, client, tmp_path):
+    server.files[("output", "", "lotus_00001_.png")] = b"pixels"
+    prompt_id = client.submit(GRAPH)
+    server.wait_for_socket(client.listener.client_id)
+    server.complete(prompt_id, {"9": ["lotus_00001_.png"]})
+
+    result = client.wait(prompt_id, timeout=5)
+    assert result.base_url == server.url
+    assert client.fetch(result.first_image()) == b"pixels"
+    assert client.download(result.first_image(), tmp_path / "out" / "lotus.png").read_bytes() == b"pixels"
+
+
+def test_invalid_graph_is_rejected_before_submission(server, client_options):
+    options = dict(client_options, validate_workflows=True)
+    good = {"4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "model-a.safetensors"}}}
+    bad = {"4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "missing.safetensors"}}}
+    with ComfyClient(server.url, **options) as client:
+        with pytest.raises(ComfyError, match="rejected before submission"):
+            client.submit(bad)
+        client.submit(good, track=False)
+    assert len(server.prompts) == 1
+
+
+def test_cancel_run_only_touches_this_run(server, client, client_options):
+    with ComfyClient(server.url, run_id="run-2", **client_options) as other:
+        theirs = other.submit(GRAPH, track=False)
+    ours = [client.submit(GRAPH, track=False) for _ in range(2)]
+    server.pending.remove(ours[0])
+    server.running.append(ours[0])
+
+    assert sorted(client.run_prompts()) == sorted(ours)
+    assert sorted(client.cancel_run()) == sorted(ours)
+    assert server.interrupted == [ours[0]]
+    assert server.deleted == [ours[1]]
+    assert server.pending == [theirs]
+
+
+def test_bulk_waits_for_a_free_slot(server, client):
+    server.occupy(4)
+    client.low_water = 4
+    pending = server.pending[:]
+
+    def drain(_timeout):
+        server.pending.remove(pending.pop())
+        return True
+
+    # Each wait drains one placeholder; the bulk prompt goes in once 3 remain
+    client.listener.wait_for_status = drain
+    client.submit(GRAPH, priority=BULK)
+    assert len(server.pending) == 4
+
+
+def test_backend_url_comes_from_presets(tmp_path):
+    (tmp_path / "presets.yml").write_text(
+        "mcp:\n  comfyui_backend: http://gpu-a:8188\n  comfyui_backends: [http://gpu-a:8188, http://gpu-b:8188]\n",
+        encoding="utf-8",
+    )
+    assert default_base_url(tmp_path) == "http://gpu-a:8188"
+    assert default_backends(tmp_path) == ["http://gpu-a:8188", "http://gpu-b:8188"]
+    assert default_base_url(tmp_path / "missing") == DEFAULT_BACKEND
+    assert default_backends(tmp_path / "missing") == [DEFAULT_BACKEND]
@@ -0,0 +1,103 @@
+import pytest
+
+from comfy.client import ComfyClient
+from comfy.completion import ComfyExecutionError
+
+GRAPH = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "model-a.safetensors"}},
+    "9": {"class_type": "SaveImage", "inputs": {"images": ["4", 0], "filename_prefix": "lotus"}},
+}
+
+
+@pytest.fixture
+def server(make_server):
+    return make_server()
+
+
+@pytest.fixture
+def client(server, client_options):
+    with ComfyClient(server.url, **client_options) as client:
+        yield client
+
+
+def submit(server, client):
+    prompt_id = client.submit(GRAPH)
+    server.wait_for_socket(client.listener.client_id)
+    return prompt_id
+
+
+@pytest.mark.parametrize("end_event", ["executing", "execution_success"])
+def test_events_resolve_without_history(server, client, end_event):
+    prompt_id = submit(server, client)
+    server.complete(prompt_id, {"9": ["lotus_00001_.png"]}, end_event=end_event, history=False)
+
+    result = client.wait(prompt_id, timeout=5)
+    assert client.listener.connected
+    assert [image.filename for image in result.images("9")] == ["lotus_00001_.png"]
+    assert result.status["status_str"] == "success"
+
+
+def test_end_event_without_outputs_reads_history(server, client):
+    # Fully cached prompts end without `executed`; history has the outputs
+    prompt_id = submit(server, client)
+    server.complete(prompt_id, {"9": ["lotus_00001_.png"]}, cached=True)
+
+    assert client.wait(prompt_id, timeout=5).first_image().filename == "lotus_00001_.png"
+
+
+def test_execution_error_raises(server, client):
+    prompt_id = submit(server, client)
+    server.fail(prompt_id, "CUDA out of memory")
+
+    with pytest.raises(ComfyExecutionError, match="CUDA out of memory") as error:
+        client.wait(prompt_id, timeout=5)
+    assert error.value.prompt_id == prompt_id
+
+
+def test_polls_history_when_the_event_stream_is_unavailable(make_server, client_options):
+    server = make_server(websocket=False)
+    with ComfyClient(server.url, **client_options) as client:
+        prompt_id = client.submit(GRAPH)
+        assert not client.listener.connected
+        server.complete(prompt_id, {"9": ["lotus_00001_.png"]})
+
+        assert client.wait(prompt_id, timeout=5).first_image().filename == "lotus_00001_.png"
+
+
+def test_polled_error_raises(make_server, client_options):
+    server = make_server(websocket=False)
+    with ComfyClient(server.url, **client_options) as client:
+        prompt_id = client.submit(GRAPH)
+        server.fail(prompt_id, "bad latent")
+
+        with pytest.raises(ComfyExecutionError, match="bad latent"):
+            client.wait(prompt_id, timeout=5)
+
+
+def test_timeout_deletes_a_pending_prompt(server, client):
+    prompt_id = submit(server, client)
+
+    with pytest.raises(TimeoutError):
+        client.wait(prompt_id, timeout=0.3)
+    assert server.deleted == [prompt_id]
+    assert server.pending == []
+
+
+def test_timeout_interrupts_a_running_prompt(server, client):
+    prompt_id = submit(server, client)
+    server.pending.remove(prompt_id)
+    server.running.append(prompt_id)
+
+    with pytest.raises(TimeoutError):
+        client.wait(prompt_id, timeout=0.3)
+    assert server.interrupted == [prompt_id]
+    assert server.deleted == []
+
+
+def test_timeout_can_leave_the_prompt_queued(server, client):
+    prompt_id = submit(server, client)
+
+    with pytest.raises(TimeoutError):
+        client.wait(prompt_id, timeout=0.3, cancel_on_timeout=False)
+    assert server.deleted == []
+    assert server.pending == [prompt_id]
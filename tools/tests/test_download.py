@@ -0,0 +1,73 @@
+import io
+
+import pytest
+import requests
+from PIL import Image
+
+from comfy.client import ComfyClient, ComfyError, ImageRef, verify_image
+
+NAME = "lotus_00001_.png"
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "gold").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def server(make_server):
+    server = make_server()
+    server.files[("output", "", NAME)] = png_bytes()
+    return server
+
+
+@pytest.fixture
+def client(server, client_options):
+    with ComfyClient(server.url, **client_options) as client:
+        yield client
+
+
+def leftovers(directory):
+    return sorted(path.name for path in directory.iterdir() if path.name.endswith(".tmp"))
+
+
+def test_download_streams_into_place(server, client, tmp_path):
+    target = tmp_path / "public" / "lotus.png"
+    assert client.download(ImageRef(NAME), target, verify=True) == target
+    assert target.read_bytes() == server.files[("output", "", NAME)]
+    assert leftovers(target.parent) == []
+
+
+def test_dropped_download_keeps_the_previous_file(server, client, tmp_path):
+    target = tmp_path / "lotus.png"
+    target.write_bytes(b"previous")
+    server.view_truncate = 10
+
+    with pytest.raises((ComfyError, requests.RequestException)):
+        client.download(ImageRef(NAME), target)
+    assert target.read_bytes() == b"previous"
+    assert leftovers(tmp_path) == []
+
+
+def test_undecodable_image_is_not_placed(server, client, tmp_path):
+    server.files[("output", "", NAME)] = b"not a png at all"
+    target = tmp_path / "lotus.png"
+
+    with pytest.raises(ComfyError, match="lotus_00001_.png"):
+        client.download(ImageRef(NAME), target, verify=True)
+    assert not target.exists()
+    assert leftovers(tmp_path) == []
+
+
+def test_missing_image_raises(client, tmp_path):
+    with pytest.raises(requests.HTTPError):
+        client.download(ImageRef("missing.png"), tmp_path / "missing.png")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_verify_image_rejects_truncated_files(tmp_path):
+    path = tmp_path / "cut.png"
+    path.write_bytes(png_bytes()[:-20])
+    with pytest.raises(ComfyError):
+        verify_image(path, "cut.png")
@@ -0,0 +1,76 @@
+import pytest
+
+from comfy.client import ComfyClient
+from comfy.ledger import DONE, FAILED, LOST, QUEUED, SUBMITTED, JobLedger, history_sweep, prompt_status
+
+
+def graph(seed=7, prompt="lotus", prefix="lotus"):
+    return {
+        "3": {"class_type": "KSampler", "inputs": {"seed": seed, "model": ["4", 0]}},
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sdxl.safetensors"}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": prompt, "clip": ["4", 1]}},
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["3", 0], "filename_prefix": prefix}},
+    }
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = JobLedger(tmp_path / "ledger.sqlite")
+    yield ledger
+    ledger.close()
+
+
+def test_seeded_jobs_match_only_the_same_graph(ledger, tmp_path):
+    output = tmp_path / "lotus.png"
+    ledger.submitted("lotus", [output], graph(seed=7), "prompt-1", "9")
+
+    entry = ledger.find(output, graph(seed=7, prefix="renamed"))
+    assert entry.prompt_id == "prompt-1"
+    assert entry.state == SUBMITTED
+    assert ledger.find(output, graph(seed=8)) is None
+    assert ledger.find(tmp_path / "ember.png", graph(seed=7)) is None
+
+
+def test_unseeded_jobs_match_any_earlier_seed(ledger, tmp_path):
+    output = tmp_path / "lotus.png"
+    ledger.submitted("lotus", [output], graph(seed=7), "prompt-1", "9")
+
+    assert ledger.find(output, graph(seed=12345), seeded=False).prompt_id == "prompt-1"
+    # Anything besides the seed still has to match
+    assert ledger.find(output, graph(seed=12345, prompt="ember"), seeded=False) is None
+
+
+def test_entries_keep_packed_graph_post_chain_and_state(ledger, tmp_path):
+    paths = [tmp_path / "lotus_0.png", tmp_path / "lotus_1.png"]
+    packed = {"0_3": graph()["3"]}
+    ledger.submitted("lotus", paths, graph(), "prompt-1", "0_9", packed_workflow=packed, post=[{"op": "webp"}])
+    ledger.submitted("ember", [tmp_path / "ember.png"], graph(prompt="ember"), "prompt-2", "9")
+    ledger.mark(paths[0], FAILED, "CUDA out of memory")
+
+    entry = ledger.find(paths[0], graph())
+    assert entry.output_paths == paths
+    assert entry.workflow == packed
+    assert entry.post == [{"op": "webp"}]
+    assert (entry.state, entry.error) == (FAILED, "CUDA out of memory")
+    assert [e.name for e in ledger.entries()] == ["lotus", "ember"]
+    assert [e.name for e in ledger.entries(SUBMITTED)] == ["ember"]
+
+
+def test_prompt_status_and_history_sweep(make_server, client_options):
+    server = make_server()
+    with ComfyClient(server.url, **client_options) as client:
+        done, failed, queued = (client.submit(graph(seed=seed), track=False) for seed in (1, 2, 3))
+        server.complete(done, {"9": ["lotus_00001_.png"]})
+        server.fail(failed, "bad latent")
+        # Older entries that push the wanted ones past the first page
+        for seed in range(4, 8):
+            server.complete(client.submit(graph(seed=seed), track=False), {"9": ["x.png"]})
+
+        assert prompt_status(client, done) == (DONE, server.history[done]["outputs"])
+        assert prompt_status(client, failed) == (FAILED, {})
+        assert prompt_status(client, queued) == (QUEUED, {})
+        assert prompt_status(client, "forgotten") == (LOST, {})
+        assert prompt_status(client, None) == (LOST, {})
+
+        swept = history_sweep(client, [done, failed, queued], page_size=2)
+        assert swept.keys() == {done, failed}
@@ -0,0 +1,91 @@
+import pytest
+
+from comfy.packing import pack
+
+
+def txt2img(prompt, prefix, negative="blurry", seed=1):
+    return {
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sdxl.safetensors"}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": prompt, "clip": ["4", 1]}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": negative, "clip": ["4", 1]}},
+        "3": {
+            "class_type": "KSampler",
+            "inputs": {"model": ["4", 0], "positive": ["6", 0], "negative": ["7", 0], "seed": seed},
+        },
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["3", 0], "filename_prefix": prefix}},
+    }
+
+
+def test_single_workflow_is_unchanged():
+    workflow = txt2img("lotus", "lotus")
+    packed = pack([workflow])
+    assert packed.workflow is workflow
+    assert packed.node_maps == [{node_id: node_id for node_id in workflow}]
+
+
+def test_shared_nodes_merge_and_outputs_stay_separate():
+    packed = pack([txt2img("lotus", "lotus"), txt2img("ember", "ember")])
+    classes = sorted(node["class_type"] for node in packed.workflow.values())
+
+    # One checkpoint and one negative encode serve both subgraphs
+    assert classes == [
+        "CLIPTextEncode", "CLIPTextEncode", "CLIPTextEncode",
+        "CheckpointLoaderSimple",
+        "KSampler", "KSampler",
+        "SaveImage", "SaveImage",
+    ]
+    lotus, ember = packed.node_maps
+    assert lotus["4"] == ember["4"] == "0_4"
+    assert lotus["7"] == ember["7"]
+    assert lotus["6"] != ember["6"]
+    assert packed.workflow[ember["3"]]["inputs"]["positive"] == [ember["6"], 0]
+    assert packed.workflow[ember["3"]]["inputs"]["model"] == ["0_4", 0]
+    assert packed.workflow[lotus["9"]]["inputs"]["filename_prefix"] == "lotus"
+    assert packed.workflow[ember["9"]]["inputs"]["filename_prefix"] == "ember"
+
+
+def test_identical_subgraphs_keep_one_output_each():
+    packed = pack([txt2img("lotus", "lotus"), txt2img("lotus", "lotus")])
+    assert len(packed) == 2
+    # Everything but the two SaveImage nodes is shared
+    assert len(packed.workflow) == 6
+    assert packed.node_maps[0]["3"] == packed.node_maps[1]["3"]
+    assert packed.node_maps[0]["9"] != packed.node_maps[1]["9"]
+
+
+def test_split_outputs_restores_original_node_ids():
+    packed = pack([txt2img("lotus", "lotus"), txt2img("ember", "ember")])
+    lotus, ember = packed.node_maps
+    outputs = {
+        lotus["9"]: {"images": [{"filename": "lotus_00001_.png"}]},
+        ember["9"]: {"images": [{"filename": "ember_00001_.png"}]},
+    }
+
+    assert packed.split_outputs(outputs) == [
+        {"9": {"images": [{"filename": "lotus_00001_.png"}]}},
+        {"9": {"images": [{"filename": "ember_00001_.png"}]}},
+    ]
+
+
+def test_nodes_listed_before_their_inputs_are_linked_correctly():
+    # Node order in the dict must not matter; links are remapped in dependency order
+    workflow = {
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0], "filename_prefix": "a"}},
+        "8": {"class_type": "VAEDecode", "inputs": {"samples": ["5", 0], "vae": ["4", 2]}},
+        "5": {"class_type": "EmptyLatentImage", "inputs": {"width": 512, "height": 512, "batch_size": 1}},
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sdxl.safetensors"}},
+    }
+    other = dict(workflow, **{"9": dict(workflow["9"], inputs={"images": ["8", 0], "filename_prefix": "b"})})
+    packed = pack([workflow, other])
+    second = packed.node_maps[1]
+    assert packed.workflow[second["9"]]["inputs"]["images"] == ["0_8", 0]
+    assert packed.workflow["0_8"]["inputs"] == {"samples": ["0_5", 0], "vae": ["0_4", 2]}
+
+
+def test_cycles_are_rejected():
+    workflow = {
+        "1": {"class_type": "Reroute", "inputs": {"input": ["2", 0]}},
+        "2": {"class_type": "Reroute", "inputs": {"input": ["1", 0]}},
+    }
+    with pytest.raises(ValueError, match="cycle"):
+        pack([workflow, workflow])
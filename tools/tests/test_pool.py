@@ -0,0 +1,104 @@
+import pytest
+
+from comfy.client import ComfyError, ImageRef
+from comfy.pool import BackendPool
+
+OUTPUT = "lotus_00001_.png"
+
+
+def graph(checkpoint="model-a.safetensors"):
+    return {
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": checkpoint}},
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["4", 0], "filename_prefix": "lotus"}},
+    }
+
+
+@pytest.fixture
+def servers(make_server):
+    return make_server(), make_server()
+
+
+@pytest.fixture
+def pool(servers, client_options):
+    with BackendPool([server.url for server in servers], **client_options) as pool:
+        yield pool
+
+
+def test_pick_prefers_the_shorter_queue(servers, pool):
+    a, b = servers
+    a.occupy(2)
+    assert pool.pick(graph()).base_url == b.url
+    b.occupy(3)
+    assert pool.pick(graph()).base_url == a.url
+
+
+def test_pick_skips_backends_missing_a_model(make_server, client_options):
+    a = make_server(checkpoints=["model-a.safetensors"])
+    b = make_server(checkpoints=["model-a.safetensors", "model-b.safetensors"])
+    b.occupy(3)
+    with BackendPool([a.url, b.url], **client_options) as pool:
+        backend_a, backend_b = pool.backends
+        assert not pool.has_models(backend_a, graph("model-b.safetensors"))
+        assert pool.has_models(backend_b, graph("model-b.safetensors"))
+        # Busier, but the only one that can load the checkpoint
+        assert pool.pick(graph("model-b.safetensors")) is backend_b
+        with pytest.raises(ComfyError, match="has the models"):
+            pool.pick(graph("model-c.safetensors"))
+
+
+def test_results_are_fetched_from_the_backend_that_ran_them(servers, pool, client_options, tmp_path):
+    a, b = servers
+    # Same file name on both servers; only a's copy belongs to this prompt
+    a.files[("output", "", OUTPUT)] = b"from a"
+    b.files[("output", "", OUTPUT)] = b"from b"
+    b.occupy(1)
+
+    prompt_id = pool.submit(graph())
+    assert pool.backend_for(prompt_id).base_url == a.url
+    a.complete(prompt_id, {"9": [OUTPUT]})
+    result = pool.wait(prompt_id, timeout=5)
+
+    image = result.first_image()
+    assert image.base_url == a.url
+    assert pool.fetch(image) == b"from a"
+    assert pool.download(image, tmp_path / "lotus.png").read_bytes() == b"from a"
+    assert b.view_requests == []
+
+    # A pool that did not submit the prompt finds its owner via /history
+    with BackendPool([b.url, a.url], **client_options) as other:
+        assert other.backend_for(prompt_id).base_url == a.url
+
+
+def test_unowned_images_fail_over_to_the_next_backend(servers, pool):
+    a, b = servers
+    a.view_status = 500
+    b.files[("output", "", OUTPUT)] = b"from b"
+
+    assert pool.fetch(ImageRef(OUTPUT)) == b"from b"
+    assert a.view_requests == [OUTPUT]
+
+    b.view_status = 500
+    with pytest.raises(ComfyError, match="No backend could serve"):
+        pool.fetch(ImageRef(OUTPUT))
+
+
+def test_owned_images_do_not_fall_back_to_other_backends(servers, pool):
+    a, b = servers
+    b.files[("output", "", OUTPUT)] = b"from b"
+
+    with pytest.raises(ComfyError, match="No backend could serve"):
+        pool.fetch(ImageRef(OUTPUT, base_url=a.url))
+    assert b.view_requests == []
+
+
+def test_upload_image_requires_one_name_on_every_backend(pool, tmp_path, monkeypatch):
+    plate = tmp_path / "plate.png"
+    plate.write_bytes(b"plate")
+    first, second = pool.backends
+    monkeypatch.setattr(first, "upload_image", lambda path, **options: "immanence/abc.png")
+    monkeypatch.setattr(second, "upload_image", lambda path, **options: "immanence/abc.png")
+    assert pool.upload_image(plate) == "immanence/abc.png"
+
+    monkeypatch.setattr(second, "upload_image", lambda path, **options: "immanence/abc (1).png")
+    with pytest.raises(ComfyError, match="different names"):
+        pool.upload_image(plate)
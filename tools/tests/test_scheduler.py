@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from comfy.scheduler import run_after, schedule, warmup_workflow
+
+
+def job(checkpoint, width=1024, height=1024, prefix="asset"):
+    return {
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": checkpoint}},
+        "5": {"class_type": "EmptyLatentImage", "inputs": {"width": width, "height": height, "batch_size": 4}},
+        "3": {
+            "class_type": "KSampler",
+            "inputs": {"model": ["4", 0], "latent_image": ["5", 0], "steps": 30, "seed": 1},
+        },
+        "8": {"class_type": "VAEDecode", "inputs": {"samples": ["3", 0], "vae": ["4", 2]}},
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0], "filename_prefix": prefix}},
+    }
+
+
+def test_groups_by_model_then_resolution_in_first_seen_order():
+    jobs = [
+        job("a.safetensors"),
+        job("b.safetensors"),
+        job("a.safetensors", 512, 512),
+        job("b.safetensors"),
+        job("a.safetensors"),
+    ]
+    plan = schedule(jobs, workflow_of=lambda workflow: workflow)
+
+    assert [group.indices for group in plan.groups] == [[0, 4], [2], [1, 3]]
+    assert plan.order == [0, 4, 2, 1, 3]
+    assert (plan.swaps_before, plan.swaps_after, plan.swaps_avoided) == (4, 1, 3)
+    assert "2 model sets" in plan.report()
+
+
+def test_linked_loader_inputs_do_not_split_groups():
+    # A LoRA's model/clip links differ between graphs; only its settings count
+    def with_lora(model_link):
+        workflow = job("a.safetensors")
+        workflow["10"] = {
+            "class_type": "LoraLoader",
+            "inputs": {"model": model_link, "clip": ["4", 1], "lora_name": "gold.safetensors"},
+        }
+        return workflow
+
+    plan = schedule([with_lora(["4", 0]), with_lora(["11", 0])], workflow_of=lambda workflow: workflow)
+    assert len(plan.groups) == 1
+
+
+def test_warmup_is_a_one_step_thumbnail_preview():
+    workflow = job("a.safetensors")
+    warmup = warmup_workflow(workflow)
+
+    assert warmup["3"]["inputs"]["steps"] == 1
+    assert warmup["5"]["inputs"] == {"width": 64, "height": 64, "batch_size": 1}
+    assert warmup["9"] == {"class_type": "PreviewImage", "inputs": {"images": ["8", 0]}}
+    assert warmup["4"] == workflow["4"]
+    # The original graph is left alone
+    assert workflow["3"]["inputs"]["steps"] == 30
+    assert workflow["9"]["class_type"] == "SaveImage"
+
+
+def test_warmup_needs_a_sampler():
+    workflow = {"4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "a.safetensors"}}}
+    assert warmup_workflow(workflow) is None
+
+
+def test_run_after_waits_for_failed_futures_too():
+    release = threading.Event()
+    order = []
+
+    def failing():
+        release.wait(5)
+        order.append("warmup")
+        raise RuntimeError("warm-up failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        warmup = pool.submit(failing)
+        chained = pool.submit(run_after, [warmup], order.append, "job")
+        release.set()
+        chained.result(timeout=5)
+
+    assert order == ["warmup", "job"]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from comfy.shard import Shard, combination_key, matrix_root, verify, write_manifest
+
+COUNT = 3
+
+
+def cells(root):
+    """(output path, prompt) of a small stage × path matrix, two seeds per combination."""
+    return [
+        (root / stage / path / f"seed{seed}.png", f"{stage} {path} avatar")
+        for stage in ("seedling", "ember", "radiance")
+        for path in ("soma", "prana")
+        for seed in (1, 2)
+    ]
+
+
+def run_shards(root):
+    """Write every shard's images, metadata and manifest as the workers would."""
+    matrix = cells(root)
+    paths = [path for path, _ in matrix]
+    base = matrix_root(paths)
+    for index in range(1, COUNT + 1):
+        shard = Shard(index, COUNT)
+        own = [path for path, prompt in matrix if shard.owns(combination_key(path, prompt, base))]
+        for path in own:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"png")
+            path.with_suffix(".json").write_text("{}", encoding="utf-8")
+        write_manifest(shard, paths, own)
+    return base
+
+
+def test_parse_and_bounds():
+    assert Shard.parse("2/4") == Shard(2, 4)
+    assert str(Shard(2, 4)) == "2/4"
+    assert Shard(2, 4).manifest_name == "shard-2of4.json"
+    for text in ("0/4", "5/4", "1/0", "2", "a/b"):
+        with pytest.raises(ValueError):
+            Shard.parse(text)
+
+
+def test_every_key_has_exactly_one_owner():
+    keys = [f"stage{i}/path\nprompt {i}" for i in range(50)]
+    shards = [Shard(index, COUNT) for index in range(1, COUNT + 1)]
+    for key in keys:
+        assert sum(shard.owns(key) for shard in shards) == 1
+    # Every shard gets work from a matrix of this size
+    assert all(any(shard.owns(key) for key in keys) for shard in shards)
+
+
+def test_seeds_of_a_combination_share_a_shard(tmp_path):
+    matrix = cells(tmp_path)
+    base = matrix_root([path for path, _ in matrix])
+    keys = {path: combination_key(path, prompt, base) for path, prompt in matrix}
+    assert keys[tmp_path / "ember" / "soma" / "seed1.png"] == keys[tmp_path / "ember" / "soma" / "seed2.png"]
+    assert keys[tmp_path / "ember" / "soma" / "seed1.png"] != keys[tmp_path / "ember" / "prana" / "seed1.png"]
+
+
+def test_complete_merge_verifies(tmp_path):
+    assert verify(run_shards(tmp_path)) == []
+
+
+def test_missing_image_metadata_and_manifest_are_reported(tmp_path):
+    base = run_shards(tmp_path)
+    (base / "ember" / "soma" / "seed1.png").unlink()
+    (base / "ember" / "prana" / "seed2.json").unlink()
+    # Drop a manifest that does not list either damaged image
+    damaged = {"ember/soma/seed1.png", "ember/prana/seed2.png"}
+    dropped = next(
+        path for path in sorted(base.glob("shard-*.json"))
+        if not damaged & set(json.loads(path.read_text(encoding="utf-8"))["outputs"])
+    )
+    dropped.unlink()
+
+    problems = "\n".join(verify(base))
+    assert "ember/soma/seed1.png" in problems and "is missing" in problems
+    assert "ember/prana/seed2.png" in problems and "has no metadata" in problems
+    assert f"missing manifest for shard {dropped.name[6]}/3" in problems
+    assert "slices cover" in problems
+
+
+def test_overlapping_slices_are_reported(tmp_path):
+    base = run_shards(tmp_path)
+    first = json.loads((base / "shard-1of3.json").read_text(encoding="utf-8"))
+    second_path = base / "shard-2of3.json"
+    second = json.loads(second_path.read_text(encoding="utf-8"))
+    second["outputs"].append(first["outputs"][0])
+    second_path.write_text(json.dumps(second), encoding="utf-8")
+
+    assert any("produced by shards" in problem for problem in verify(base))
+
+
+def test_manifests_from_different_matrices_are_reported(tmp_path):
+    base = run_shards(tmp_path)
+    manifest_path = base / "shard-1of3.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["matrix"] = "0" * 64
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    assert any("different matrices" in problem for problem in verify(base))
+
+
+def test_no_manifests(tmp_path):
+    assert verify(tmp_path) == [f"No shard manifests under {tmp_path}"]
@@ -0,0 +1,156 @@
+import json
+
+import pytest
+
+from comfy import workflow as workflow_module
+from comfy.workflow import compile_workflow, load_workflow, map_widgets
+
+INFO = {
+    "CheckpointLoaderSimple": {
+        "input": {"required": {"ckpt_name": [["sdxl.safetensors"]]}},
+        "output": ["MODEL", "CLIP", "VAE"],
+    },
+    "LoraLoader": {
+        "input": {"required": {
+            "model": ["MODEL"], "clip": ["CLIP"], "lora_name": [["gold.safetensors"]],
+            "strength_model": ["FLOAT", {}], "strength_clip": ["FLOAT", {}],
+        }},
+        "output": ["MODEL", "CLIP"],
+    },
+    "CLIPTextEncode": {
+        "input": {"required": {"text": ["STRING", {"multiline": True}], "clip": ["CLIP"]}},
+        "output": ["CONDITIONING"],
+    },
+    "EmptyLatentImage": {
+        "input": {"required": {"width": ["INT", {}], "height": ["INT", {}], "batch_size": ["INT", {}]}},
+        "output": ["LATENT"],
+    },
+    "KSampler": {
+        "input": {"required": {
+            "model": ["MODEL"], "seed": ["INT", {"control_after_generate": True}], "steps": ["INT", {}],
+            "positive": ["CONDITIONING"], "latent_image": ["LATENT"],
+        }},
+        "output": ["LATENT"],
+    },
+    "VAEDecode": {"input": {"required": {"samples": ["LATENT"], "vae": ["VAE"]}}, "output": ["IMAGE"]},
+    "SaveImage": {
+        "input": {"required": {"images": ["IMAGE"], "filename_prefix": ["STRING", {}]}},
+        "output": [],
+        "output_node": True,
+    },
+    "LoadImage": {
+        "input": {"required": {"image": [["plate.png"], {"image_upload": True}]}},
+        "output": ["IMAGE", "MASK"],
+    },
+}
+
+
+def ui_node(node_id, node_type, widgets=(), inputs=(), outputs=(), mode=0):
+    return {
+        "id": node_id,
+        "type": node_type,
+        "mode": mode,
+        "widgets_values": list(widgets),
+        "inputs": [{"name": name, "type": kind, "link": link} for name, kind, link in inputs],
+        "outputs": [{"name": kind, "type": kind} for kind in outputs],
+    }
+
+
+def canvas():
+    """Checkpoint → bypassed LoRA → Reroute → prompt fed by a Primitive → sampler → SaveImage.
+
+    Plus a note, a muted SaveImage and an unconnected latent, none of which reach the API graph.
+    """
+    return {
+        "nodes": [
+            ui_node(4, "CheckpointLoaderSimple", ["sdxl.safetensors"], outputs=["MODEL", "CLIP", "VAE"]),
+            ui_node(10, "LoraLoader", ["gold.safetensors", 1.0, 1.0],
+                    inputs=[("model", "MODEL", 1), ("clip", "CLIP", 2)], outputs=["MODEL", "CLIP"], mode=4),
+            ui_node(11, "Reroute", inputs=[("", "*", 3)], outputs=["CLIP"]),
+            ui_node(12, "PrimitiveNode", ["lotus at dawn", "fixed"], outputs=["STRING"]),
+            ui_node(6, "CLIPTextEncode", ["stale text"],
+                    inputs=[("clip", "CLIP", 4), ("text", "STRING", 5)], outputs=["CONDITIONING"]),
+            ui_node(5, "EmptyLatentImage", [512, 768, 1], outputs=["LATENT"]),
+            ui_node(3, "KSampler", [42, "randomize", 20],
+                    inputs=[("model", "MODEL", 6), ("positive", "CONDITIONING", 7), ("latent_image", "LATENT", 8)],
+                    outputs=["LATENT"]),
+            ui_node(8, "VAEDecode", inputs=[("samples", "LATENT", 9), ("vae", "VAE", 10)], outputs=["IMAGE"]),
+            ui_node(9, "SaveImage", ["lotus"], inputs=[("images", "IMAGE", 11)]),
+            ui_node(20, "Note", ["Gold LoRA is off for this pass"]),
+            ui_node(21, "SaveImage", ["debug"], inputs=[("images", "IMAGE", 12)], mode=2),
+            ui_node(22, "EmptyLatentImage", [64, 64, 1], outputs=["LATENT"]),
+        ],
+        # [id, source node, source slot, target node, target slot, type]
+        "links": [
+            [1, 4, 0, 10, 0, "MODEL"],
+            [2, 4, 1, 10, 1, "CLIP"],
+            [3, 10, 1, 11, 0, "CLIP"],
+            [4, 11, 0, 6, 0, "CLIP"],
+            [5, 12, 0, 6, 1, "STRING"],
+            [6, 10, 0, 3, 0, "MODEL"],
+            [7, 6, 0, 3, 1, "CONDITIONING"],
+            [8, 5, 0, 3, 2, "LATENT"],
+            [9, 3, 0, 8, 0, "LATENT"],
+            [10, 4, 2, 8, 1, "VAE"],
+            [11, 8, 0, 9, 0, "IMAGE"],
+            [12, 8, 0, 21, 0, "IMAGE"],
+        ],
+    }
+
+
+EXPECTED = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sdxl.safetensors"}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "lotus at dawn", "clip": ["4", 1]}},
+    "5": {"class_type": "EmptyLatentImage", "inputs": {"width": 512, "height": 768, "batch_size": 1}},
+    "3": {
+        "class_type": "KSampler",
+        "inputs": {"seed": 42, "steps": 20, "model": ["4", 0], "positive": ["6", 0], "latent_image": ["5", 0]},
+    },
+    "8": {"class_type": "VAEDecode", "inputs": {"samples": ["3", 0], "vae": ["4", 2]}},
+    "9": {"class_type": "SaveImage", "inputs": {"filename_prefix": "lotus", "images": ["8", 0]}},
+}
+
+
+def test_compile_resolves_frontend_only_nodes():
+    assert compile_workflow(canvas(), INFO) == EXPECTED
+
+
+def test_bypassed_node_without_a_matching_input_disconnects():
+    ui = canvas()
+    # Drop the LoRA's MODEL input: nothing is left to forward to the sampler
+    ui["nodes"][1]["inputs"] = ui["nodes"][1]["inputs"][1:]
+    assert "model" not in compile_workflow(ui, INFO)["3"]["inputs"]
+
+
+def test_unknown_node_type_is_rejected():
+    ui = canvas()
+    ui["nodes"].append(ui_node(30, "FancyUpscaler"))
+    with pytest.raises(ValueError, match="FancyUpscaler"):
+        compile_workflow(ui, INFO)
+
+
+def test_map_widgets_skips_frontend_extras():
+    assert map_widgets(INFO["KSampler"], [7, "increment", 30]) == {"seed": 7, "steps": 30}
+    assert map_widgets(INFO["LoadImage"], ["plate.png", "image"]) == {"image": "plate.png"}
+    assert map_widgets(INFO["CLIPTextEncode"], {"text": "named"}) == {"text": "named"}
+
+
+def test_load_workflow_compiles_once_per_edit(tmp_path, monkeypatch):
+    monkeypatch.setattr(workflow_module, "_compiled", {})
+    path = tmp_path / "lotus.json"
+    path.write_text(json.dumps(canvas()), encoding="utf-8")
+    cache_dir = tmp_path / "compiled"
+
+    first = load_workflow(path, INFO, cache_dir)
+    first["6"]["inputs"]["text"] = "changed by the caller"
+    # Served from memory, then from disk, without /object_info
+    assert load_workflow(path, cache_dir=cache_dir) == EXPECTED
+    monkeypatch.setattr(workflow_module, "_compiled", {})
+    assert load_workflow(path, cache_dir=cache_dir) == EXPECTED
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+
+def test_load_workflow_passes_api_format_through(tmp_path):
+    path = tmp_path / "api.json"
+    path.write_text(json.dumps(EXPECTED), encoding="utf-8")
+    assert load_workflow(path, cache_dir=None) == EXPECTED
@@ -1,9 +1,8 @@
-import json
-import urllib.request
 import uuid
-import time
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import ComfyError, get_client
+from comfy.harvest import output_tag
+from comfy.packing import pack
 
 def get_api_workflow(positive_prompt, prefix, height=400):
     return {
@@ -30,15 +29,10 @@ def get_api_workflow(positive_prompt, prefix, height=400):
       "4": { "class_type": "CheckpointLoaderSimple", "inputs": { "ckpt_name": "z_image_turbo_bf16.safetensors" } }
     }
 
-def queue_prompt(workflow):
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
+def queue_prompt(workflow, outputs):
     try:
-        with urllib.request.urlopen(req) as response:
-            res = json.loads(response.read().decode('utf-8'))
-            return res['prompt_id']
-    except Exception as e:
+        return get_client().submit(workflow, extra_data=output_tag("title", outputs), track=False)
+    except ComfyError as e:
         print(f"Failed to queue: {e}")
         return None
 
@@ -51,13 +45,18 @@ prompts = [
     ("Stellar_Light", "A minimalist 2D graphic of the word 'STELLAR'. The letters are rendered in soft lavender and deep royal purple. Simple geometric celestial symbols (stars, orbits) integrated into the typography. Cream background. Clean, light, premium feel.")
 ]
 
-print(f"Connecting to ComfyUI at {COMFYUI_URL}...")
-for prefix, text in prompts:
-    prompt_id = queue_prompt(get_api_workflow(text, prefix))
-    if prompt_id:
-        print(f"Queued {prefix} (ID: {prompt_id})")
-    time.sleep(0.5)
+print(f"Connecting to ComfyUI at {get_client().base_url}...")
+# One packed prompt: a single checkpoint load and negative encode for all titles
+packed = pack([get_api_workflow(text, prefix) for prefix, text in prompts])
+# Ember_Light -> light/stage-ember.png, collected later by scan_and_save_titles.py
+outputs = {
+    node_map["9"]: f"{prefix.split('_')[1].lower()}/stage-{prefix.split('_')[0].lower()}.png"
+    for (prefix, _), node_map in zip(prompts, packed.node_maps)
+}
+prompt_id = queue_prompt(packed.workflow, outputs)
+if prompt_id:
+    print(f"Queued {', '.join(prefix for prefix, _ in prompts)} (ID: {prompt_id})")
 
 print("---")
 print("ALL_QUEUED")
-print("Protocol: Fire-and-Forget. User handles placement.")
+print("Protocol: Fire-and-Forget. Run scan_and_save_titles.py to collect the results.")
@@ -1,9 +1,8 @@
-import json
-import urllib.request
 import uuid
 import time
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import get_client
+
 
 def get_api_workflow(positive_prompt, height=400):
     return {
@@ -31,12 +30,7 @@ def get_api_workflow(positive_prompt, height=400):
     }
 
 def queue_prompt(workflow):
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
-    with urllib.request.urlopen(req) as response:
-        res = json.loads(response.read().decode('utf-8'))
-        return res['prompt_id']
+    return get_client().submit(workflow, track=False)
 
 # Dark Mode Prompt
 p1 = "The word EMBER rendered in large, bold, elegant serif typography. The letters are made of black obsidian rock with glowing orange and red magma cracks. Spiritual, mystical, cinematic lighting, black background. Volcanic heat aesthetic. High details. Ultra high resolution. 4k."
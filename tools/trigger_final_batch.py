@@ -1,9 +1,8 @@
-import json
-import urllib.request
 import uuid
 import time
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import ComfyError, get_client
+
 # The user specified Z-Image Turbo AIO (FP8)
 CKPT_NAME = "z-image-turbo-fp8-aio.safetensors"
 
@@ -32,14 +31,10 @@ def trigger_one(positive_prompt, prefix):
       "4": { "class_type": "CheckpointLoaderSimple", "inputs": { "ckpt_name": CKPT_NAME } }
     }
     
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
     try:
-        with urllib.request.urlopen(req) as response:
-            res = json.loads(response.read().decode('utf-8'))
-            print(f"Queued {prefix} (ID: {res['prompt_id']})")
-    except Exception as e:
+        prompt_id = get_client().submit(workflow, track=False)
+        print(f"Queued {prefix} (ID: {prompt_id})")
+    except ComfyError as e:
         print(f"Failed to queue {prefix}: {e}")
 
 tasks = [
@@ -50,7 +45,7 @@ tasks = [
   ("The word STELLAR in bold, ancient-feeling typography. The letters are forged from deep purple nebula gas and stardust. Violet shimmering particles. Black space background. Mystical, vast, awe-inspiring. High resolution.", "STELLAR_DARK")
 ]
 
-print(f"Connecting to ComfyUI at {COMFYUI_URL} using model: {CKPT_NAME}")
+print(f"Connecting to ComfyUI at {get_client().base_url} using model: {CKPT_NAME}")
 for prompt, prefix in tasks:
     trigger_one(prompt, prefix)
     time.sleep(3) # Wait for stability
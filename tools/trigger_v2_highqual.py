@@ -1,9 +1,8 @@
-import json
-import urllib.request
 import uuid
 import time
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from comfy.client import ComfyError, get_client
+
 CKPT_NAME = "z-image-turbo-fp8-aio.safetensors"
 
 def trigger_one(positive_prompt, prefix):
@@ -32,14 +31,10 @@ def trigger_one(positive_prompt, prefix):
       "4": { "class_type": "CheckpointLoaderSimple", "inputs": { "ckpt_name": CKPT_NAME } }
     }
     
-    data = json.dumps({"prompt": workflow}).encode('utf-8')
-    req = urllib.request.Request(f"{COMFYUI_URL}/prompt", data=data)
-    req.add_header('Content-Type', 'application/json')
     try:
-        with urllib.request.urlopen(req) as response:
-            res = json.loads(response.read().decode('utf-8'))
-            print(f"Queued High-Qual {prefix} (ID: {res['prompt_id']})")
-    except Exception as e:
+        prompt_id = get_client().submit(workflow, track=False)
+        print(f"Queued High-Qual {prefix} (ID: {prompt_id})")
+    except ComfyError as e:
         print(f"Failed to queue {prefix}: {e}")
 
 tasks = [
@@ -49,7 +44,7 @@ tasks = [
   ("A clean, minimalist 2D graphic of the word 'STELLAR'. Sharp modern serif font in soft lavender. Perfectly smooth edges. Cream background. Premium light feel. Professional typography.", "STELLAR_LIGHT_V2")
 ]
 
-print(f"Connecting to ComfyUI at {COMFYUI_URL}")
+print(f"Connecting to ComfyUI at {get_client().base_url}")
 print(f"Using Optimized Turbo Parameters: Steps=10, CFG=2.0, Sampler=dpmpp_2m_sde")
 
 for prompt, prefix in tasks: